@@ -0,0 +1,14 @@
+"""Gunicorn Server Hooks, Loaded From Working Directory by Default"""
+
+import os
+
+# Process Environment, as Read by prometheus_client in Workers
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def child_exit(server, worker):
+    """Drop Prometheus Samples of Exited Worker"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid, PROMETHEUS_MULTIPROC_DIR)
@@ -1,6 +1,9 @@
 # Register your models here.
+import re
+from pnr.constants import PnrSerializerConstants
 from pnr.models import PassengerDetail, PnrDetail
 from django.contrib import admin
+from utils.pagination import EstimatedCountPaginator
 
 
 # @admin.register(PnrVersion)
@@ -10,16 +13,38 @@ from django.contrib import admin
 #     search_fields = ("pnr_details", "version")
 
 
+class PnrSearchAdmin(admin.ModelAdmin):
+    """Admin Routing PNR Number Searches to an Indexed Exact Lookup"""
+
+    pnr_lookup = "pnr"
+    paginator = EstimatedCountPaginator
+    # Skip the Unfiltered COUNT(*) Shown Next to Search Results.
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if re.fullmatch(PnrSerializerConstants.PNR_PATTERN, term):
+            return queryset.filter(**{self.pnr_lookup: int(term)}), False
+        return super().get_search_results(request, queryset, search_term)
+
+
 @admin.register(PassengerDetail)
-class PassengerDetailAdmin(admin.ModelAdmin):
+class PassengerDetailAdmin(PnrSearchAdmin):
     list_display = ("name", "pnr_details", "booking_status", "current_status")
     list_filter = ("booking_status", "current_status")
-    search_fields = ("name", "pnr_details")
+    list_select_related = ("pnr_details",)
+    # PNR Numbers Matched by pnr_lookup, Names by Trigram Index.
+    search_fields = ("name",)
+    pnr_lookup = "pnr_details__pnr"
+    raw_id_fields = ("pnr_details",)
 
 
 @admin.register(PnrDetail)
-class PnrDetailAdmin(admin.ModelAdmin):
+class PnrDetailAdmin(PnrSearchAdmin):
     list_display = ("pnr", "train_number", "train_name", "boarding_date", "status")
     list_filter = ("status", "boarding_date")
-    search_fields = ("pnr", "train_number", "train_name")
+    # Trigram Indexed Columns, PNR Numbers Matched by pnr_lookup.
+    search_fields = ("train_number", "train_name")
+    date_hierarchy = "boarding_date"
     readonly_fields = ("created", "modified")
+    raw_id_fields = ("users",)
@@ -2,14 +2,44 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from collections import defaultdict
+from uuid import uuid4
+from django.core.cache import cache
+from django.db import transaction
+from utils.constants import EmailTemplates, ThrottleConstants
 from utils.utils import get_model
-from utils.scrapping_utils import PnrScrapping
+from utils.scrapping_utils import get_scraper
+from utils.scrape_budget import ScrapeBudget
 from django_extensions.db.models import ActivatorModel
-from pnr.api.serializer import PnrDetailSerializer, PnrSerializer
+from quickpnr.tasks import enqueue_email
+from users.authentication import TokenUserJWTAuthentication
+from pnr.api.conditional import not_modified, set_validators
+from pnr.pending import add_waiting_user
+from pnr.api.serializer import (
+    PnrBulkSerializer,
+    PnrDetailSerializer,
+    PnrDetailReadSerializer,
+    PnrMineSerializer,
+    PnrSerializer,
+)
 from utils.exceptions import PNRNotFound
-from pnr.tasks import send_pnr_details, multiple_pnr_found
-from pnr.constants import ReponseMessages
+from utils.query_budget import query_budget
+from utils.throttling import check_throttles
+from pnr.tasks import (
+    multiple_pnr_found,
+    notify_pnr_update,
+    publish_pnr_update,
+    fetch_pnr,
+)
+from pnr.constants import (
+    ReponseMessages,
+    BulkStatus,
+    RefreshConstants,
+    MinePnrConstants,
+)
+from django.db.models import Q
 from django.utils.timezone import now
+from rest_framework.utils.urls import replace_query_param
 
 PnrDetail = get_model(app_name="pnr", model_name="PnrDetail")
 PassengerDetail = get_model(app_name="pnr", model_name="PassengerDetail")
@@ -18,25 +48,39 @@ PassengerDetail = get_model(app_name="pnr", model_name="PassengerDetail")
 class PnrScrapper(APIView):
     """PNR Scrapping API"""
 
+    # Only request.user.id is Used, Skip Loading User.
+    authentication_classes = [TokenUserJWTAuthentication]
+    throttle_costs = {
+        "GET": ThrottleConstants.MAIL_COST,
+        "POST": ThrottleConstants.SCRAPE_COST,
+        "PATCH": ThrottleConstants.SCRAPE_COST,
+    }
+
+    @query_budget(2)
     def get(self, request):
         """Get Request to Mail PNR Details"""
         # Validate PNR Number.
         pnr_serializer = PnrSerializer(data=request.query_params)
         pnr_serializer.is_valid(raise_exception=True)
         try:
-            # Check if PNR details are available in Database.
-            pnr_details = PnrDetail.objects.prefetch_related("passengers_details").get(
-                pnr=pnr_serializer.validated_data["pnr"],
-                expiry__gt=now(),
+            # Check if PNR details are available in Database, Only ID & Status Needed.
+            pnr_details = (
+                PnrDetail.objects.filter(
+                    pnr=pnr_serializer.validated_data["pnr"],
+                    expiry__gt=now(),
+                )
+                .values("id", "status")
+                .get()
             )
-            if pnr_details.status == ActivatorModel.INACTIVE_STATUS:
+            if pnr_details["status"] == ActivatorModel.INACTIVE_STATUS:
                 return Response(
                     {"message": ReponseMessages.FLUSHED_PNR},
                     status=status.HTTP_404_NOT_FOUND,
                 )
-            serializer = PnrDetailSerializer(pnr_details)
             # Mail PNR Details to User.
-            send_pnr_details.delay(request.user.id, serializer.data["id"])
+            enqueue_email(
+                EmailTemplates.PNR_DETAILS, request.user.id, pnr_id=pnr_details["id"]
+            )
             return Response(
                 {"message": ReponseMessages.PNR_DETAILS_MAILED},
                 status=status.HTTP_200_OK,
@@ -53,26 +97,36 @@ class PnrScrapper(APIView):
                 {"message": [str(err)]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @query_budget(6)
     def post(self, request):
         pnr_serializer = PnrSerializer(data=request.data)
         pnr_serializer.is_valid(raise_exception=True)
+        # Answer Polling Clients with 304 if Their Copy is Current.
+        response = not_modified(request, pnr_serializer.validated_data["pnr"])
+        if response is not None:
+            return response
         try:
             # If PNR Exists in database return data from database
-            pnr_details = PnrDetail.objects.prefetch_related("passengers_details").get(
+            pnr_details = PnrDetailReadSerializer.get_row(
                 pnr=pnr_serializer.validated_data["pnr"],
                 expiry__gt=now(),
             )
-            if pnr_details.status == ActivatorModel.INACTIVE_STATUS:
+            if pnr_details["status"] == ActivatorModel.INACTIVE_STATUS:
                 return Response(
                     {"message": ReponseMessages.FLUSHED_PNR},
                     status=status.HTTP_404_NOT_FOUND,
                 )
-            serializer = PnrDetailSerializer(pnr_details)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            serializer = PnrDetailReadSerializer(pnr_details)
+            return set_validators(
+                Response(serializer.data, status=status.HTTP_200_OK),
+                pnr_details["id"],
+                pnr_details["modified"],
+            )
         except PnrDetail.DoesNotExist:
             # If PNR Not Exists Fetch PNR.
             try:
-                scrapper = PnrScrapping(pnr_serializer.validated_data["pnr"])
+                ScrapeBudget.acquire(interactive=True)
+                scrapper = get_scraper(pnr_serializer.validated_data["pnr"])
                 data = scrapper()
                 data["users"] = [request.user.id]
                 serializer = PnrDetailSerializer(data=data)
@@ -85,11 +139,20 @@ class PnrScrapper(APIView):
                         status=ActivatorModel.ACTIVE_STATUS,
                     )
                 except PnrDetail.DoesNotExist:
-                    # If PNR details not available create details.
-                    serializer.save()
-                    send_pnr_details.delay(
-                        request.user.id, serializer.data["id"]
-                    )  # TODO: Use Signals to Send Pnr Details
+                    # If PNR details not available create details, Mail Queued in Same Transaction.
+                    with transaction.atomic():
+                        serializer.save()
+                        enqueue_email(
+                            EmailTemplates.PNR_DETAILS,
+                            request.user.id,
+                            pnr_id=serializer.instance.id,
+                        )
+                    publish_pnr_update(serializer.data)
+                    return set_validators(
+                        Response(serializer.data, status=status.HTTP_201_CREATED),
+                        serializer.instance.id,
+                        serializer.instance.modified,
+                    )
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             except PNRNotFound as pnr_not_found:
                 # Handle others exception related to Scrapping PNR.
@@ -109,6 +172,7 @@ class PnrScrapper(APIView):
                 {"message": [str(err)]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @query_budget(7)
     def patch(self, request):
         # Validate PNR number.
         pnr_serializer = PnrSerializer(data=request.data)
@@ -124,17 +188,22 @@ class PnrScrapper(APIView):
                     {"message": ReponseMessages.FLUSHED_PNR},
                     status=status.HTTP_404_NOT_FOUND,
                 )
-            # Scrap Updated Details
-            scrapper = PnrScrapping(pnr_serializer.validated_data["pnr"])
+            # Scrap Updated Details, Counted Against Budget so Background Refresh Backs Off.
+            ScrapeBudget.acquire(interactive=True)
+            scrapper = get_scraper(pnr_serializer.validated_data["pnr"])
             data = scrapper()
             # Update PNR Details.
             serializer = PnrDetailSerializer(obj, data=data, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
-            # Mail Updated Details.
-            send_pnr_details.delay(request.user.id, serializer.data["id"])
+            # Mail Updated Details, Only if Status Changed.
+            notify_pnr_update(obj.id, [request.user.id], serializer)
             # Return Updated Details.
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return set_validators(
+                Response(serializer.data, status=status.HTTP_200_OK),
+                serializer.instance.id,
+                serializer.instance.modified,
+            )
         except PnrDetail.DoesNotExist:
             # PNR Details Not Available to Update Please Fetch First.
             return Response(
@@ -153,3 +222,135 @@ class PnrScrapper(APIView):
             return Response(
                 {"message": [str(e)]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class PnrBulkLookup(APIView):
+    """Bulk PNR Lookup API"""
+
+    authentication_classes = [TokenUserJWTAuthentication]
+    throttle_costs = {"POST": ThrottleConstants.BULK_COST}
+
+    @query_budget(4)
+    def post(self, request):
+        """Return Stored PNR Details, Schedule Scrapes for Missing PNRs"""
+        bulk_serializer = PnrBulkSerializer(data=request.data)
+        bulk_serializer.is_valid(raise_exception=True)
+        pnrs = bulk_serializer.validated_data["pnrs"]
+        results = [
+            {"pnr": pnr, "status": BulkStatus.INVALID, "message": errors}
+            for pnr, errors in pnrs["errors"].items()
+        ]
+
+        # All Stored PNRs in One Query, Their Passengers in One More.
+        rows = defaultdict(list)
+        for row in PnrDetail.objects.filter(
+            pnr__in=pnrs["valid"], expiry__gt=now()
+        ).values(*PnrDetailReadSerializer.pnr_fields):
+            rows[row["pnr"]].append(row)
+        passengers = PnrDetailReadSerializer.get_passengers_map(
+            [pnr_rows[0]["id"] for pnr_rows in rows.values() if len(pnr_rows) == 1]
+        )
+
+        missing = [pnr for pnr in pnrs["valid"] if pnr not in rows]
+        if missing:
+            # Charge Scrapes Not Already Queued by Others, Users Wait on All.
+            locked = cache.get_many(
+                RefreshConstants.FETCH_LOCK_KEY.format(pnr=pnr) for pnr in missing
+            )
+            scrapes = len(missing) - len(locked)
+            if scrapes:
+                check_throttles(
+                    request, self, scrapes * ThrottleConstants.BULK_SCRAPE_COST
+                )
+            add_waiting_user(missing, request.user.id)
+
+        for pnr in pnrs["valid"]:
+            if pnr not in rows:
+                # Scrape in Background Unless Already Scheduled, Lock Holds Job ID.
+                task_id = str(uuid4())
+                if cache.add(
+                    RefreshConstants.FETCH_LOCK_KEY.format(pnr=pnr),
+                    task_id,
+                    RefreshConstants.LOCK_TIMEOUT,
+                ):
+                    fetch_pnr.apply_async((pnr, request.user.id), task_id=task_id)
+                results.append({"pnr": pnr, "status": BulkStatus.SCHEDULED})
+            elif len(rows[pnr]) > 1:
+                multiple_pnr_found.delay(pnr)
+                results.append({"pnr": pnr, "status": BulkStatus.MULTIPLE})
+            elif rows[pnr][0]["status"] == ActivatorModel.INACTIVE_STATUS:
+                results.append({"pnr": pnr, "status": BulkStatus.FLUSHED})
+            else:
+                row = rows[pnr][0]
+                results.append(
+                    {
+                        "pnr": pnr,
+                        "status": BulkStatus.FOUND,
+                        "data": PnrDetailReadSerializer(
+                            row, passengers=passengers[row["id"]]
+                        ).data,
+                    }
+                )
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class PnrMineList(APIView):
+    """User PNRs Listing API, Keyset Paginated on (boarding_date, id)"""
+
+    authentication_classes = [TokenUserJWTAuthentication]
+
+    @query_budget(2)
+    def get(self, request):
+        """List Active PNRs of User, Oldest Upcoming Trip First"""
+        mine_serializer = PnrMineSerializer(data=request.query_params)
+        mine_serializer.is_valid(raise_exception=True)
+        params = mine_serializer.validated_data
+        queryset = PnrDetail.objects.filter(
+            users=request.user.id, status=ActivatorModel.ACTIVE_STATUS
+        )
+        if "train_number" in params:
+            queryset = queryset.filter(train_number=params["train_number"])
+
+        # Past Trips Are Listed Latest First, Others Soonest First.
+        descending = params.get("when") == MinePnrConstants.PAST
+        if params.get("when") == MinePnrConstants.UPCOMING:
+            queryset = queryset.filter(boarding_date__gte=now())
+        elif descending:
+            queryset = queryset.filter(boarding_date__lt=now())
+        if "cursor" in params:
+            boarding_date, pk = params["cursor"]
+            lookup = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"boarding_date__{lookup}": boarding_date})
+                | Q(boarding_date=boarding_date, **{f"id__{lookup}": pk})
+            )
+        ordering = ("-boarding_date", "-id") if descending else ("boarding_date", "id")
+
+        # One Extra Row Tells Whether a Next Page Exists.
+        rows = list(
+            queryset.order_by(*ordering).values(*PnrDetailReadSerializer.pnr_fields)[
+                : params["page_size"] + 1
+            ]
+        )
+        has_next = len(rows) > params["page_size"]
+        rows = rows[: params["page_size"]]
+        passengers = PnrDetailReadSerializer.get_passengers_map(
+            [row["id"] for row in rows]
+        )
+        next_url = None
+        if has_next:
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                MinePnrConstants.CURSOR_PARAM,
+                PnrMineSerializer.encode_cursor(rows[-1]),
+            )
+        return Response(
+            {
+                "next": next_url,
+                "results": [
+                    PnrDetailReadSerializer(row, passengers=passengers[row["id"]]).data
+                    for row in rows
+                ],
+            },
+            status=status.HTTP_200_OK,
+        )
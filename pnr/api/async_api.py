@@ -0,0 +1,287 @@
+# Async PNR Scrapping API, Served Under ASGI
+import asyncio
+import json
+from io import BytesIO
+from uuid import uuid4
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.utils.timezone import now
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django_extensions.db.models import ActivatorModel
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from utils.pubsub import Broker
+from utils.constants import EmailTemplates
+from utils.throttling import check_throttles
+from utils.utils import get_model, authenticate_jwt
+from pnr.api.api import PnrScrapper
+from pnr.api.conditional import not_modified_headers, validator_headers
+from pnr.api.serializer import PnrDetailReadSerializer, PnrSerializer
+from pnr.pending import add_waiting_user
+from pnr.constants import ReponseMessages, RefreshConstants, StreamConstants
+from pnr.tasks import multiple_pnr_found, fetch_pnr, refresh_pnr
+from quickpnr.tasks import enqueue_email
+
+PnrDetail = get_model(app_name="pnr", model_name="PnrDetail")
+
+jobs = Broker(StreamConstants.JOB_PATTERN)
+
+
+class AsyncPnrScrapper(View):
+    """Async PNR Scrapping API, Responses Match PnrScrapper"""
+
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    parser = api_settings.DEFAULT_PARSER_CLASSES[0]()
+    throttle_costs = PnrScrapper.throttle_costs
+    # Messages of Job Results Published Without One
+    job_messages = {
+        status.HTTP_404_NOT_FOUND: ReponseMessages.PNR_NOT_FOUND,
+        status.HTTP_429_TOO_MANY_REQUESTS: ReponseMessages.SCRAPE_BUSY,
+        status.HTTP_504_GATEWAY_TIMEOUT: ReponseMessages.PNR_FETCH_TIMEOUT,
+    }
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Token Authenticated Like DRF Views, CSRF Not Applicable.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def render(self, data, status_code, headers=None):
+        """Render Data With Default DRF Renderer"""
+        return HttpResponse(
+            self.renderer.render(data),
+            status=status_code,
+            content_type=self.renderer.media_type,
+            headers=headers,
+        )
+
+    def render_exception(self, request, exc):
+        """Render APIException the Way DRF Exception Handler Does"""
+        headers = None
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {"detail": exc.detail}
+        if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+            headers = {
+                "WWW-Authenticate": JWTAuthentication().authenticate_header(request)
+            }
+        if getattr(exc, "wait", None):
+            headers = {"Retry-After": str(int(exc.wait))}
+        return self.render(data, exc.status_code, headers)
+
+    async def render_pnr(self, row, status_code):
+        """Render PNR Details With Conditional Request Validators"""
+        data = await PnrDetailReadSerializer(row).adata()
+        headers = await sync_to_async(validator_headers)(
+            data, row["id"], row["modified"]
+        )
+        return self.render(data, status_code, headers)
+
+    def get_data(self, request):
+        """Parse Request Body"""
+        if request.content_type == self.parser.media_type:
+            return self.parser.parse(BytesIO(request.body))
+        return request.POST
+
+    async def await_job(self, task, lock_key: str, done_status: int, *args, **kwargs):
+        """Queue Scrape Job Unless One is Running & Wait for Its Result Without Holding a Thread"""
+        task_id = str(uuid4())
+        # Lock Holds ID of the Queued Job, Concurrent Requests Await That Job.
+        queued = await cache.aadd(lock_key, task_id, RefreshConstants.LOCK_TIMEOUT)
+        if not queued:
+            task_id = await cache.aget(lock_key)
+            if task_id is None:
+                # Running Job Finished Between Lock Checks.
+                return {"status": done_status, "message": None}
+        channels = [StreamConstants.JOB_CHANNEL.format(task_id=task_id)]
+        queue = jobs.subscribe(channels)
+        try:
+            await jobs.wait_subscribed()
+            if queued:
+                try:
+                    await sync_to_async(task.apply_async, thread_sensitive=False)(
+                        args, kwargs, task_id=task_id
+                    )
+                except Exception:
+                    await cache.adelete(lock_key)
+                    raise
+            elif await cache.aget(lock_key) != task_id:
+                # Running Job Published Its Result Before Subscription.
+                return {"status": done_status, "message": None}
+            _, message = await asyncio.wait_for(
+                queue.get(), StreamConstants.JOB_TIMEOUT
+            )
+            return json.loads(message)
+        except asyncio.TimeoutError:
+            return {
+                "status": status.HTTP_504_GATEWAY_TIMEOUT,
+                "message": [ReponseMessages.PNR_FETCH_TIMEOUT],
+            }
+        finally:
+            jobs.unsubscribe(channels, queue)
+
+    def render_job_error(self, result):
+        """Render Failed Job Result, Jobs Publish Some Statuses Without Message"""
+        message = result["message"] or [
+            self.job_messages.get(result["status"], ReponseMessages.PNR_FETCH_FAILED)
+        ]
+        return self.render({"message": message}, result["status"])
+
+    async def multiple_pnr_found(self, pnr: int):
+        """Queue Removal of Duplicate PNRs, Keeps Last Modified One"""
+        await sync_to_async(multiple_pnr_found.delay, thread_sensitive=False)(pnr)
+        return self.render(
+            {"message": [ReponseMessages.MULTIPLE_PNR_FOUND]},
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            result = await authenticate_jwt(request)
+            if result is None:
+                raise NotAuthenticated()
+            request.user = result[0]
+            await sync_to_async(check_throttles)(request, self)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.render_exception(request, exc)
+
+    async def get(self, request):
+        """Get Request to Mail PNR Details"""
+        pnr_serializer = PnrSerializer(data=request.GET)
+        if not pnr_serializer.is_valid():
+            return self.render(pnr_serializer.errors, status.HTTP_400_BAD_REQUEST)
+        try:
+            pnr_details = (
+                await PnrDetail.objects.filter(
+                    pnr=pnr_serializer.validated_data["pnr"],
+                    expiry__gt=now(),
+                )
+                .values("id", "status")
+                .aget()
+            )
+            if pnr_details["status"] == ActivatorModel.INACTIVE_STATUS:
+                return self.render(
+                    {"message": ReponseMessages.FLUSHED_PNR},
+                    status.HTTP_404_NOT_FOUND,
+                )
+            # Mail PNR Details to User.
+            await sync_to_async(enqueue_email)(
+                EmailTemplates.PNR_DETAILS, request.user.id, pnr_id=pnr_details["id"]
+            )
+            return self.render(
+                {"message": ReponseMessages.PNR_DETAILS_MAILED}, status.HTTP_200_OK
+            )
+        except PnrDetail.DoesNotExist:
+            return self.render(
+                {"message": ReponseMessages.PNR_NOT_FOUND}, status.HTTP_404_NOT_FOUND
+            )
+        except Exception as err:
+            return self.render(
+                {"message": [str(err)]}, status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    async def post(self, request):
+        pnr_serializer = PnrSerializer(data=self.get_data(request))
+        if not pnr_serializer.is_valid():
+            return self.render(pnr_serializer.errors, status.HTTP_400_BAD_REQUEST)
+        pnr = pnr_serializer.validated_data["pnr"]
+        # Answer Polling Clients with 304 if Their Copy is Current.
+        validators = await sync_to_async(not_modified_headers)(request.headers, pnr)
+        if validators is not None:
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=validators)
+        try:
+            # If PNR Exists in database return data from database
+            pnr_details = await PnrDetailReadSerializer.aget_row(
+                pnr=pnr, expiry__gt=now()
+            )
+            if pnr_details["status"] == ActivatorModel.INACTIVE_STATUS:
+                return self.render(
+                    {"message": ReponseMessages.FLUSHED_PNR},
+                    status.HTTP_404_NOT_FOUND,
+                )
+            return await self.render_pnr(pnr_details, status.HTTP_200_OK)
+        except PnrDetail.DoesNotExist:
+            pass
+        except PnrDetail.MultipleObjectsReturned:
+            return await self.multiple_pnr_found(pnr)
+        except Exception as err:
+            return self.render(
+                {"message": [str(err)]}, status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        try:
+            # If PNR Not Exists Await Scrape Job on Scrape Queue, Linked Once Stored.
+            await sync_to_async(add_waiting_user, thread_sensitive=False)(
+                [pnr], request.user.id
+            )
+            result = await self.await_job(
+                fetch_pnr,
+                RefreshConstants.FETCH_LOCK_KEY.format(pnr=pnr),
+                status.HTTP_201_CREATED,
+                pnr,
+                request.user.id,
+                interactive=True,
+            )
+            if result["status"] != status.HTTP_201_CREATED:
+                return self.render_job_error(result)
+            pnr_details = await PnrDetailReadSerializer.aget_row(
+                pnr=pnr, status=ActivatorModel.ACTIVE_STATUS, expiry__gt=now()
+            )
+            return await self.render_pnr(pnr_details, status.HTTP_201_CREATED)
+        except PnrDetail.DoesNotExist:
+            # Flushed or Deactivated Since the Job Stored It.
+            return self.render(
+                {"message": [ReponseMessages.PNR_NOT_FOUND]},
+                status.HTTP_404_NOT_FOUND,
+            )
+        except PnrDetail.MultipleObjectsReturned:
+            return await self.multiple_pnr_found(pnr)
+        except Exception as err:
+            return self.render(
+                {"message": [str(err)]}, status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    async def patch(self, request):
+        pnr_serializer = PnrSerializer(data=self.get_data(request))
+        if not pnr_serializer.is_valid():
+            return self.render(pnr_serializer.errors, status.HTTP_400_BAD_REQUEST)
+        pnr = pnr_serializer.validated_data["pnr"]
+        try:
+            pnr_details = (
+                await PnrDetail.objects.filter(pnr=pnr, expiry__gt=now())
+                .values("id", "status")
+                .aget()
+            )
+            if pnr_details["status"] == ActivatorModel.INACTIVE_STATUS:
+                return self.render(
+                    {"message": ReponseMessages.FLUSHED_PNR},
+                    status.HTTP_404_NOT_FOUND,
+                )
+            # Await Scrape & Update Job, Mails User if Status Changed.
+            result = await self.await_job(
+                refresh_pnr,
+                RefreshConstants.LOCK_KEY.format(id=pnr_details["id"]),
+                status.HTTP_200_OK,
+                pnr_details["id"],
+                request.user.id,
+            )
+            if result["status"] != status.HTTP_200_OK:
+                return self.render_job_error(result)
+            pnr_details = await PnrDetailReadSerializer.aget_row(id=pnr_details["id"])
+            return await self.render_pnr(pnr_details, status.HTTP_200_OK)
+        except PnrDetail.DoesNotExist:
+            return self.render(
+                {"message": [ReponseMessages.PNR_NOT_FOUND]},
+                status.HTTP_404_NOT_FOUND,
+            )
+        except PnrDetail.MultipleObjectsReturned:
+            return await self.multiple_pnr_found(pnr)
+        except Exception as err:
+            return self.render(
+                {"message": [str(err)]}, status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
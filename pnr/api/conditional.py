@@ -0,0 +1,76 @@
+"""Conditional PNR Responses Using ETag & Last-Modified"""
+
+import hashlib
+from django.core.cache import cache
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from django.utils.timezone import now
+from django_extensions.db.models import ActivatorModel
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from utils.constants import MetricsConstants
+from utils.metrics import record_cache
+from utils.utils import get_model
+from pnr.constants import CacheConstants
+
+PnrDetail = get_model(app_name="pnr", model_name="PnrDetail")
+
+
+def _etag_cache_key(pnr_id, modified):
+    """Cache Key of PNR Content Hash, Changes Whenever PNR is Saved"""
+    return CacheConstants.PNR_ETAG_KEY.format(id=pnr_id, modified=modified.timestamp())
+
+
+def not_modified_headers(headers, pnr: int):
+    """Return Validator Headers if Client's Copy of PNR is Current, Else None"""
+    if_none_match = headers.get("If-None-Match")
+    if_modified_since = headers.get("If-Modified-Since")
+    if not (if_none_match or if_modified_since):
+        return None
+    # Only ID & Modified Needed, Passengers Are Not Loaded.
+    rows = list(
+        PnrDetail.objects.filter(
+            pnr=pnr, expiry__gt=now(), status=ActivatorModel.ACTIVE_STATUS
+        ).values("id", "modified")[:2]
+    )
+    if len(rows) != 1:
+        return None
+    pnr_id, modified = rows[0]["id"], rows[0]["modified"]
+    etag = cache.get(_etag_cache_key(pnr_id, modified))
+    record_cache(MetricsConstants.PNR_ETAG_CACHE, etag is not None)
+    if if_none_match:
+        # If-None-Match Takes Precedence Over If-Modified-Since (RFC 9110).
+        etags = parse_etags(if_none_match)
+        if etag is None or not ("*" in etags or etag in etags):
+            return None
+    else:
+        since = parse_http_date_safe(if_modified_since)
+        if since is None or int(modified.timestamp()) > since:
+            return None
+    validators = {"Last-Modified": http_date(modified.timestamp())}
+    if etag is not None:
+        validators["ETag"] = etag
+    return validators
+
+
+def not_modified(request, pnr: int):
+    """Return 304 Response if Client's Copy of PNR is Current, Else None"""
+    validators = not_modified_headers(request.headers, pnr)
+    if validators is None:
+        return None
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers=validators)
+
+
+def validator_headers(data, pnr_id, modified):
+    """Return Strong ETag (Content Hash) & Last-Modified Headers of PNR Details"""
+    content = api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data)
+    etag = quote_etag(hashlib.sha256(content).hexdigest())
+    cache.set(_etag_cache_key(pnr_id, modified), etag, CacheConstants.PNR_ETAG_TIMEOUT)
+    return {"ETag": etag, "Last-Modified": http_date(modified.timestamp())}
+
+
+def set_validators(response, pnr_id, modified):
+    """Set Strong ETag (Content Hash) & Last-Modified Headers on PNR Response"""
+    for header, value in validator_headers(response.data, pnr_id, modified).items():
+        response[header] = value
+    return response
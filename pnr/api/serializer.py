@@ -1,9 +1,14 @@
 # PNR Serializer
 from rest_framework import serializers
 from utils.utils import get_model
+from collections import defaultdict
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_str
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.utils.timezone import timedelta
 from utils.exceptions import InvalidPnrNumber
-from pnr.constants import PnrSerializerConstants
+from pnr.constants import PnrSerializerConstants, ModelsConstants, MinePnrConstants
 
 PnrDetail = get_model(app_name="pnr", model_name="PnrDetail")
 PassengerDetail = get_model(app_name="pnr", model_name="PassengerDetail")
@@ -30,13 +35,68 @@ class PnrSerializer(serializers.Serializer):
         return value
 
 
+class PnrBulkSerializer(serializers.Serializer):
+    """Bulk PNR Numbers Serializer, Each PNR Validated by PnrSerializer"""
+
+    pnrs = serializers.ListField(
+        allow_empty=False, max_length=PnrSerializerConstants.BULK_LIMIT
+    )
+
+    def validate_pnrs(self, value):
+        """Split PNR Numbers into Valid PNRs & Errors, Duplicates Removed"""
+        valid, errors = [], {}
+        for pnr in dict.fromkeys(map(str, value)):
+            serializer = PnrSerializer(data={"pnr": pnr})
+            if serializer.is_valid():
+                valid.append(serializer.validated_data["pnr"])
+            else:
+                errors[pnr] = serializer.errors["pnr"]
+        return {"valid": valid, "errors": errors}
+
+
+class PnrMineSerializer(serializers.Serializer):
+    """User PNRs Listing Query Serializer"""
+
+    when = serializers.ChoiceField(
+        choices=MinePnrConstants.WHEN_CHOICES, required=False
+    )
+    train_number = serializers.CharField(max_length=8, required=False)
+    page_size = serializers.IntegerField(
+        min_value=1,
+        max_value=MinePnrConstants.MAX_PAGE_SIZE,
+        default=MinePnrConstants.PAGE_SIZE,
+    )
+    cursor = serializers.CharField(required=False)
+
+    @staticmethod
+    def encode_cursor(row):
+        """Encode (boarding_date, id) Keyset Position of Row"""
+        position = MinePnrConstants.CURSOR_SEPARATOR.join(
+            (row["boarding_date"].isoformat(), str(row["id"]))
+        )
+        return urlsafe_base64_encode(position.encode())
+
+    def validate_cursor(self, value):
+        """Decode Cursor into (boarding_date, id)"""
+        try:
+            boarding_date, pk = force_str(urlsafe_base64_decode(value)).split(
+                MinePnrConstants.CURSOR_SEPARATOR
+            )
+            boarding_date = parse_datetime(boarding_date)
+            if boarding_date is None:
+                raise ValueError
+            return boarding_date, int(pk)
+        except (ValueError, TypeError):
+            raise serializers.ValidationError(PnrSerializerConstants.INVALID_CURSOR)
+
+
 class PassengerDetailSerializer(serializers.ModelSerializer):
     """Passenger Detail Serializer"""
 
     class Meta:
         model = PassengerDetail
         fields = ["id", "name", "booking_status", "current_status", "pnr_details"]
-        extra_kwargs = {"pnr_details": {"write_only": True}}
+        extra_kwargs = {"pnr_details": {"write_only": True, "required": False}}
 
 
 class PnrDetailSerializer(serializers.ModelSerializer):
@@ -65,34 +125,193 @@ class PnrDetailSerializer(serializers.ModelSerializer):
             "passengers_details",
         ]
 
+    def validated_passengers(self):
+        """Validate Scraped Passengers Without Per Passenger Queries, PNR Set by Caller"""
+        passengers = [
+            {key: value for key, value in passenger.items() if key != "pnr_details"}
+            for passenger in self.initial_data.pop("passengers_details")
+        ]
+        serializer = PassengerDetailSerializer(data=passengers, many=True)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
     def create(self, validated_data):
         validated_data["expiry"] = validated_data["boarding_date"] + timedelta(days=5)
         instance = super().create(validated_data)
-        # Create Passenger Details Instances using Serializer
-        passengers_details = self.initial_data.pop("passengers_details")
-        for passenger in passengers_details:
-            passenger["pnr_details"] = instance.id
-            serializer = PassengerDetailSerializer(data=passenger)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
+        # Create Passenger Details in One Query
+        PassengerDetail.objects.bulk_create(
+            PassengerDetail(pnr_details=instance, **passenger)
+            for passenger in self.validated_passengers()
+        )
         return instance
 
     def update(self, instance, validated_data):
+        # Stored State to Detect Changes Worth Notifying
+        changed_fields = [
+            field
+            for field in ModelsConstants.NOTIFY_PNR_FIELDS
+            if field in validated_data
+            and validated_data[field] != getattr(instance, field)
+        ]
+        previous_passengers = {
+            passenger.name: passenger for passenger in instance.passengers_details.all()
+        }
         instance = super().update(instance=instance, validated_data=validated_data)
-        # Update Passenger Details Instances using Serializer
-        passengers_details = self.initial_data.pop("passengers_details")
-        for passenger in passengers_details:
-            passenger["pnr_details"] = instance.id
-            # Update Passenger Details
-            try:
-                obj = PassengerDetail.objects.get(
-                    name=passenger["name"], pnr_details=instance.id
-                )
-                serializer = PassengerDetailSerializer(
-                    obj, data=passenger, partial=True
-                )
-            except PassengerDetail.DoesNotExist:
-                serializer = PassengerDetailSerializer(data=passenger)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-        return super().update(instance, validated_data)
+        # Passengers Matched by Name, Changed Ones Saved & New Ones Created in One Query Each
+        changed_passengers, updated, created, update_fields = [], [], [], set()
+        passengers = self.validated_passengers()
+        for passenger in passengers:
+            previous = previous_passengers.get(passenger["name"])
+            if previous is None:
+                created.append(PassengerDetail(pnr_details=instance, **passenger))
+                continue
+            fields = [
+                field
+                for field, value in passenger.items()
+                if getattr(previous, field) != value
+            ]
+            if not fields:
+                continue
+            for field in fields:
+                setattr(previous, field, passenger[field])
+            updated.append(previous)
+            update_fields.update(fields)
+            if set(fields) & set(ModelsConstants.NOTIFY_PASSENGER_FIELDS):
+                changed_passengers.append(previous.id)
+        if updated:
+            PassengerDetail.objects.bulk_update(updated, update_fields)
+        if created:
+            PassengerDetail.objects.bulk_create(created)
+            changed_passengers.extend(passenger.id for passenger in created)
+        # Passengers Gone From Scrape (Cancelled) Deleted in One Query.
+        scraped = {passenger["name"] for passenger in passengers}
+        removed = [
+            passenger.id
+            for name, passenger in previous_passengers.items()
+            if name not in scraped
+        ]
+        if removed:
+            PassengerDetail.objects.filter(id__in=removed).delete()
+        if created or removed:
+            # Prefetched Passengers Are Stale.
+            getattr(instance, "_prefetched_objects_cache", {}).pop(
+                ModelsConstants.PASSENGERS_DETAILS, None
+            )
+        self.changes = {
+            "fields": changed_fields,
+            "passengers": changed_passengers,
+            "removed": removed,
+        }
+        return instance
+
+    @property
+    def has_changes(self):
+        """Check if Last Update Changed Any Notified Field"""
+        changes = getattr(self, "changes", {})
+        return bool(
+            changes.get("fields") or changes.get("passengers") or changes.get("removed")
+        )
+
+
+class PnrDetailReadSerializer:
+    """Read-Only PNR Detail Serializer Built on values() Rows"""
+
+    pnr_fields = (
+        "id",
+        "pnr",
+        "train_number",
+        "train_name",
+        "boarding_date",
+        "boarding_point",
+        "reserved_from",
+        "reserved_to",
+        "reserved_class",
+        "fare",
+        "remark",
+        "status",
+        "modified",
+        "train_status",
+        "charting_status",
+    )
+    passenger_fields = ("id", "name", "booking_status", "current_status")
+
+    # Same DRF Fields PnrDetailSerializer Uses, Keeps Output Wire-Compatible
+    datetime_field = serializers.DateTimeField()
+    fare_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+    def __init__(self, row, passengers=None):
+        self.row = row
+        self.passengers = passengers
+
+    @classmethod
+    def get_row(cls, **filters):
+        """Return PNR Row, Raises DoesNotExist / MultipleObjectsReturned"""
+        return PnrDetail.objects.filter(**filters).values(*cls.pnr_fields).get()
+
+    @classmethod
+    def get_passengers(cls, pnr_id):
+        """Return Passenger Rows of PNR"""
+        return list(
+            PassengerDetail.objects.filter(pnr_details_id=pnr_id)
+            .order_by("id")
+            .values(*cls.passenger_fields)
+        )
+
+    @classmethod
+    def get_passengers_map(cls, pnr_ids):
+        """Return Passenger Rows of Many PNRs in One Query, Keyed by PNR ID"""
+        passengers = defaultdict(list)
+        for passenger in (
+            PassengerDetail.objects.filter(pnr_details_id__in=pnr_ids)
+            .order_by("id")
+            .values("pnr_details_id", *cls.passenger_fields)
+        ):
+            passengers[passenger.pop("pnr_details_id")].append(passenger)
+        return passengers
+
+    @classmethod
+    async def aget_row(cls, **filters):
+        """Async get_row()"""
+        return await PnrDetail.objects.filter(**filters).values(*cls.pnr_fields).aget()
+
+    @classmethod
+    async def aget_passengers(cls, pnr_id):
+        """Async get_passengers()"""
+        return [
+            passenger
+            async for passenger in PassengerDetail.objects.filter(pnr_details_id=pnr_id)
+            .order_by("id")
+            .values(*cls.passenger_fields)
+        ]
+
+    @staticmethod
+    def only_passengers(data, passenger_ids):
+        """Keep Only Given Passengers in Serialized PNR, All if None Given"""
+        if passenger_ids:
+            data["passengers_details"] = [
+                passenger
+                for passenger in data["passengers_details"]
+                if passenger["id"] in passenger_ids
+            ]
+        return data
+
+    async def adata(self):
+        """Async data, Passengers Loaded With Async ORM"""
+        if self.passengers is None:
+            self.passengers = await self.aget_passengers(self.row["id"])
+        return self.data
+
+    @cached_property
+    def data(self):
+        data = dict(self.row)
+        data["boarding_date"] = self.datetime_field.to_representation(
+            data["boarding_date"]
+        )
+        data["fare"] = self.fare_field.to_representation(data["fare"])
+        data["modified"] = self.datetime_field.to_representation(data["modified"])
+        data["passengers_details"] = (
+            self.passengers
+            if self.passengers is not None
+            else self.get_passengers(data["id"])
+        )
+        return data
@@ -0,0 +1,63 @@
+# Live PNR Status Stream (Server-Sent Events), Served Under ASGI
+import asyncio
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from utils.pubsub import Broker
+from utils.utils import authenticate_jwt
+from pnr.api.serializer import PnrSerializer
+from pnr.constants import StreamConstants, PnrSerializerConstants
+
+broker = Broker(StreamConstants.PATTERN, StreamConstants.QUEUE_SIZE)
+
+
+async def authenticate(request):
+    """Authenticate JWT Bearer Token, Returns User or None"""
+    try:
+        result = await authenticate_jwt(request)
+    except APIException:
+        return None
+    return result[0] if result else None
+
+
+async def pnr_stream(request):
+    """Stream Status Updates of Requested PNRs"""
+    user = await authenticate(request)
+    if user is None or not user.is_active:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    pnrs = request.GET.getlist("pnr")[: StreamConstants.MAX_PNRS]
+    serializers = [PnrSerializer(data={"pnr": pnr}) for pnr in pnrs]
+    if not serializers or not all(serializer.is_valid() for serializer in serializers):
+        return JsonResponse(
+            {"pnr": [PnrSerializerConstants.INVALID_PNR]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    channels = [
+        StreamConstants.CHANNEL.format(pnr=serializer.validated_data["pnr"])
+        for serializer in serializers
+    ]
+
+    async def events():
+        queue = broker.subscribe(channels)
+        try:
+            yield StreamConstants.RETRY
+            while True:
+                try:
+                    channel, message = await asyncio.wait_for(
+                        queue.get(), StreamConstants.HEARTBEAT
+                    )
+                    yield StreamConstants.EVENT.format(data=message.decode())
+                except asyncio.TimeoutError:
+                    yield StreamConstants.KEEP_ALIVE
+        finally:
+            # Client Disconnected, Django Cancels the Iterator.
+            broker.unsubscribe(channels, queue)
+
+    return StreamingHttpResponse(
+        events(),
+        content_type=StreamConstants.CONTENT_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,8 +1,17 @@
 # PNR Scrapping URL
 
 from django.urls import path
-from pnr.api.api import PnrScrapper
+from utils.constants import Settings
+from pnr.api.api import PnrScrapper, PnrBulkLookup, PnrMineList
+from pnr.api.async_api import AsyncPnrScrapper
+from pnr.api.stream import pnr_stream
+
+# Async Views Need ASGI, Enable With ASYNC_PNR_VIEWS=True
+PnrFetchView = AsyncPnrScrapper if Settings.ASYNC_PNR_VIEWS else PnrScrapper
 
 urlpatterns = [
-    path("fetch/", PnrScrapper.as_view()),
+    path("fetch/", PnrFetchView.as_view()),
+    path("bulk/", PnrBulkLookup.as_view()),
+    path("mine/", PnrMineList.as_view()),
+    path("stream/", pnr_stream),
 ]
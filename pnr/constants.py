@@ -29,6 +29,16 @@ class ModelsConstants:
     """Models Constants"""
 
     PASSENGERS_DETAILS = "passengers_details"
+    BOARDING_INDEX = "pnr_boarding_date_id_idx"
+    PNR_INDEX = "pnr_pnr_idx"
+    # Trigram Indexes Serving Admin icontains Search
+    TRAIN_NAME_TRGM_INDEX = "pnr_train_name_trgm_idx"
+    TRAIN_NUMBER_TRGM_INDEX = "pnr_train_number_trgm_idx"
+    PASSENGER_NAME_TRGM_INDEX = "passenger_name_trgm_idx"
+    TRIGRAM_OPCLASS = "gin_trgm_ops"
+    # Fields Whose Change is Notified to Users
+    NOTIFY_PNR_FIELDS = ("train_status", "charting_status")
+    NOTIFY_PASSENGER_FIELDS = ("current_status",)
 
 
 class ReponseMessages:
@@ -39,6 +49,9 @@ class ReponseMessages:
     PNR_NOT_FOUND = "PNR Not Found"
     PNR_DETAILS_MAILED = "PNR Details Mailed Successfully"
     FLUSHED_PNR = "Flushed PNR Requested"
+    PNR_FETCH_TIMEOUT = "PNR Fetch Timed Out, Please Try Again"
+    PNR_FETCH_FAILED = "PNR Fetch Failed, Please Try Again"
+    SCRAPE_BUSY = "Too Many PNR Fetches Right Now, Please Try Again Later"
 
 
 class ScrappingConstants:
@@ -53,3 +66,138 @@ class PnrSerializerConstants:
     """PNR Serializers Constants"""
 
     INVALID_PNR = "Invalid PNR Number"
+    PNR_PATTERN = r"\d{10}"
+    BULK_LIMIT = 300
+    INVALID_CURSOR = "Invalid Cursor"
+
+
+class BulkStatus:
+    """Per PNR Status of Bulk Lookup"""
+
+    FOUND = "found"
+    SCHEDULED = "scheduled"
+    INVALID = "invalid"
+    FLUSHED = "flushed"
+    MULTIPLE = "multiple"
+
+
+class MinePnrConstants:
+    """User PNRs Listing Constants"""
+
+    UPCOMING = "upcoming"
+    PAST = "past"
+    WHEN_CHOICES = (UPCOMING, PAST)
+    PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+    CURSOR_PARAM = "cursor"
+    CURSOR_SEPARATOR = "|"
+
+
+class CacheConstants:
+    """PNR Cache Keys & Timeouts"""
+
+    PNR_ETAG_KEY = "pnr:etag:{id}:{modified}"
+    PNR_ETAG_TIMEOUT = 60 * 60 * 24
+
+
+class RefreshConstants:
+    """Background PNR Refresh Tiers"""
+
+    URGENT = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+    # Minutes Between Refreshes of Each Tier
+    INTERVALS = {URGENT: 15, HIGH: 60, NORMAL: 6 * 60, LOW: 24 * 60}
+    # Days Before Boarding
+    NEAR_DEPARTURE_DAYS = 2
+    CHARTING_DAYS = 1
+    SOON_DAYS = 7
+    WAITING_STATUSES = ("WL", "RAC")
+    CHART_NOT_PREPARED = "NOT PREPARED"
+    LOCK_KEY = "pnr:refresh:{id}"
+    FETCH_LOCK_KEY = "pnr:fetch:{pnr}"
+    # Users Requesting a PNR While its Fetch is Queued
+    WAITING_KEY = "pnr:fetch:waiting:{pnr}"
+    LOCK_TIMEOUT = 60 * 10
+    BUDGET_KEY = "scrape:budget:{minute}"
+
+
+class RefreshMessages:
+    """Background PNR Refresh Messages"""
+
+    REFRESHED = "PNR Details Refreshed - {pnr}"
+    BUDGET_EXHAUSTED = "Scrape Budget Exhausted, Refresh Skipped - {id}"
+    FETCH_BUDGET_EXHAUSTED = "Scrape Budget Exhausted, Fetch Skipped - {pnr}"
+    NOT_AVAILABLE = "PNR Not Available For Refresh - {id}"
+    SCHEDULED = "{count} PNR Refreshes Scheduled"
+    FETCHED = "PNR Details Fetched - {pnr}"
+    ALREADY_FETCHED = "PNR Details Already Available - {pnr}"
+
+
+class DigestConstants:
+    """Per User PNR Notification Digest Keys"""
+
+    BUFFER_KEY = "pnr:digest:{user_id}"
+    SCHEDULED_KEY = "pnr:digest:scheduled:{user_id}"
+    ALL_PASSENGERS = "*"
+
+
+class DigestMessages:
+    """PNR Digest Task Messages"""
+
+    QUEUED = "PNR Digest of {count} PNRs Queued for User - {user_id}"
+    EMPTY = "No PNR Updates to Digest for User - {user_id}"
+
+
+class FanOutConstants:
+    """PNR Update Fan-Out to Tracking Users"""
+
+    RECIPIENT_CHUNK = 200
+    QUEUED = "PNR Details of {pnr} Queued for {count} Users"
+
+
+class StreamConstants:
+    """Live PNR Updates Stream Constants"""
+
+    CHANNEL = "pnr:updates:{pnr}"
+    PATTERN = "pnr:updates:*"
+    EVENT = "event: pnr\ndata: {data}\n\n"
+    KEEP_ALIVE = ": keep-alive\n\n"
+    RETRY = "retry: 5000\n\n"
+    # Seconds Between Keep-Alive Comments
+    HEARTBEAT = 15
+    MAX_PNRS = 20
+    QUEUE_SIZE = 16
+    CONTENT_TYPE = "text/event-stream"
+    # Scrape Job Results Awaited by Async Views
+    JOB_CHANNEL = "pnr:jobs:{task_id}"
+    JOB_PATTERN = "pnr:jobs:*"
+    JOB_TIMEOUT = 90
+
+
+class LoadTestConstants:
+    """Seeded Load Test Data & Request Mix"""
+
+    USERNAME = "loadtest_{index}"
+    EMAIL = "loadtest_{index}@quickpnr.test"
+    PASSWORD = "LoadTest#2024"
+    # Seeded PNRs Count Up From SEEDED_PNR, Misses From MISS_PNR
+    SEEDED_PNR = 9100000000
+    MISS_PNR = 9200000000
+    # Operation Weights of Default Request Mix
+    CACHED_POST = "cached_post"
+    CONDITIONAL_POST = "conditional_post"
+    CACHED_GET = "cached_get"
+    MISS = "miss"
+    REFRESH = "refresh"
+    AUTH = "auth"
+    MIX = {
+        CACHED_POST: 45,
+        CONDITIONAL_POST: 15,
+        CACHED_GET: 5,
+        MISS: 10,
+        REFRESH: 10,
+        AUTH: 15,
+    }
+    PERCENTILES = (50, 90, 95, 99)
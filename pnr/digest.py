@@ -0,0 +1,43 @@
+"""Per User Buffer of PNR Update Notifications, Mailed Together as a Digest"""
+
+import json
+from utils.redis_client import get_redis
+from pnr.constants import DigestConstants
+
+
+def buffer_notification(user_id, pnr_id, passenger_ids, window: int) -> bool:
+    """Buffer Update, True if it Opened a New Window & Digest Must be Scheduled"""
+    pipe = get_redis().pipeline()
+    pipe.rpush(
+        DigestConstants.BUFFER_KEY.format(user_id=user_id),
+        json.dumps({"pnr_id": pnr_id, "passengers": passenger_ids or []}),
+    )
+    # Buffer Outlives Window so a Late Digest Task Still Finds it.
+    pipe.expire(DigestConstants.BUFFER_KEY.format(user_id=user_id), window * 10)
+    pipe.set(
+        DigestConstants.SCHEDULED_KEY.format(user_id=user_id),
+        1,
+        nx=True,
+        ex=window * 2,
+    )
+    return bool(pipe.execute()[-1])
+
+
+def drain(user_id) -> dict:
+    """Take Buffered Updates, PNR ID Mapped to Changed Passenger IDs or None (All)"""
+    pipe = get_redis().pipeline()
+    pipe.lrange(DigestConstants.BUFFER_KEY.format(user_id=user_id), 0, -1)
+    pipe.delete(DigestConstants.BUFFER_KEY.format(user_id=user_id))
+    pipe.delete(DigestConstants.SCHEDULED_KEY.format(user_id=user_id))
+    entries, *_ = pipe.execute()
+
+    updates = {}
+    for entry in map(json.loads, entries):
+        passengers = set(entry["passengers"]) or {DigestConstants.ALL_PASSENGERS}
+        updates.setdefault(entry["pnr_id"], set()).update(passengers)
+    return {
+        pnr_id: (
+            None if DigestConstants.ALL_PASSENGERS in passengers else sorted(passengers)
+        )
+        for pnr_id, passengers in updates.items()
+    }
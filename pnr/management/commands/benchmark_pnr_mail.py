@@ -0,0 +1,124 @@
+"""Benchmark PNR Details Mail Rendering on Large Passenger Lists"""
+
+from timeit import timeit
+from django.core.management.base import BaseCommand
+from utils.email_service import EmailService
+from utils.email_templates import PASSENGER_ROW
+from utils.utils import get_model
+
+EmailTemplate = get_model("quickpnr", "EmailTemplate")
+
+FIELDS = (
+    "pnr",
+    "train_number",
+    "train_name",
+    "reserved_class",
+    "boarding_date",
+    "reserved_from",
+    "reserved_to",
+    "boarding_point",
+    "passengers_details",
+    "fare",
+    "remark",
+    "train_status",
+    "charting_status",
+)
+
+
+class Command(BaseCommand):
+    help = "Compare per-call str.format rendering with precompiled PNR mail templates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=500)
+        parser.add_argument(
+            "--passengers", type=int, nargs="+", default=[1, 6, 100, 1000]
+        )
+        parser.add_argument(
+            "--template-file",
+            help="HTML of the pnr_details EmailTemplate, defaults to a ~25KB stand-in",
+        )
+
+    def legacy_render(self, html, pnr_detail):
+        """Rendering Before Precompiled Templates"""
+        passenger_details = "\n".join(
+            [
+                PASSENGER_ROW.text.format(**passenger)
+                for passenger in pnr_detail["passengers_details"]
+            ]
+        )
+        return html.format(
+            pnr=pnr_detail["pnr"],
+            train_number=pnr_detail["train_number"],
+            train_name=pnr_detail["train_name"],
+            reserved_class=pnr_detail["reserved_class"],
+            boarding_date=pnr_detail["boarding_date"][0:10],
+            reserved_from=pnr_detail["reserved_from"],
+            reserved_to=pnr_detail["reserved_to"],
+            boarding_point=pnr_detail["boarding_point"],
+            passengers_details=passenger_details,
+            fare=pnr_detail["fare"],
+            remark=(
+                pnr_detail["remark"]
+                if pnr_detail["remark"] is not None
+                else "No remarks"
+            ),
+            train_status=(
+                pnr_detail["train_status"]
+                if pnr_detail["train_status"]
+                else "Status not available"
+            ),
+            charting_status=pnr_detail["charting_status"],
+        )
+
+    def handle(self, *args, **options):
+        if options["template_file"]:
+            with open(options["template_file"]) as template_file:
+                html = template_file.read()
+        else:
+            styled_block = (
+                '<div style="margin: 0; padding: 8px; font-size: 14px;"></div>\n'
+            )
+            html = "".join(
+                styled_block * 25 + f"<p>{{{field}}}</p>\n" for field in FIELDS
+            )
+        template = EmailTemplate(template=html, is_html=True)
+        iterations = options["iterations"]
+        self.stdout.write(f"template size {len(html)} chars, {iterations} renders")
+        for passengers in options["passengers"]:
+            pnr_detail = {
+                "pnr": 1234567890,
+                "train_number": "12951",
+                "train_name": "MUMBAI RAJDHANI",
+                "reserved_class": "3A",
+                "boarding_date": "2024-12-01T20:00:00+05:30",
+                "reserved_from": "NDLS",
+                "reserved_to": "MMCT",
+                "boarding_point": "NDLS",
+                "fare": "4135.50",
+                "remark": None,
+                "train_status": None,
+                "charting_status": "Chart Not Prepared",
+                "passengers_details": [
+                    {
+                        "id": index,
+                        "name": f"Passenger {index}",
+                        "booking_status": f"WL {index}",
+                        "current_status": "CNF",
+                    }
+                    for index in range(passengers)
+                ],
+            }
+            assert self.legacy_render(
+                html, pnr_detail
+            ) == EmailService.render_pnr_status(template, pnr_detail)
+            legacy = timeit(
+                lambda: self.legacy_render(html, pnr_detail), number=iterations
+            )
+            compiled = timeit(
+                lambda: EmailService.render_pnr_status(template, pnr_detail),
+                number=iterations,
+            )
+            self.stdout.write(
+                f"{passengers:>5} passengers  str.format {legacy / iterations * 1e6:9.1f}us  "
+                f"compiled {compiled / iterations * 1e6:9.1f}us  x{legacy / compiled:.2f}"
+            )
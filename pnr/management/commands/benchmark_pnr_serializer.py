@@ -0,0 +1,83 @@
+"""Benchmark PNR Detail Serializers CPU Cost Per Request"""
+
+from decimal import Decimal
+from timeit import timeit
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+from utils.utils import get_model
+from pnr.api.serializer import PnrDetailSerializer, PnrDetailReadSerializer
+
+PnrDetail = get_model(app_name="pnr", model_name="PnrDetail")
+PassengerDetail = get_model(app_name="pnr", model_name="PassengerDetail")
+
+
+class Command(BaseCommand):
+    help = "Compare ModelSerializer and values() read path serialization cost"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=5000)
+        parser.add_argument("--passengers", type=int, default=6)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        row = {
+            "id": 1,
+            "pnr": 1234567890,
+            "train_number": "12951",
+            "train_name": "MUMBAI RAJDHANI",
+            "boarding_date": now(),
+            "boarding_point": "NDLS",
+            "reserved_from": "NDLS",
+            "reserved_to": "MMCT",
+            "reserved_class": "3A",
+            "fare": Decimal("4135.50"),
+            "remark": None,
+            "status": PnrDetail.ACTIVE_STATUS,
+            "modified": now(),
+            "train_status": "On Time",
+            "charting_status": "Chart Not Prepared",
+        }
+        passengers = [
+            {
+                "id": index,
+                "name": "Passenger {index}".format(index=index),
+                "booking_status": "WL/{index}".format(index=index),
+                "current_status": "CNF/B1/{index}".format(index=index),
+            }
+            for index in range(1, options["passengers"] + 1)
+        ]
+        # Build In-Memory Instances, Prefetched Passengers Keeps DB Out of the Timing.
+        instance = PnrDetail(**row)
+        instance._prefetched_objects_cache = {
+            "passengers_details": [
+                PassengerDetail(pnr_details_id=row["id"], **passenger)
+                for passenger in passengers
+            ]
+        }
+
+        model_data = PnrDetailSerializer(instance).data
+        read_data = PnrDetailReadSerializer(row, passengers=passengers).data
+        if dict(model_data) != read_data:
+            self.stderr.write("Representations differ")
+            return
+
+        model_time = timeit(
+            lambda: PnrDetailSerializer(instance).data, number=iterations
+        )
+        read_time = timeit(
+            lambda: PnrDetailReadSerializer(row, passengers=passengers).data,
+            number=iterations,
+        )
+        self.stdout.write(
+            "ModelSerializer : {time:.1f} us/request".format(
+                time=model_time / iterations * 1e6
+            )
+        )
+        self.stdout.write(
+            "Read Serializer : {time:.1f} us/request".format(
+                time=read_time / iterations * 1e6
+            )
+        )
+        self.stdout.write(
+            "Speedup         : {ratio:.1f}x".format(ratio=model_time / read_time)
+        )
@@ -0,0 +1,260 @@
+"""Drive a Realistic Request Mix Against a Running Server"""
+
+import itertools
+import random
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+from time import perf_counter
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from pnr.constants import LoadTestConstants
+
+LOGIN_URL = "/accounts/login/"
+REFRESH_URL = "/accounts/token/refresh/"
+PROFILE_URL = "/accounts/profile/"
+FETCH_URL = "/pnr/fetch/"
+
+
+class Recorder:
+    """Latency & Status of Every Request, Shared by Workers"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def add(self, name: str, seconds: float, status):
+        with self.lock:
+            self.latencies[name].append(seconds)
+            self.statuses[name][status] += 1
+
+
+class Worker:
+    """One Simulated Client, Logged in as One Seeded User"""
+
+    def __init__(self, command, index: int):
+        self.command = command
+        self.options = command.options
+        self.session = requests.Session()
+        self.user = index % self.options["users"]
+        self.etags = {}
+        self.login()
+
+    def request(self, name: str, method: str, path: str, **kwargs):
+        """Timed Request, Transport Failures Recorded as Status "exc" """
+        start = perf_counter()
+        try:
+            response = self.session.request(
+                method,
+                self.options["url"] + path,
+                timeout=self.options["timeout"],
+                **kwargs,
+            )
+        except requests.RequestException:
+            self.command.recorder.add(name, perf_counter() - start, "exc")
+            return None
+        self.command.recorder.add(name, perf_counter() - start, response.status_code)
+        return response
+
+    def login(self):
+        response = self.request(
+            "login",
+            "POST",
+            LOGIN_URL,
+            json={
+                "username": LoadTestConstants.USERNAME.format(index=self.user),
+                "password": LoadTestConstants.PASSWORD,
+            },
+        )
+        if response is not None and response.status_code == 200:
+            self.tokens = response.json()
+            self.session.headers["Authorization"] = f"Bearer {self.tokens['access']}"
+
+    def seeded_pnr(self) -> int:
+        return LoadTestConstants.SEEDED_PNR + random.randrange(self.options["pnrs"])
+
+    def cached_post(self):
+        self.request(
+            LoadTestConstants.CACHED_POST,
+            "POST",
+            FETCH_URL,
+            json={"pnr": self.seeded_pnr()},
+        )
+
+    def conditional_post(self):
+        """Polling Client, Revalidates its Copy With If-None-Match"""
+        pnr = self.seeded_pnr()
+        headers = {"If-None-Match": self.etags[pnr]} if pnr in self.etags else {}
+        response = self.request(
+            LoadTestConstants.CONDITIONAL_POST,
+            "POST",
+            FETCH_URL,
+            json={"pnr": pnr},
+            headers=headers,
+        )
+        if response is not None and "ETag" in response.headers:
+            self.etags[pnr] = response.headers["ETag"]
+
+    def cached_get(self):
+        self.request(
+            LoadTestConstants.CACHED_GET,
+            "GET",
+            FETCH_URL,
+            params={"pnr": self.seeded_pnr()},
+        )
+
+    def miss(self):
+        """PNR Not Stored Yet, Server Scrapes It"""
+        self.request(
+            LoadTestConstants.MISS,
+            "POST",
+            FETCH_URL,
+            json={"pnr": next(self.command.miss_pnrs)},
+        )
+
+    def refresh(self):
+        self.request(
+            LoadTestConstants.REFRESH,
+            "PATCH",
+            FETCH_URL,
+            json={"pnr": self.seeded_pnr()},
+        )
+
+    def auth(self):
+        """Log in Again, Rotate Refresh Token & Read Profile"""
+        self.login()
+        if not hasattr(self, "tokens"):
+            return
+        response = self.request(
+            "token_refresh",
+            "POST",
+            REFRESH_URL,
+            json={"refresh": self.tokens["refresh"]},
+        )
+        if response is not None and response.status_code == 200:
+            self.tokens.update(response.json())
+            self.session.headers["Authorization"] = f"Bearer {self.tokens['access']}"
+        self.request("profile", "GET", PROFILE_URL)
+
+    def run(self, deadline: float):
+        operations, weights = zip(*self.options["mix"].items())
+        while perf_counter() < deadline:
+            getattr(self, random.choices(operations, weights)[0])()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running server seeded by seed_load_test, "
+        "report throughput, latency percentiles & error rates"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--duration", type=float, default=60, help="Seconds")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--users", type=int, default=50, help="Seeded users")
+        parser.add_argument("--pnrs", type=int, default=500, help="Seeded PNRs")
+        parser.add_argument("--timeout", type=float, default=120, help="Seconds")
+        parser.add_argument(
+            "--mix",
+            default=",".join(
+                f"{name}={weight}" for name, weight in LoadTestConstants.MIX.items()
+            ),
+            help="Operation weights, e.g. cached_post=50,miss=10",
+        )
+        parser.add_argument("--seed", type=int, help="Random seed of request mix")
+
+    @staticmethod
+    def parse_mix(value: str) -> dict:
+        mix = {}
+        for item in value.split(","):
+            name, _, weight = item.partition("=")
+            if name not in LoadTestConstants.MIX or not weight.isdigit():
+                raise CommandError(
+                    f"Invalid mix entry {item!r}, operations: "
+                    + ", ".join(LoadTestConstants.MIX)
+                )
+            mix[name] = int(weight)
+        if not any(mix.values()):
+            raise CommandError("Mix needs a non-zero weight")
+        return mix
+
+    def handle(self, *args, **options):
+        options["url"] = options["url"].rstrip("/")
+        options["mix"] = self.parse_mix(options["mix"])
+        if options["seed"] is not None:
+            random.seed(options["seed"])
+        self.options = options
+        self.recorder = Recorder()
+        # Fresh PNR per Miss, Offset per Run so Reruns Miss Again.
+        self.miss_pnrs = itertools.count(
+            LoadTestConstants.MISS_PNR + random.randrange(10**7) * 10
+        )
+
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            workers = list(
+                executor.map(
+                    lambda index: Worker(self, index), range(options["concurrency"])
+                )
+            )
+            start = perf_counter()
+            deadline = start + options["duration"]
+            list(executor.map(lambda worker: worker.run(deadline), workers))
+            elapsed = perf_counter() - start
+        self.report(elapsed)
+
+    def report(self, elapsed: float):
+        """Per Operation & Total Throughput, Latency Percentiles & Error Rates"""
+        percentiles = LoadTestConstants.PERCENTILES
+        self.stdout.write(
+            f"{'operation':<18}{'requests':>9}{'req/s':>9}"
+            + "".join(f"{f'p{p} ms':>10}" for p in percentiles)
+            + f"{'max ms':>10}{'4xx %':>8}{'5xx/exc %':>11}  statuses"
+        )
+        latencies = self.recorder.latencies
+        statuses = self.recorder.statuses
+        rows = sorted(latencies) + ["total"]
+        latencies["total"] = list(itertools.chain(*latencies.values()))
+        statuses["total"] = sum(statuses.values(), Counter())
+        for name in rows:
+            samples = latencies[name]
+            if not samples:
+                continue
+            cuts = (
+                quantiles(samples, n=100, method="inclusive")
+                if len(samples) > 1
+                else samples * 99
+            )
+            count = len(samples)
+            client_errors = sum(
+                times
+                for status, times in statuses[name].items()
+                if isinstance(status, int) and 400 <= status < 500
+            )
+            server_errors = sum(
+                times
+                for status, times in statuses[name].items()
+                if status == "exc" or status >= 500
+            )
+            self.stdout.write(
+                f"{name:<18}{count:>9}{count / elapsed:>9.1f}"
+                + "".join(f"{cuts[p - 1] * 1000:>10.1f}" for p in percentiles)
+                + f"{max(samples) * 1000:>10.1f}"
+                f"{client_errors / count * 100:>8.2f}"
+                f"{server_errors / count * 100:>11.2f}  "
+                + " ".join(
+                    f"{status}:{times}"
+                    for status, times in sorted(
+                        statuses[name].items(), key=lambda item: str(item[0])
+                    )
+                )
+            )
+        if statuses["total"][429]:
+            self.stdout.write(
+                self.style.WARNING(
+                    "429s seen, raise THROTTLE_USER_RATE & THROTTLE_IP_RATE "
+                    "on the server under test"
+                )
+            )
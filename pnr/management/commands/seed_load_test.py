@@ -0,0 +1,112 @@
+"""Seed Users & PNRs Driven by the load_test Command"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import make_aware
+from utils.constants import FakeScraperConstants
+from utils.fake_scraper import FakePnrScrapping
+from utils.utils import get_model
+from pnr.constants import LoadTestConstants
+
+User = get_model("users", "User")
+PnrDetail = get_model("pnr", "PnrDetail")
+PassengerDetail = get_model("pnr", "PassengerDetail")
+
+
+class Command(BaseCommand):
+    help = (
+        "Replace load test users & PNRs, PNR details come from the fake scraper. "
+        "Only rows tagged by earlier seeds & fake scrapes are deleted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--pnrs", type=int, default=500)
+        parser.add_argument(
+            "--allow-destructive",
+            action="store_true",
+            help="Run without DEBUG, e.g. against a staging database",
+        )
+
+    @staticmethod
+    def clear():
+        """Delete Tagged Data of Earlier Seeds & Runs, PNRs Scraped by Misses Included"""
+        User.objects.filter(
+            username__startswith=LoadTestConstants.USERNAME.format(index=""),
+            last_name=FakeScraperConstants.TAG,
+        ).delete()
+        PnrDetail.objects.filter(
+            pnr__gte=LoadTestConstants.SEEDED_PNR, remark=FakeScraperConstants.TAG
+        ).delete()
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if not (settings.DEBUG or options["allow_destructive"]):
+            raise CommandError(
+                "Refusing to replace load test data without DEBUG, "
+                "pass --allow-destructive to run anyway"
+            )
+        self.clear()
+        # Hashed Once, bulk_create Also Skips Registration Mails.
+        password = make_password(LoadTestConstants.PASSWORD)
+        users = User.objects.bulk_create(
+            User(
+                username=LoadTestConstants.USERNAME.format(index=index),
+                email=LoadTestConstants.EMAIL.format(index=index),
+                password=password,
+                last_name=FakeScraperConstants.TAG,
+                is_verified=True,
+            )
+            for index in range(options["users"])
+        )
+        pnrs, passengers = [], []
+        for index in range(options["pnrs"]):
+            data = FakePnrScrapping(LoadTestConstants.SEEDED_PNR + index).details()
+            boarding_date = make_aware(
+                PnrDetail._meta.get_field("boarding_date").to_python(
+                    data["boarding_date"]
+                )
+            )
+            pnrs.append(
+                PnrDetail(
+                    pnr=data["pnr"],
+                    train_number=data["train_number"],
+                    train_name=data["train_name"],
+                    boarding_date=boarding_date,
+                    boarding_point=data["boarding_point"],
+                    reserved_from=data["reserved_from"],
+                    reserved_to=data["reserved_to"],
+                    reserved_class=data["reserved_class"],
+                    fare=data["fare"],
+                    remark=data["remark"],
+                    charting_status=data["charting_status"],
+                    train_status=data["train_status"],
+                    expiry=boarding_date + timedelta(days=5),
+                )
+            )
+            passengers.append(data["passengers_details"])
+        pnrs = PnrDetail.objects.bulk_create(pnrs)
+        PassengerDetail.objects.bulk_create(
+            PassengerDetail(pnr_details=pnr, **passenger)
+            for pnr, pnr_passengers in zip(pnrs, passengers)
+            for passenger in pnr_passengers
+        )
+        # Each User Tracks Its Share of PNRs, Listed by /pnr/mine/.
+        if users:
+            PnrDetail.users.through.objects.bulk_create(
+                PnrDetail.users.through(
+                    pnrdetail_id=pnr.id, user_id=users[index % len(users)].id
+                )
+                for index, pnr in enumerate(pnrs)
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"seeded {len(users)} users & {len(pnrs)} PNRs "
+                f"({LoadTestConstants.SEEDED_PNR}-"
+                f"{LoadTestConstants.SEEDED_PNR + len(pnrs) - 1}), "
+                f"password {LoadTestConstants.PASSWORD}"
+            )
+        )
@@ -1,4 +1,5 @@
 # Pnr Scrapping Details Model
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from pnr.constants import ModelsConstants, ModelVerbose
 from django_extensions.db.models import ActivatorModel, TimeStampedModel
@@ -38,6 +39,23 @@ class PnrDetail(ActivatorModel, TimeStampedModel):
 
     class Meta:
         verbose_name = ModelVerbose.PNR_DETAIL
+        indexes = [
+            # Keyset Pagination of User PNRs
+            models.Index(
+                fields=["boarding_date", "id"], name=ModelsConstants.BOARDING_INDEX
+            ),
+            models.Index(fields=["pnr"], name=ModelsConstants.PNR_INDEX),
+            GinIndex(
+                fields=["train_name"],
+                name=ModelsConstants.TRAIN_NAME_TRGM_INDEX,
+                opclasses=[ModelsConstants.TRIGRAM_OPCLASS],
+            ),
+            GinIndex(
+                fields=["train_number"],
+                name=ModelsConstants.TRAIN_NUMBER_TRGM_INDEX,
+                opclasses=[ModelsConstants.TRIGRAM_OPCLASS],
+            ),
+        ]
 
     def soft_delete(self):
         """Soft Delete PNR Details"""
@@ -69,3 +87,10 @@ class PassengerDetail(models.Model):
 
     class Meta:
         verbose_name = ModelVerbose.PASSENGER_DETAIL
+        indexes = [
+            GinIndex(
+                fields=["name"],
+                name=ModelsConstants.PASSENGER_NAME_TRGM_INDEX,
+                opclasses=[ModelsConstants.TRIGRAM_OPCLASS],
+            ),
+        ]
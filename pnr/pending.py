@@ -0,0 +1,37 @@
+"""Users Waiting on a Queued PNR Fetch, Linked to the PNR Once it is Stored"""
+
+import logging
+from redis.exceptions import RedisError
+from utils.redis_client import get_redis
+from pnr.constants import RefreshConstants
+
+logger = logging.getLogger(__name__)
+
+
+def add_waiting_user(pnrs, user_id) -> bool:
+    """Record User as Waiting on Fetch of Each PNR, One Round Trip"""
+    pipe = get_redis().pipeline()
+    for pnr in pnrs:
+        key = RefreshConstants.WAITING_KEY.format(pnr=pnr)
+        pipe.sadd(key, user_id)
+        # Outlives the Fetch Lock, Retries Included.
+        pipe.expire(key, RefreshConstants.LOCK_TIMEOUT * 2)
+    try:
+        pipe.execute()
+        return True
+    except RedisError as err:
+        logger.warning("Recording PNR fetch waiters failed: %s", err)
+        return False
+
+
+def pop_waiting_users(pnr) -> set:
+    """Take IDs of Users Waiting on Fetch of PNR"""
+    pipe = get_redis().pipeline()
+    pipe.smembers(RefreshConstants.WAITING_KEY.format(pnr=pnr))
+    pipe.delete(RefreshConstants.WAITING_KEY.format(pnr=pnr))
+    try:
+        members, _ = pipe.execute()
+    except RedisError as err:
+        logger.warning("Reading PNR fetch waiters failed: %s", err)
+        return set()
+    return {int(member) for member in members}
@@ -0,0 +1,82 @@
+"""Priority Tiers for Background PNR Refresh"""
+
+from functools import reduce
+from operator import or_
+from django.db.models import Case, Exists, IntegerField, OuterRef, Q, Value, When
+from django.utils.timezone import now, timedelta
+from django_extensions.db.models import ActivatorModel
+from utils.utils import get_model
+from pnr.constants import RefreshConstants
+
+PnrDetail = get_model(app_name="pnr", model_name="PnrDetail")
+PassengerDetail = get_model(app_name="pnr", model_name="PassengerDetail")
+
+
+def refresh_tier(at):
+    """Return Refresh Tier Expression of PNR, Lower is Refreshed More Often"""
+
+    def boards_within(days: int) -> Q:
+        return Q(boarding_date__lte=at + timedelta(days=days))
+
+    # Any Passenger Waitlisted or RAC.
+    waiting = Exists(
+        PassengerDetail.objects.filter(pnr_details=OuterRef("pk")).filter(
+            reduce(
+                or_,
+                (
+                    Q(current_status__icontains=status)
+                    for status in RefreshConstants.WAITING_STATUSES
+                ),
+            )
+        )
+    )
+    chart_pending = Q(charting_status__icontains=RefreshConstants.CHART_NOT_PREPARED)
+    return Case(
+        When(
+            Q(waiting) & boards_within(RefreshConstants.NEAR_DEPARTURE_DAYS),
+            then=Value(RefreshConstants.URGENT),
+        ),
+        When(
+            chart_pending & boards_within(RefreshConstants.CHARTING_DAYS),
+            then=Value(RefreshConstants.URGENT),
+        ),
+        When(
+            Q(waiting) & boards_within(RefreshConstants.SOON_DAYS),
+            then=Value(RefreshConstants.HIGH),
+        ),
+        When(
+            boards_within(RefreshConstants.CHARTING_DAYS),
+            then=Value(RefreshConstants.HIGH),
+        ),
+        When(
+            Q(waiting) | boards_within(RefreshConstants.SOON_DAYS),
+            then=Value(RefreshConstants.NORMAL),
+        ),
+        default=Value(RefreshConstants.LOW),
+        output_field=IntegerField(),
+    )
+
+
+def due_pnrs(at=None, limit: int | None = None):
+    """Return IDs of PNRs Due for Refresh, Most Urgent & Stalest First"""
+    at = at or now()
+    # Not Refreshed Within Interval of its Tier.
+    stale = reduce(
+        or_,
+        (
+            Q(tier=tier, modified__lte=at - timedelta(minutes=interval))
+            for tier, interval in RefreshConstants.INTERVALS.items()
+        ),
+    )
+    return list(
+        PnrDetail.objects.filter(
+            status=ActivatorModel.ACTIVE_STATUS,
+            expiry__gt=at,
+            # Boarding Date Has No Time, Keep Refreshing Through Day of Journey.
+            boarding_date__gte=at - timedelta(days=1),
+        )
+        .annotate(tier=refresh_tier(at))
+        .filter(stale)
+        .order_by("tier", "modified", "id")
+        .values_list("id", flat=True)[:limit]
+    )
@@ -1,5 +1,6 @@
 # Signals to Send PNR Details When PNR Instance Created
-from django.db.models.signals import post_save
+from django.db import connections
+from django.db.models.signals import post_save, pre_migrate
 from django.dispatch import receiver
 
 # from pnr.tasks import send_pnr_details
@@ -12,3 +13,14 @@ def send_pnr_details_signal(sender, instance, created, **kwargs):
     return True
     # if created:
     # send_pnr_details.delay(instance.user_id, instance.id)
+
+
+@receiver(pre_migrate)
+def create_trigram_extension(sender, using, **kwargs):
+    """Trigram Indexes of PNR Models Need pg_trgm Before Migrations Run"""
+    connection = connections[using]
+    if sender.name != "pnr" or connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    return True
@@ -1,24 +1,182 @@
+import logging
+from uuid import uuid4
 from celery import shared_task
+from celery.exceptions import MaxRetriesExceededError, Retry
+from django.core.cache import cache
+from django.utils.timezone import now
+from django_extensions.db.models import ActivatorModel
+from redis.exceptions import RedisError
+from rest_framework import status
+from django.db import transaction
+from utils.constants import EmailTemplates, Settings
 from utils.email_service import EmailService
+from utils.pubsub import publish
+from utils.exceptions import PNRNotFound
+from utils.query_budget import query_budget
+from utils.scrape_budget import ScrapeBudget
+from utils.scrapping_utils import get_scraper
 from utils.utils import get_model
-from pnr.api.serializer import PnrDetailSerializer
-from pnr.constants import ReponseMessages
+from pnr.api.serializer import PnrDetailSerializer, PnrDetailReadSerializer
+from pnr.constants import (
+    DigestMessages,
+    FanOutConstants,
+    ReponseMessages,
+    RefreshConstants,
+    RefreshMessages,
+    StreamConstants,
+)
+from pnr.digest import buffer_notification, drain
+from pnr.pending import pop_waiting_users
+from pnr.scheduler import due_pnrs
+from quickpnr.tasks import enqueue_email, enqueue_emails
+
+logger = logging.getLogger(__name__)
 
 User = get_model("users", "User")
 PnrDetail = get_model("pnr", "PnrDetail")
 EmailService = EmailService()
 
 
+def publish_pnr_update(data):
+    """Push PNR Details to Live Stream Subscribers"""
+    return publish(StreamConstants.CHANNEL.format(pnr=data["pnr"]), data)
+
+
+def publish_job_result(task_id, status_code: int, message=None):
+    """Publish Outcome of Scrape Job to Views Awaiting It"""
+    return publish(
+        StreamConstants.JOB_CHANNEL.format(task_id=task_id),
+        {"status": status_code, "message": message},
+    )
+
+
+def link_users(pnr_id, user_ids):
+    """Track PNR for Users & Queue Their PNR Details Mail, One Query Each"""
+    PnrDetail.users.through.objects.bulk_create(
+        (
+            PnrDetail.users.through(pnrdetail_id=pnr_id, user_id=user_id)
+            for user_id in user_ids
+        ),
+        ignore_conflicts=True,
+    )
+    return enqueue_emails(
+        EmailTemplates.PNR_DETAILS,
+        ((user_id, {"pnr_id": pnr_id}) for user_id in user_ids),
+    )
+
+
+def tracking_users(pnr_id, chunk_size: int = FanOutConstants.RECIPIENT_CHUNK):
+    """Yield IDs of Users Tracking PNR in Chunks, Keyset on User ID"""
+    last_id = 0
+    while True:
+        chunk = list(
+            User.objects.filter(pnrs=pnr_id, id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:chunk_size]
+        )
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1]
+
+
+def notify_pnr_update(pnr_id, user_ids, serializer):
+    """Mail Updated PNR Details if Anything Meaningful Changed, None user_ids Mails All Trackers"""
+    if not serializer.has_changes:
+        return False
+    publish_pnr_update(serializer.data)
+    # Removed Passengers Can Only be Shown by Mailing Every Passenger.
+    passenger_ids = (
+        None if serializer.changes["removed"] else serializer.changes["passengers"]
+    )
+    if user_ids is None:
+        if not Settings.PNR_DIGEST_WINDOW:
+            # One Task Queues the Mail for All Tracking Users.
+            fan_out_pnr_update.delay(pnr_id, passenger_ids)
+            return True
+        user_ids = (user_id for chunk in tracking_users(pnr_id) for user_id in chunk)
+    for user_id in user_ids:
+        if Settings.PNR_DIGEST_WINDOW:
+            try:
+                # Coalesce Updates of the Window into One Digest Mail.
+                if buffer_notification(
+                    user_id, pnr_id, passenger_ids, Settings.PNR_DIGEST_WINDOW
+                ):
+                    send_pnr_digest.apply_async(
+                        (user_id,), countdown=Settings.PNR_DIGEST_WINDOW
+                    )
+                continue
+            except RedisError as err:
+                logger.warning("PNR digest buffering failed: %s", err)
+        enqueue_email(
+            EmailTemplates.PNR_DETAILS,
+            user_id,
+            pnr_id=pnr_id,
+            passenger_ids=passenger_ids,
+        )
+    return True
+
+
 @shared_task
-def send_pnr_details(user_id, pnr_id):
-    """Send PNR Details to User"""
+@query_budget(4)
+def send_pnr_details(user_id, pnr_id, passenger_ids=None):
+    """Send PNR Details to User, Only Given Passengers if Any"""
     user = User.objects.get(id=user_id)
-    pnr = PnrDetail.objects.get(id=pnr_id)
-    serializer = PnrDetailSerializer(pnr)
-    EmailService.pnr_status_mail(user, serializer.data)
+    data = PnrDetailReadSerializer.only_passengers(
+        PnrDetailReadSerializer(PnrDetailReadSerializer.get_row(id=pnr_id)).data,
+        passenger_ids,
+    )
+    EmailService.pnr_status_mail(user, data)
     return ReponseMessages.PNR_DETAILS_MAILED
 
 
+@shared_task
+def fan_out_pnr_update(pnr_id, passenger_ids=None):
+    """Queue PNR Details Mail of Every Tracking User, One Outbox Insert per Chunk"""
+    payload = {"pnr_id": pnr_id, "passenger_ids": passenger_ids}
+    count = 0
+    # Recipients Streamed in Chunks, Outbox Renders the Mail Once per Batch.
+    for chunk in tracking_users(pnr_id):
+        enqueue_emails(
+            EmailTemplates.PNR_DETAILS, ((user_id, payload) for user_id in chunk)
+        )
+        count += len(chunk)
+    return FanOutConstants.QUEUED.format(pnr=pnr_id, count=count)
+
+
+@shared_task
+@query_budget(3)
+def send_pnr_digest(user_id):
+    """Queue All PNR Updates Buffered in the Window as One Digest Mail"""
+    updates = drain(user_id)
+    if not updates:
+        return DigestMessages.EMPTY.format(user_id=user_id)
+    pnr_ids = list(
+        PnrDetail.objects.filter(id__in=updates, status=ActivatorModel.ACTIVE_STATUS)
+        .order_by("boarding_date", "id")
+        .values_list("id", flat=True)
+    )
+    if not pnr_ids:
+        return DigestMessages.EMPTY.format(user_id=user_id)
+    if EmailService.get_template(email_type=EmailTemplates.PNR_DIGEST) is None:
+        # No Digest Template, Each PNR Mailed on its Own.
+        enqueue_emails(
+            EmailTemplates.PNR_DETAILS,
+            (
+                (user_id, {"pnr_id": pnr_id, "passenger_ids": updates[pnr_id]})
+                for pnr_id in pnr_ids
+            ),
+        )
+    else:
+        enqueue_email(
+            EmailTemplates.PNR_DIGEST,
+            user_id,
+            pnrs=[[pnr_id, updates[pnr_id]] for pnr_id in pnr_ids],
+        )
+    return DigestMessages.QUEUED.format(count=len(pnr_ids), user_id=user_id)
+
+
 @shared_task
 def multiple_pnr_found(pnr: int):
     """Reduce Multiple PNR to one only"""
@@ -29,6 +187,120 @@ def multiple_pnr_found(pnr: int):
     return ReponseMessages.MULTIPLE_PNR_FOUND_ERROR_HANDLED.format(pnr=pnr)
 
 
+@shared_task
+@query_budget(1)
+def schedule_pnr_refresh():
+    """Queue Background Refresh of Due PNRs Within Scrape Budget"""
+    count = 0
+    # Runs Every Minute, Queues at Most One Minute of Background Budget.
+    for pnr_id in due_pnrs(limit=ScrapeBudget.available()):
+        # Skip PNRs Already Queued or Being Refreshed, Lock Holds Job ID.
+        task_id = str(uuid4())
+        if cache.add(
+            RefreshConstants.LOCK_KEY.format(id=pnr_id),
+            task_id,
+            RefreshConstants.LOCK_TIMEOUT,
+        ):
+            refresh_pnr.apply_async((pnr_id,), task_id=task_id)
+            count += 1
+    return RefreshMessages.SCHEDULED.format(count=count)
+
+
+@shared_task(bind=True)
+@query_budget(7)
+def refresh_pnr(self, pnr_id: int, user_id: int | None = None):
+    """Scrape & Update Stored PNR Details, In Background Unless User Requested"""
+    try:
+        # User Requests May Have Used the Budget Since This Was Queued.
+        if not ScrapeBudget.acquire(interactive=user_id is not None):
+            publish_job_result(self.request.id, status.HTTP_429_TOO_MANY_REQUESTS)
+            return RefreshMessages.BUDGET_EXHAUSTED.format(id=pnr_id)
+        pnr = PnrDetail.objects.prefetch_related("passengers_details").get(
+            id=pnr_id, status=ActivatorModel.ACTIVE_STATUS, expiry__gt=now()
+        )
+        data = get_scraper(pnr.pnr)()
+        serializer = PnrDetailSerializer(pnr, data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        # Mail Requesting User, or Everyone Tracking the PNR, if Status Changed.
+        notify_pnr_update(pnr.id, [user_id] if user_id else None, serializer)
+        publish_job_result(self.request.id, status.HTTP_200_OK)
+        return RefreshMessages.REFRESHED.format(pnr=pnr.pnr)
+    except PnrDetail.DoesNotExist:
+        publish_job_result(
+            self.request.id,
+            status.HTTP_404_NOT_FOUND,
+            [ReponseMessages.PNR_NOT_FOUND],
+        )
+        return RefreshMessages.NOT_AVAILABLE.format(id=pnr_id)
+    except PNRNotFound as pnr_not_found:
+        publish_job_result(
+            self.request.id, status.HTTP_404_NOT_FOUND, [str(pnr_not_found)]
+        )
+        return RefreshMessages.NOT_AVAILABLE.format(id=pnr_id)
+    except Exception as err:
+        publish_job_result(
+            self.request.id, status.HTTP_500_INTERNAL_SERVER_ERROR, [str(err)]
+        )
+        raise
+    finally:
+        cache.delete(RefreshConstants.LOCK_KEY.format(id=pnr_id))
+
+
+@shared_task(bind=True, max_retries=10)
+@query_budget(6)
+def fetch_pnr(self, pnr: int, user_id: int, interactive: bool = False):
+    """Scrape & Store PNR Details Missing From Database"""
+    keep_lock = False
+    try:
+        if not ScrapeBudget.acquire(interactive=interactive):
+            # Retry Once User Requests Leave Budget.
+            raise self.retry(countdown=60)
+        pnr_id = (
+            PnrDetail.objects.filter(
+                pnr=pnr, status=ActivatorModel.ACTIVE_STATUS, expiry__gt=now()
+            )
+            .values_list("id", flat=True)
+            .first()
+        )
+        if pnr_id is not None:
+            # Stored by Another Path, Still Link Users Waiting on This Fetch.
+            with transaction.atomic():
+                link_users(pnr_id, {user_id} | pop_waiting_users(pnr))
+            publish_job_result(self.request.id, status.HTTP_201_CREATED)
+            return RefreshMessages.ALREADY_FETCHED.format(pnr=pnr)
+        data = get_scraper(pnr)()
+        serializer = PnrDetailSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save()
+            # Users Who Requested the PNR While it Was Queued or Scraped.
+            link_users(serializer.instance.id, {user_id} | pop_waiting_users(pnr))
+        publish_pnr_update(serializer.data)
+        publish_job_result(self.request.id, status.HTTP_201_CREATED)
+        return RefreshMessages.FETCHED.format(pnr=pnr)
+    except Retry:
+        # Queued Retry Holds the Lock so Duplicate Fetches Stay Out.
+        keep_lock = True
+        raise
+    except MaxRetriesExceededError:
+        publish_job_result(self.request.id, status.HTTP_429_TOO_MANY_REQUESTS)
+        return RefreshMessages.FETCH_BUDGET_EXHAUSTED.format(pnr=pnr)
+    except PNRNotFound as pnr_not_found:
+        publish_job_result(
+            self.request.id, status.HTTP_404_NOT_FOUND, [str(pnr_not_found)]
+        )
+        return str(pnr_not_found)
+    except Exception as err:
+        publish_job_result(
+            self.request.id, status.HTTP_500_INTERNAL_SERVER_ERROR, [str(err)]
+        )
+        raise
+    finally:
+        if not keep_lock:
+            cache.delete(RefreshConstants.FETCH_LOCK_KEY.format(pnr=pnr))
+
+
 # @shared_task
 # def create_pnr_versions(pnr: int, data, update: bool = False):
 #     """Create PNR Versions"""
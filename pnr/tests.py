@@ -1 +1,902 @@
-# Create your tests here.
+"""Tests of PNR Endpoints & Tasks"""
+
+import asyncio
+import json
+import fakeredis
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+from asgiref.sync import async_to_sync, sync_to_async
+from celery.exceptions import MaxRetriesExceededError, Retry
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.http import http_date, urlsafe_base64_encode
+from django.utils.timezone import now
+from django_extensions.db.models import ActivatorModel
+from rest_framework.test import APIRequestFactory, force_authenticate
+from utils.constants import (
+    EmailTemplates,
+    FakeScraperConstants,
+    OutboxConstants,
+    ThrottleConstants,
+)
+from utils.exceptions import QueryBudgetExceeded
+from utils.pubsub import Broker, publish
+from utils.query_budget import query_budget, query_shape
+from utils.template_cache import TemplateCache
+from utils.utils import AuthService, get_model
+from pnr.api.async_api import AsyncPnrScrapper
+from pnr.api.api import PnrBulkLookup, PnrMineList, PnrScrapper
+from pnr.api.stream import pnr_stream
+from pnr.pending import add_waiting_user, pop_waiting_users
+from pnr.scheduler import due_pnrs
+from pnr.constants import (
+    LoadTestConstants,
+    ReponseMessages,
+    RefreshConstants,
+    StreamConstants,
+)
+from pnr.tasks import (
+    fan_out_pnr_update,
+    fetch_pnr,
+    send_pnr_details,
+    send_pnr_digest,
+)
+from quickpnr.outbox import claim, drain
+from quickpnr.tasks import enqueue_email, flush_pnr
+
+User = get_model("users", "User")
+PnrDetail = get_model("pnr", "PnrDetail")
+PassengerDetail = get_model("pnr", "PassengerDetail")
+EmailTemplate = get_model("quickpnr", "EmailTemplate")
+EmailOutbox = get_model("quickpnr", "EmailOutbox")
+
+# More Passengers Than REPEAT_LIMIT, so Per Passenger Queries Are Flagged
+PASSENGERS = 5
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def scraped_pnr(pnr: int, current_status: str = "CNF", passengers: int = PASSENGERS):
+    """PNR Details Shaped Like PnrScrapping Output"""
+    return {
+        "pnr": pnr,
+        "train_number": "12345",
+        "train_name": "TEST EXPRESS",
+        "boarding_date": (now() + timedelta(days=3)).isoformat(),
+        "boarding_point": "NDLS",
+        "reserved_from": "NDLS",
+        "reserved_to": "BCT",
+        "reserved_class": "3A",
+        "fare": "1500.00",
+        "remark": "-",
+        "train_status": "",
+        "charting_status": "Chart Not Prepared",
+        "passengers_details": [
+            {
+                "name": f"Passenger {number}",
+                "booking_status": "WL/1",
+                "current_status": current_status,
+                "coach_position": "B1",
+            }
+            for number in range(1, passengers + 1)
+        ],
+    }
+
+
+@override_settings(CACHES=LOCMEM_CACHE, QUERY_BUDGET_MODE="raise")
+class PnrTestCase(TestCase):
+    """Budgets Raise, Throttling & Live Updates Need no Redis"""
+
+    def setUp(self):
+        for target in (
+            "utils.throttling.WeightedRateThrottle.allow_request",
+            "pnr.tasks.publish",
+        ):
+            patcher = mock.patch(target, return_value=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Users Waiting on Fetches Kept in an In-Process Fake.
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch("pnr.pending.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user(
+            username="tracker", email="tracker@example.com", password="Pa55word!xyz"
+        )
+        # Drop Registration Mail, Only Mails Queued by Tests Are Checked.
+        EmailOutbox.objects.all().delete()
+        EmailTemplate.objects.create(
+            subject="PNR Details",
+            body="PNR Details",
+            template="{{ pnr }}",
+            email_type=EmailTemplates.PNR_DETAILS,
+        )
+        # Template Served From Memory, as in a Warm Worker.
+        TemplateCache.bump()
+        TemplateCache.get(EmailTemplates.PNR_DETAILS)
+
+    def create_pnr(self, pnr: int = 1234567890, **kwargs):
+        data = scraped_pnr(pnr, **kwargs)
+        passengers = data.pop("passengers_details")
+        data["expiry"] = now() + timedelta(days=8)
+        instance = PnrDetail.objects.create(**data)
+        PassengerDetail.objects.bulk_create(
+            PassengerDetail(pnr_details=instance, **passenger)
+            for passenger in passengers
+        )
+        instance.users.add(self.user)
+        return instance
+
+    def call(self, view, method: str, data=None, **headers):
+        request = getattr(self.factory, method)("/", data, format="json", **headers)
+        force_authenticate(request, user=self.user)
+        return view.as_view()(request)
+
+
+class QueryBudgetTests(PnrTestCase):
+    """query_budget Counting, N+1 Detection & Modes"""
+
+    def test_query_shape_collapses_parameter_lists(self):
+        self.assertEqual(
+            query_shape("SELECT 1 WHERE id IN (%s, %s, %s)"),
+            query_shape("SELECT 1 WHERE id IN (%s, %s)"),
+        )
+
+    def test_within_budget(self):
+        with query_budget(1, name="count") as budget:
+            PnrDetail.objects.count()
+        self.assertEqual(budget.count, 1)
+        self.assertEqual(budget.violations(), [])
+
+    def test_budget_exceeded_raises(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, "ran 2 queries, budget 1"):
+            with query_budget(1, name="count"):
+                PnrDetail.objects.count()
+                PassengerDetail.objects.count()
+
+    def test_repeated_query_raises(self):
+        pnr = self.create_pnr()
+        with self.assertRaisesMessage(QueryBudgetExceeded, "(N+1)"):
+            with query_budget(PASSENGERS * 2, name="passengers"):
+                for passenger in PassengerDetail.objects.filter(pnr_details=pnr):
+                    # Deferred Foreign Key Loaded per Passenger.
+                    passenger.pnr_details
+
+    @override_settings(QUERY_BUDGET_MODE="log")
+    def test_log_mode(self):
+        with self.assertLogs("utils.query_budget", "WARNING"):
+            with query_budget(0, name="count"):
+                PnrDetail.objects.count()
+
+    @override_settings(QUERY_BUDGET_MODE="off")
+    def test_off_mode_records_nothing(self):
+        with query_budget(0, name="count"):
+            PnrDetail.objects.count()
+        self.assertEqual(connection.execute_wrappers, [])
+
+    def test_decorator_names_budget_after_function(self):
+        @query_budget(0)
+        def count():
+            return PnrDetail.objects.count()
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, "count ran 1 queries"):
+            count()
+
+
+class PnrScrapperQueryTests(PnrTestCase):
+    """Queries of PNR Fetch, Mail & Update Are Independent of Passengers"""
+
+    def test_post_stored_pnr(self):
+        pnr = self.create_pnr()
+        with self.assertNumQueries(2):
+            response = self.call(PnrScrapper, "post", {"pnr": pnr.pnr})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["passengers_details"]), PASSENGERS)
+
+    @mock.patch("pnr.api.api.get_scraper")
+    def test_post_scrapes_missing_pnr(self, scrapping):
+        scrapping.return_value.return_value = scraped_pnr(1234567891)
+        # Savepoint & Release of the Atomic Save Included.
+        with self.assertNumQueries(8):
+            response = self.call(PnrScrapper, "post", {"pnr": 1234567891})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            PassengerDetail.objects.filter(pnr_details__pnr=1234567891).count(),
+            PASSENGERS,
+        )
+
+    def test_get_mails_stored_pnr(self):
+        pnr = self.create_pnr()
+        with self.assertNumQueries(2):
+            response = self.call(PnrScrapper, "get", {"pnr": pnr.pnr})
+        self.assertEqual(response.status_code, 200)
+
+    @mock.patch("pnr.api.api.get_scraper")
+    def test_patch_updates_passengers_in_bulk(self, scrapping):
+        pnr = self.create_pnr()
+        data = scraped_pnr(
+            pnr.pnr, current_status="CNF/B1/10", passengers=PASSENGERS + 1
+        )
+        scrapping.return_value.return_value = data
+        with self.assertNumQueries(7):
+            response = self.call(PnrScrapper, "patch", {"pnr": pnr.pnr})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["passengers_details"]), PASSENGERS + 1)
+        self.assertEqual(
+            set(pnr.passengers_details.values_list("current_status", flat=True)),
+            {"CNF/B1/10"},
+        )
+        # Changed Passengers Mailed to Requesting User.
+        entry = EmailOutbox.objects.get(user=self.user)
+        self.assertEqual(len(entry.payload["passenger_ids"]), PASSENGERS + 1)
+
+    @mock.patch("pnr.api.api.get_scraper")
+    def test_patch_unchanged_passengers_not_saved(self, scrapping):
+        pnr = self.create_pnr()
+        scrapping.return_value.return_value = scraped_pnr(pnr.pnr)
+        with self.assertNumQueries(3):
+            response = self.call(PnrScrapper, "patch", {"pnr": pnr.pnr})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+@mock.patch("pnr.api.api.get_scraper")
+class PnrChangeDetectionTests(PnrTestCase):
+    """Refresh Saves & Mails Only Passengers That Changed"""
+
+    def refresh(self, scrapping, data):
+        scrapping.return_value.return_value = data
+        with mock.patch.object(
+            PassengerDetail.objects,
+            "bulk_update",
+            wraps=PassengerDetail.objects.bulk_update,
+        ) as bulk_update:
+            response = self.call(PnrScrapper, "patch", {"pnr": data["pnr"]})
+        self.assertEqual(response.status_code, 200)
+        return response, bulk_update
+
+    def test_partial_change(self, scrapping):
+        pnr = self.create_pnr()
+        changed = pnr.passengers_details.get(name="Passenger 2")
+        data = scraped_pnr(pnr.pnr)
+        data["passengers_details"][1]["current_status"] = "CNF/B2/20"
+        _, bulk_update = self.refresh(scrapping, data)
+        # Only the Changed Passenger & Field Written.
+        updated, fields = bulk_update.call_args.args
+        self.assertEqual([passenger.id for passenger in updated], [changed.id])
+        self.assertEqual(set(fields), {"current_status"})
+        entry = EmailOutbox.objects.get(user=self.user)
+        self.assertEqual(entry.payload["passenger_ids"], [changed.id])
+
+    def test_removed_passenger(self, scrapping):
+        pnr = self.create_pnr()
+        data = scraped_pnr(pnr.pnr, passengers=PASSENGERS - 1)
+        response, bulk_update = self.refresh(scrapping, data)
+        bulk_update.assert_not_called()
+        self.assertFalse(pnr.passengers_details.filter(name=f"Passenger {PASSENGERS}"))
+        self.assertEqual(len(response.data["passengers_details"]), PASSENGERS - 1)
+        # Removal Mailed With Every Remaining Passenger.
+        entry = EmailOutbox.objects.get(user=self.user)
+        self.assertIsNone(entry.payload["passenger_ids"])
+
+    def test_added_passenger(self, scrapping):
+        pnr = self.create_pnr()
+        data = scraped_pnr(pnr.pnr, passengers=PASSENGERS + 1)
+        response, bulk_update = self.refresh(scrapping, data)
+        bulk_update.assert_not_called()
+        added = pnr.passengers_details.get(name=f"Passenger {PASSENGERS + 1}")
+        self.assertEqual(len(response.data["passengers_details"]), PASSENGERS + 1)
+        entry = EmailOutbox.objects.get(user=self.user)
+        self.assertEqual(entry.payload["passenger_ids"], [added.id])
+
+
+class PnrListingQueryTests(PnrTestCase):
+    """Queries of Bulk Lookup & User PNRs Are Independent of PNR Count"""
+
+    @mock.patch("pnr.api.api.fetch_pnr")
+    def test_bulk_lookup(self, fetch_pnr):
+        pnrs = [self.create_pnr(1234567800 + number).pnr for number in range(5)]
+        with self.assertNumQueries(2):
+            response = self.call(
+                PnrBulkLookup, "post", {"pnrs": pnrs + [1234567899, 12]}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 7)
+        fetch_pnr.apply_async.assert_called_once_with(
+            (1234567899, self.user.id),
+            task_id=cache.get(RefreshConstants.FETCH_LOCK_KEY.format(pnr=1234567899)),
+        )
+
+    @mock.patch("pnr.api.api.fetch_pnr")
+    def test_bulk_lookup_charged_per_queued_scrape(self, fetch_pnr):
+        cache.clear()
+        # Fetch of First PNR Already Queued by Another Request.
+        cache.add(
+            RefreshConstants.FETCH_LOCK_KEY.format(pnr=1234567898),
+            "running",
+            RefreshConstants.LOCK_TIMEOUT,
+        )
+        with mock.patch(
+            "utils.throttling.WeightedRateThrottle.allow_request", return_value=True
+        ) as allow_request:
+            response = self.call(
+                PnrBulkLookup, "post", {"pnrs": [1234567898, 1234567899]}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            allow_request.call_args.args[2], ThrottleConstants.BULK_SCRAPE_COST
+        )
+        fetch_pnr.apply_async.assert_called_once()
+        # Requester Linked to Both PNRs Once Stored.
+        for pnr in (1234567898, 1234567899):
+            self.assertEqual(pop_waiting_users(pnr), {self.user.id})
+
+    def test_mine_list(self):
+        for number in range(5):
+            self.create_pnr(1234567800 + number)
+        with self.assertNumQueries(2):
+            response = self.call(PnrMineList, "get")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 5)
+
+
+class PnrTaskQueryTests(PnrTestCase):
+    """Queries of Mail, Outbox & Flush Tasks"""
+
+    def test_send_pnr_details(self):
+        pnr = self.create_pnr()
+        with self.assertNumQueries(3):
+            send_pnr_details(self.user.id, pnr.id)
+
+    def test_drain_loads_pnrs_once_per_batch(self):
+        for number in range(5):
+            pnr = self.create_pnr(1234567800 + number)
+            enqueue_email(EmailTemplates.PNR_DETAILS, self.user.id, pnr_id=pnr.id)
+        # Claim Transaction, PNRs of Batch & Recorded Outcomes.
+        with self.assertNumQueries(8):
+            picked, sent, failed = drain()
+        self.assertEqual((picked, sent, failed), (5, 5, 0))
+        self.assertFalse(
+            EmailOutbox.objects.exclude(state=OutboxConstants.SENT).exists()
+        )
+
+    def test_due_pnrs_ordered_by_tier_in_one_query(self):
+        def last_refreshed(pnr, hours: int):
+            PnrDetail.objects.filter(id=pnr.id).update(
+                modified=now() - timedelta(hours=hours)
+            )
+            return pnr
+
+        # Boarding in 3 Days, Waitlisted is HIGH Tier, Confirmed is NORMAL.
+        waiting = last_refreshed(self.create_pnr(1234567801, current_status="WL/5"), 2)
+        last_refreshed(self.create_pnr(1234567802), 2)
+        confirmed = last_refreshed(self.create_pnr(1234567803), 7)
+        self.create_pnr(1234567804, current_status="RAC 3")
+        with self.assertNumQueries(1):
+            self.assertEqual(due_pnrs(), [waiting.id, confirmed.id])
+        self.assertEqual(due_pnrs(limit=1), [waiting.id])
+
+    def test_fan_out_queued_through_outbox(self):
+        pnr = self.create_pnr()
+        for number in range(2):
+            pnr.users.add(
+                User.objects.create_user(
+                    username=f"follower{number}",
+                    email=f"follower{number}@example.com",
+                    password="Pa55word!xyz",
+                )
+            )
+        EmailOutbox.objects.all().delete()
+        # Recipients Chunk & One Outbox Insert.
+        with self.assertNumQueries(2):
+            fan_out_pnr_update(pnr.id, [])
+        self.assertEqual(drain(), (3, 3, 0))
+
+    @mock.patch("pnr.tasks.drain")
+    def test_digest_queued_through_outbox(self, buffered):
+        pnrs = [self.create_pnr(1234567800 + number) for number in range(2)]
+        buffered.return_value = {pnr.id: None for pnr in pnrs}
+        EmailTemplate.objects.create(
+            subject="PNR Digest",
+            body="{pnr_count} PNRs Updated",
+            template="{{ pnr_details }}",
+            email_type=EmailTemplates.PNR_DIGEST,
+        )
+        TemplateCache.bump()
+        send_pnr_digest(self.user.id)
+        entry = EmailOutbox.objects.get()
+        self.assertEqual(entry.email_type, EmailTemplates.PNR_DIGEST)
+        self.assertEqual(drain(), (1, 1, 0))
+
+    @mock.patch("pnr.tasks.drain")
+    def test_digest_without_template_queues_each_pnr(self, buffered):
+        pnrs = [self.create_pnr(1234567800 + number) for number in range(2)]
+        buffered.return_value = {pnr.id: None for pnr in pnrs}
+        send_pnr_digest(self.user.id)
+        self.assertEqual(
+            EmailOutbox.objects.filter(email_type=EmailTemplates.PNR_DETAILS).count(),
+            2,
+        )
+        self.assertEqual(drain(), (2, 2, 0))
+
+    def test_flush_pnr(self):
+        pnr = self.create_pnr()
+        PnrDetail.objects.filter(id=pnr.id).update(expiry=now() - timedelta(days=1))
+        with self.assertNumQueries(1):
+            flush_pnr()
+        pnr.refresh_from_db()
+        self.assertEqual(pnr.status, ActivatorModel.INACTIVE_STATUS)
+
+
+class AsyncPnrScrapperTests(PnrTestCase):
+    """Async Fetch Answers JSON When PNR Changes While Its Scrape Job Runs"""
+
+    def post(self, pnr: int):
+        request = RequestFactory().post(
+            "/",
+            {"pnr": pnr},
+            content_type="application/json",
+            HTTP_AUTHORIZATION="Bearer "
+            + AuthService().get_auth_tokens_for_user(self.user)["access"],
+        )
+        return async_to_sync(AsyncPnrScrapper.as_view())(request)
+
+    @mock.patch.object(AsyncPnrScrapper, "await_job")
+    def test_pnr_flushed_after_job(self, await_job):
+        # Job Reports PNR Stored, but it is Gone by the Time it is Read.
+        await_job.return_value = {"status": 201}
+        response = self.post(1234567890)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response["Content-Type"], "application/json")
+
+    @mock.patch("pnr.api.async_api.multiple_pnr_found")
+    @mock.patch.object(AsyncPnrScrapper, "await_job")
+    def test_pnr_duplicated_after_job(self, await_job, multiple_pnr_found):
+        async def duplicate(*args, **kwargs):
+            # Concurrent Jobs Both Stored the PNR.
+            await sync_to_async(self.create_pnr)()
+            await sync_to_async(self.create_pnr)()
+            return {"status": 201}
+
+        await_job.side_effect = duplicate
+        response = self.post(1234567890)
+        self.assertEqual(response.status_code, 400)
+        multiple_pnr_found.delay.assert_called_once_with(1234567890)
+
+
+class JobBroker:
+    """In-Process Stand-In for Job Results Broker"""
+
+    def __init__(self):
+        self.queues = {}
+
+    def subscribe(self, channels):
+        queue = asyncio.Queue()
+        for channel in channels:
+            self.queues[channel] = queue
+        return queue
+
+    async def wait_subscribed(self):
+        pass
+
+    def unsubscribe(self, channels, queue):
+        for channel in channels:
+            self.queues.pop(channel, None)
+
+    def publish(self, task_id, status_code: int, message=None):
+        self.queues[StreamConstants.JOB_CHANNEL.format(task_id=task_id)].put_nowait(
+            (task_id, json.dumps({"status": status_code, "message": message}))
+        )
+
+
+@mock.patch("pnr.api.async_api.fetch_pnr")
+class AsyncPnrJobTests(PnrTestCase):
+    """Async Fetch Takes the Fetch Lock, Requests Meanwhile Await the Same Job"""
+
+    post = AsyncPnrScrapperTests.post
+    lock_key = RefreshConstants.FETCH_LOCK_KEY.format(pnr=1234567890)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.jobs = JobBroker()
+        patcher = mock.patch("pnr.api.async_api.jobs", self.jobs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lock_taken_before_job_queued(self, fetch_pnr):
+        def apply_async(args, kwargs, task_id):
+            self.assertEqual(cache.get(self.lock_key), task_id)
+            # Budget Refusal is Published Without Message.
+            self.jobs.publish(task_id, 429)
+
+        fetch_pnr.apply_async.side_effect = apply_async
+        response = self.post(1234567890)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(
+            json.loads(response.content), {"message": [ReponseMessages.SCRAPE_BUSY]}
+        )
+        fetch_pnr.apply_async.assert_called_once()
+
+    def test_running_job_awaited(self, fetch_pnr):
+        cache.add(self.lock_key, "running", RefreshConstants.LOCK_TIMEOUT)
+
+        async def wait_subscribed():
+            self.jobs.publish("running", 404)
+
+        with mock.patch.object(self.jobs, "wait_subscribed", wait_subscribed):
+            response = self.post(1234567890)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            json.loads(response.content), {"message": [ReponseMessages.PNR_NOT_FOUND]}
+        )
+        fetch_pnr.apply_async.assert_not_called()
+
+    def test_running_job_finished_before_subscription(self, fetch_pnr):
+        cache.add(self.lock_key, "running", RefreshConstants.LOCK_TIMEOUT)
+
+        async def wait_subscribed():
+            # Job Stored the PNR & Released the Lock.
+            await sync_to_async(self.create_pnr)()
+            cache.delete(self.lock_key)
+
+        with mock.patch.object(self.jobs, "wait_subscribed", wait_subscribed):
+            response = self.post(1234567890)
+        self.assertEqual(response.status_code, 201)
+        fetch_pnr.apply_async.assert_not_called()
+
+
+@mock.patch("pnr.tasks.ScrapeBudget.acquire", return_value=False)
+class FetchPnrLockTests(PnrTestCase):
+    """Fetch Lock Outlives Only a Queued Retry"""
+
+    lock_key = RefreshConstants.FETCH_LOCK_KEY.format(pnr=1234567890)
+
+    def setUp(self):
+        super().setUp()
+        cache.add(self.lock_key, True, RefreshConstants.LOCK_TIMEOUT)
+
+    def test_lock_kept_for_queued_retry(self, acquire):
+        with self.assertRaises(Retry):
+            fetch_pnr(1234567890, self.user.id)
+        self.assertTrue(cache.get(self.lock_key))
+
+    def test_lock_released_when_retries_exhausted(self, acquire):
+        with mock.patch.object(fetch_pnr, "retry", side_effect=MaxRetriesExceededError):
+            fetch_pnr(1234567890, self.user.id)
+        self.assertIsNone(cache.get(self.lock_key))
+
+
+@mock.patch("pnr.tasks.ScrapeBudget.acquire", return_value=True)
+class FetchPnrWaitingTests(PnrTestCase):
+    """Users Requesting a PNR While its Fetch is Queued Are Linked & Mailed"""
+
+    def setUp(self):
+        super().setUp()
+        self.waiting = User.objects.create_user(
+            username="waiting", email="waiting@example.com", password="Pa55word!xyz"
+        )
+        EmailOutbox.objects.all().delete()
+        add_waiting_user([1234567890], self.waiting.id)
+
+    def assertLinkedAndMailed(self, pnr):
+        user_ids = {self.user.id, self.waiting.id}
+        self.assertEqual(set(pnr.users.values_list("id", flat=True)), user_ids)
+        self.assertEqual(
+            set(EmailOutbox.objects.values_list("user_id", flat=True)), user_ids
+        )
+        self.assertEqual(pop_waiting_users(1234567890), set())
+
+    @mock.patch("pnr.tasks.get_scraper")
+    def test_waiting_users_linked(self, get_scraper, acquire):
+        get_scraper.return_value = lambda: scraped_pnr(1234567890)
+        fetch_pnr(1234567890, self.user.id)
+        self.assertLinkedAndMailed(PnrDetail.objects.get(pnr=1234567890))
+
+    def test_waiting_users_linked_when_already_fetched(self, acquire):
+        pnr = self.create_pnr()
+        pnr.users.clear()
+        fetch_pnr(1234567890, self.user.id)
+        self.assertLinkedAndMailed(pnr)
+
+
+class ConditionalPnrTests(PnrTestCase):
+    """Polling Clients Holding a Current Copy Get 304 Without Passengers Loaded"""
+
+    def setUp(self):
+        super().setUp()
+        self.pnr = self.create_pnr()
+        self.response = self.call(PnrScrapper, "post", {"pnr": self.pnr.pnr})
+
+    def post(self, **headers):
+        return self.call(PnrScrapper, "post", {"pnr": self.pnr.pnr}, **headers)
+
+    def test_if_none_match_current(self):
+        with self.assertNumQueries(1):
+            response = self.post(HTTP_IF_NONE_MATCH=self.response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], self.response["ETag"])
+        self.assertEqual(response["Last-Modified"], self.response["Last-Modified"])
+
+    def test_if_none_match_stale(self):
+        response = self.post(HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], self.response["ETag"])
+
+    def test_etag_changes_once_pnr_saved(self):
+        self.pnr.charting_status = "Chart Prepared"
+        self.pnr.save()
+        response = self.post(HTTP_IF_NONE_MATCH=self.response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], self.response["ETag"])
+
+    def test_if_modified_since(self):
+        response = self.post(HTTP_IF_MODIFIED_SINCE=self.response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+        response = self.post(
+            HTTP_IF_MODIFIED_SINCE=http_date(
+                (self.pnr.modified - timedelta(minutes=1)).timestamp()
+            )
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match_takes_precedence(self):
+        response = self.post(
+            HTTP_IF_NONE_MATCH='"stale"',
+            HTTP_IF_MODIFIED_SINCE=self.response["Last-Modified"],
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class PnrMineCursorTests(PnrTestCase):
+    """Keyset Pages of User PNRs Cover Every PNR Once, in Order"""
+
+    def pages(self, **params):
+        """Follow next Links, Returns IDs of Each Page"""
+        pages = []
+        while True:
+            response = self.call(PnrMineList, "get", {"page_size": 2, **params})
+            self.assertEqual(response.status_code, 200)
+            pages.append([row["id"] for row in response.data["results"]])
+            if response.data["next"] is None:
+                return pages
+            params = {
+                key: values[0]
+                for key, values in parse_qs(
+                    urlsplit(response.data["next"]).query
+                ).items()
+            }
+
+    def test_cursor_round_trip(self):
+        pnrs = [self.create_pnr(1234567800 + number) for number in range(5)]
+        # Shared Boarding Date, Ties Broken by ID.
+        PnrDetail.objects.filter(id__in=[pnr.id for pnr in pnrs[1:4]]).update(
+            boarding_date=pnrs[1].boarding_date
+        )
+        self.assertEqual(
+            self.pages(),
+            [[pnrs[0].id, pnrs[1].id], [pnrs[2].id, pnrs[3].id], [pnrs[4].id]],
+        )
+
+    def test_past_pages_latest_first(self):
+        pnrs = [self.create_pnr(1234567800 + number) for number in range(3)]
+        for days, pnr in enumerate(pnrs, start=1):
+            PnrDetail.objects.filter(id=pnr.id).update(
+                boarding_date=now() - timedelta(days=days)
+            )
+        self.assertEqual(
+            self.pages(when="past"), [[pnrs[0].id, pnrs[1].id], [pnrs[2].id]]
+        )
+
+    def test_bad_cursor(self):
+        for cursor in ("not-a-cursor", urlsafe_base64_encode(b"yesterday|1")):
+            response = self.call(PnrMineList, "get", {"cursor": cursor})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("cursor", response.data)
+
+
+class OutboxRetryTests(PnrTestCase):
+    """Failed Sends Back Off Exponentially, Then Fail for Good"""
+
+    def setUp(self):
+        super().setUp()
+        self.entry = enqueue_email(
+            EmailTemplates.PNR_DETAILS, self.user.id, pnr_id=self.create_pnr().id
+        )
+        patcher = mock.patch(
+            "quickpnr.outbox.EmailService.send_message",
+            side_effect=SMTPException("Connection refused"),
+        )
+        self.send_message = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_due(self):
+        EmailOutbox.objects.filter(id=self.entry.id).update(next_attempt_at=now())
+
+    def assertRetryIn(self, seconds: int):
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.state, OutboxConstants.PENDING)
+        self.assertEqual(self.entry.last_error, "Connection refused")
+        self.assertAlmostEqual(
+            (self.entry.next_attempt_at - now()).total_seconds(), seconds, delta=5
+        )
+
+    def test_backoff_doubles(self):
+        self.assertEqual(drain(), (1, 0, 0))
+        self.assertRetryIn(OutboxConstants.RETRY_BACKOFF)
+        # Not Due Until Backoff Passes.
+        self.assertEqual(drain(), (0, 0, 0))
+        self.make_due()
+        self.assertEqual(drain(), (1, 0, 0))
+        self.assertRetryIn(OutboxConstants.RETRY_BACKOFF * 2)
+        self.assertEqual(self.entry.attempts, 2)
+
+    def test_failed_after_max_attempts(self):
+        EmailOutbox.objects.filter(id=self.entry.id).update(
+            attempts=OutboxConstants.MAX_ATTEMPTS - 1
+        )
+        self.assertEqual(drain(), (1, 0, 1))
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.state, OutboxConstants.FAILED)
+        self.assertEqual(self.entry.attempts, OutboxConstants.MAX_ATTEMPTS)
+
+    def test_missing_pnr_fails_without_retry(self):
+        PnrDetail.objects.all().delete()
+        self.assertEqual(drain(), (1, 0, 1))
+        self.send_message.assert_not_called()
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.state, OutboxConstants.FAILED)
+
+    def test_claim_hides_entries_until_it_expires(self):
+        self.assertEqual([entry.id for entry in claim(10)], [self.entry.id])
+        self.assertEqual(claim(10), [])
+        # Sender Died, Claim Expired.
+        self.make_due()
+        self.assertEqual([entry.id for entry in claim(10)], [self.entry.id])
+
+    def test_claim_expired_on_last_attempt_fails(self):
+        EmailOutbox.objects.filter(id=self.entry.id).update(
+            attempts=OutboxConstants.MAX_ATTEMPTS
+        )
+        self.assertEqual(claim(10), [])
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.state, OutboxConstants.FAILED)
+        self.assertEqual(self.entry.last_error, OutboxConstants.CLAIM_EXPIRED)
+
+
+class SeedLoadTestTests(PnrTestCase):
+    """Seeding Refuses Without DEBUG & Replaces Only Tagged Rows"""
+
+    def test_refuses_without_debug(self):
+        with self.assertRaises(CommandError):
+            call_command("seed_load_test", users=1, pnrs=1, stdout=StringIO())
+        self.assertFalse(PnrDetail.objects.filter(remark=FakeScraperConstants.TAG))
+
+    def test_untagged_rows_kept(self):
+        real_pnr = self.create_pnr(LoadTestConstants.SEEDED_PNR)
+        real_user = User.objects.create_user(
+            username=LoadTestConstants.USERNAME.format(index=7),
+            email="real@example.com",
+            password="Pa55word!xyz",
+        )
+        for _ in range(2):
+            call_command(
+                "seed_load_test",
+                users=2,
+                pnrs=2,
+                allow_destructive=True,
+                stdout=StringIO(),
+            )
+        self.assertEqual(
+            PnrDetail.objects.filter(remark=FakeScraperConstants.TAG).count(), 2
+        )
+        self.assertEqual(
+            User.objects.filter(last_name=FakeScraperConstants.TAG).count(), 2
+        )
+        self.assertTrue(PnrDetail.objects.filter(id=real_pnr.id).exists())
+        self.assertTrue(User.objects.filter(id=real_user.id).exists())
+
+
+class PnrStreamTests(PnrTestCase):
+    """Live Updates Reach Subscribed Streams Through the Pub/Sub Broker"""
+
+    def setUp(self):
+        super().setUp()
+        # Sync Publisher & Async Listener Share One In-Process Server.
+        server = fakeredis.FakeServer()
+        for target, kwargs in (
+            (
+                "utils.pubsub.get_redis",
+                {"return_value": fakeredis.FakeRedis(server=server)},
+            ),
+            (
+                "utils.pubsub.get_async_redis",
+                {"side_effect": lambda: fakeredis.aioredis.FakeRedis(server=server)},
+            ),
+        ):
+            patcher = mock.patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Broker Events Are Bound to the Loop of Each Test.
+        self.broker = Broker(StreamConstants.PATTERN, StreamConstants.QUEUE_SIZE)
+        patcher = mock.patch("pnr.api.stream.broker", self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stream(self, *pnrs):
+        request = RequestFactory().get(
+            "/",
+            {"pnr": pnrs},
+            HTTP_AUTHORIZATION="Bearer "
+            + AuthService().get_auth_tokens_for_user(self.user)["access"],
+        )
+        return pnr_stream(request)
+
+    def test_broker_delivers_published_message(self):
+        channel = StreamConstants.CHANNEL.format(pnr=1234567890)
+
+        async def receive():
+            queue = self.broker.subscribe([channel])
+            await self.broker.wait_subscribed()
+            await sync_to_async(publish)(channel, {"pnr": 1234567890})
+            received = await asyncio.wait_for(queue.get(), 5)
+            self.broker.unsubscribe([channel], queue)
+            return received
+
+        received_channel, message = async_to_sync(receive)()
+        self.assertEqual(received_channel, channel)
+        self.assertEqual(json.loads(message), {"pnr": 1234567890})
+
+    def test_update_reaches_stream(self):
+        async def read():
+            response = await self.stream(1234567890)
+            content = response.streaming_content.__aiter__()
+            retry = await content.__anext__()
+            await self.broker.wait_subscribed()
+            await sync_to_async(publish)(
+                StreamConstants.CHANNEL.format(pnr=1234567890), {"pnr": 1234567890}
+            )
+            event = await asyncio.wait_for(content.__anext__(), 5)
+            await content.aclose()
+            return retry, event
+
+        retry, event = async_to_sync(read)()
+        self.assertEqual(retry.decode(), StreamConstants.RETRY)
+        self.assertEqual(
+            event.decode(), StreamConstants.EVENT.format(data='{"pnr":1234567890}')
+        )
+
+    def test_disconnect_unsubscribes(self):
+        async def disconnect():
+            response = await self.stream(1234567890, 1234567891)
+            content = response.streaming_content.__aiter__()
+            await content.__anext__()
+            # Client Gone, ASGI Handler Cancels the Task Reading the Stream.
+            reader = asyncio.ensure_future(content.__anext__())
+            await asyncio.sleep(0.1)
+            subscribed = dict(self.broker.subscribers)
+            reader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await reader
+            return subscribed
+
+        subscribed = async_to_sync(disconnect)()
+        self.assertEqual(len(subscribed), 2)
+        self.assertEqual(dict(self.broker.subscribers), {})
+
+    @mock.patch.object(StreamConstants, "HEARTBEAT", 0.05)
+    def test_heartbeat_sent_while_idle(self):
+        async def idle():
+            response = await self.stream(1234567890)
+            content = response.streaming_content.__aiter__()
+            await content.__anext__()
+            chunk = await asyncio.wait_for(content.__anext__(), 5)
+            await content.aclose()
+            return chunk
+
+        self.assertEqual(async_to_sync(idle)().decode(), StreamConstants.KEEP_ALIVE)
@@ -1,9 +1,17 @@
 """Utility Models Admin Panel"""
 
+from os.path import basename
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from utils.constants import ProfilingConstants
 from utils.utils import get_model
 
 EmailTemplate = get_model("quickpnr", "EmailTemplate")
+EmailOutbox = get_model("quickpnr", "EmailOutbox")
+RequestProfile = get_model("quickpnr", "RequestProfile")
 
 
 @admin.register(EmailTemplate)
@@ -43,3 +51,82 @@ class EmailTemplateAdmin(admin.ModelAdmin):
             },
         ),
     )
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        "email_type",
+        "user",
+        "state",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+        "created",
+    )
+    list_filter = ("state", "email_type")
+    search_fields = ("user__email",)
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    readonly_fields = ("created", "modified", "sent_at", "last_error")
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "query_count",
+        "query_ms",
+        "user",
+        "created",
+    )
+    list_filter = ("method", "status_code")
+    search_fields = ("path",)
+    list_select_related = ("user",)
+    date_hierarchy = "created"
+    # Profiles Are Only Written by ProfilingMiddleware, Dump Not Linked Directly.
+    readonly_fields = [
+        field.name
+        for field in RequestProfile._meta.fields
+        if field.name not in ("id", "profile")
+    ] + ["download"]
+    exclude = ("profile",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<path:object_id>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name=ProfilingConstants.DOWNLOAD_URL,
+            ),
+        ] + super().get_urls()
+
+    @admin.display(description="profile")
+    def download(self, obj):
+        """Link to Staff Only Download of .prof Dump"""
+        if not obj.profile:
+            return "-"
+        return format_html(
+            '<a href="{}">{}</a>',
+            reverse(f"admin:{ProfilingConstants.DOWNLOAD_URL}", args=[obj.pk]),
+            basename(obj.profile.name),
+        )
+
+    def download_view(self, request, object_id):
+        """Serve .prof Dump From Private Storage to Staff Allowed to View Profiles"""
+        profile = self.get_object(request, object_id)
+        if profile is None or not profile.profile:
+            raise Http404
+        if not self.has_view_permission(request, profile):
+            raise PermissionDenied
+        return FileResponse(
+            profile.profile.open("rb"),
+            as_attachment=True,
+            filename=basename(profile.profile.name),
+        )
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class QuickpnrConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "quickpnr"
+
+    # QuickPNR App - Signal
+    def ready(self):
+        import quickpnr.signals  # noqa: F401
@@ -0,0 +1,101 @@
+"""Benchmark DRF JSON and orjson Renderers & Parsers"""
+
+from decimal import Decimal
+from io import BytesIO
+from timeit import timeit
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now, timedelta
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from pnr.api.serializer import PnrDetailReadSerializer
+from utils.parsers import ORJSONParser
+from utils.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = "Compare stdlib json and orjson on large PNR lists and bulk payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pnrs", type=int, default=500)
+        parser.add_argument("--passengers", type=int, default=6)
+        parser.add_argument("--iterations", type=int, default=50)
+
+    def build_pnrs(self, count, passengers):
+        """Serialized PNR Details as Returned by the API"""
+        pnrs = []
+        for index in range(count):
+            row = {
+                "id": index,
+                "pnr": 1000000000 + index,
+                "train_number": "12951",
+                "train_name": "MUMBAI RAJDHANI",
+                "boarding_date": now() + timedelta(days=index % 120),
+                "boarding_point": "NDLS",
+                "reserved_from": "NDLS",
+                "reserved_to": "MMCT",
+                "reserved_class": "3A",
+                "fare": Decimal("4135.50"),
+                "remark": None,
+                "status": 1,
+                "modified": now(),
+                "train_status": "On Time",
+                "charting_status": "Chart Not Prepared",
+            }
+            passenger_rows = [
+                {
+                    "id": passenger,
+                    "name": "Passenger {passenger}".format(passenger=passenger),
+                    "booking_status": "WL/{passenger}".format(passenger=passenger),
+                    "current_status": "RAC/{passenger}".format(passenger=passenger),
+                }
+                for passenger in range(passengers)
+            ]
+            pnrs.append(PnrDetailReadSerializer(row, passengers=passenger_rows).data)
+        return pnrs
+
+    def compare(self, label, stdlib, fast, iterations):
+        stdlib_time = timeit(stdlib, number=iterations) / iterations
+        fast_time = timeit(fast, number=iterations) / iterations
+        self.stdout.write(
+            "{label:<32} json {stdlib:8.2f} ms  orjson {fast:8.2f} ms  {ratio:5.1f}x".format(
+                label=label,
+                stdlib=stdlib_time * 1e3,
+                fast=fast_time * 1e3,
+                ratio=stdlib_time / fast_time,
+            )
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        pnrs = self.build_pnrs(options["pnrs"], options["passengers"])
+        # Raw Decimal & Datetime Values Go Through the Encoder Fallback.
+        raw = [
+            {"pnr": pnr["pnr"], "fare": Decimal("4135.50"), "modified": now()}
+            for pnr in pnrs
+        ]
+        payloads = {"PNR list": pnrs, "Raw Decimal/datetime list": raw}
+
+        stdlib_renderer, fast_renderer = JSONRenderer(), ORJSONRenderer()
+        for label, payload in payloads.items():
+            if stdlib_renderer.render(payload) != fast_renderer.render(payload):
+                self.stderr.write(
+                    "{label}: rendered output differs".format(label=label)
+                )
+                return
+            self.compare(
+                "Render {label}".format(label=label),
+                lambda: stdlib_renderer.render(payload),
+                lambda: fast_renderer.render(payload),
+                iterations,
+            )
+
+        body = stdlib_renderer.render(
+            {"pnrs": [pnr["pnr"] for pnr in pnrs], "data": pnrs}
+        )
+        stdlib_parser, fast_parser = JSONParser(), ORJSONParser()
+        self.compare(
+            "Parse bulk payload",
+            lambda: stdlib_parser.parse(BytesIO(body)),
+            lambda: fast_parser.parse(BytesIO(body)),
+            iterations,
+        )
@@ -0,0 +1,116 @@
+"""Benchmark Per-Mail SMTP Connections Against the Pooled Batch Sender"""
+
+import socketserver
+import threading
+from time import perf_counter, sleep
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from utils.smtp_pool import SMTPPool
+
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP Dialogue, Accepts & Discards Every Message"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        # Stand-in for TCP + SSL Handshake & Login Round Trips.
+        sleep(self.server.connect_latency)
+        self.reply("220 localhost stand-in ESMTP")
+        while line := self.rfile.readline():
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 localhost")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                self.server.received += 1
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, connect_latency):
+        super().__init__(("127.0.0.1", 0), StandInSMTPHandler)
+        self.connect_latency = connect_latency
+        self.received = 0
+
+
+class Command(BaseCommand):
+    help = "Compare one SMTP connection per mail with pooled batched sending"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200)
+        parser.add_argument(
+            "--connect-latency",
+            type=float,
+            default=0.05,
+            help="Seconds the stand-in server waits per connection (SSL + login)",
+        )
+
+    def build_messages(self, count):
+        return [
+            EmailMultiAlternatives(
+                subject=f"PNR Status {index}",
+                body="PNR Details",
+                from_email="quickpnr@localhost",
+                to=[f"user{index}@localhost"],
+            )
+            for index in range(count)
+        ]
+
+    def handle(self, *args, **options):
+        server = StandInSMTPServer(options["connect_latency"])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        smtp_settings = {
+            "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+            "EMAIL_HOST": "127.0.0.1",
+            "EMAIL_PORT": server.server_address[1],
+            "EMAIL_USE_SSL": False,
+            "EMAIL_USE_TLS": False,
+            "EMAIL_HOST_USER": "",
+            "EMAIL_HOST_PASSWORD": "",
+        }
+        count = options["messages"]
+        try:
+            with override_settings(**smtp_settings):
+                # Current Behaviour, New Connection for Every Mail.
+                start = perf_counter()
+                for message in self.build_messages(count):
+                    message.connection = get_connection()
+                    message.send()
+                single = perf_counter() - start
+
+                start = perf_counter()
+                for message in self.build_messages(count):
+                    SMTPPool.send_messages([message])
+                pooled = perf_counter() - start
+
+                start = perf_counter()
+                SMTPPool.send_messages(self.build_messages(count))
+                batched = perf_counter() - start
+                SMTPPool.close_all()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        for name, elapsed in (
+            ("connection per mail", single),
+            ("pooled connection", pooled),
+            ("pooled batch", batched),
+        ):
+            self.stdout.write(
+                f"{name:<20} {elapsed:8.3f}s  {count / elapsed:9.1f} mails/s  "
+                f"x{single / elapsed:.1f}"
+            )
+        self.stdout.write(f"stand-in server received {server.received} mails")
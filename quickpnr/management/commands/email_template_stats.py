@@ -0,0 +1,24 @@
+"""Show Email Template Cache Hits & Misses"""
+
+from django.core.management.base import BaseCommand
+from utils.constants import MetricsConstants
+from utils.template_cache import TemplateCache
+
+
+class Command(BaseCommand):
+    help = (
+        "Show email template cache hits (DB queries saved) and misses per email type, "
+        "of all workers when metrics are multi-process"
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Template Version: {TemplateCache.version()}")
+        for email_type, counts in TemplateCache.stats().items():
+            hits = counts[MetricsConstants.HIT]
+            misses = counts[MetricsConstants.MISS]
+            total = hits + misses
+            ratio = hits / total * 100 if total else 0
+            self.stdout.write(
+                f"{email_type:<20} queries saved {hits:>8}  "
+                f"misses {misses:>6}  hit ratio {ratio:5.1f}%"
+            )
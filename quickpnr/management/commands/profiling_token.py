@@ -0,0 +1,25 @@
+"""Issue X-Profile Header Value for a Staff User"""
+
+from django.core.management.base import BaseCommand, CommandError
+from utils.constants import ProfilingConstants
+from utils.profiling import sign_profiling_token
+from utils.utils import get_model
+
+
+class Command(BaseCommand):
+    help = "Print a signed X-Profile header value that profiles a staff user's requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+
+    def handle(self, *args, **options):
+        User = get_model("users", "User")
+        try:
+            user = User.objects.get(username=options["username"], is_staff=True)
+        except User.DoesNotExist:
+            raise CommandError(f"No staff user {options['username']!r}")
+        self.stdout.write(f"X-Profile: {sign_profiling_token(user)}")
+        self.stdout.write(
+            f"Valid for {ProfilingConstants.TOKEN_MAX_AGE // 3600} hours, "
+            "profiles are listed under Request Profiles in admin."
+        )
@@ -1,9 +1,13 @@
 """Quick PNR Basic Utilities Models"""
 
+from django.core.files.storage import storages
 from django.db import models
 from django_extensions.db.models import ActivatorModel, TimeStampedModel
+from django.utils.functional import cached_property
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
-from utils.constants import EmailTemplates
+from utils.constants import EmailTemplates, OutboxConstants, ProfilingConstants
+from utils.email_templates import CompiledTemplate
 
 
 class EmailTemplate(TimeStampedModel, ActivatorModel):
@@ -17,6 +21,11 @@ class EmailTemplate(TimeStampedModel, ActivatorModel):
         max_length=50, choices=EmailTemplates.EMAIL_TYPES, null=True, blank=True
     )
 
+    @cached_property
+    def compiled_template(self) -> CompiledTemplate:
+        """HTML Template Parsed Once, Kept With Cached Template Instance"""
+        return CompiledTemplate(self.template or "")
+
     def __str__(self) -> str:
         """
         Returns a string representation of the model.
@@ -24,3 +33,78 @@ class EmailTemplate(TimeStampedModel, ActivatorModel):
             str: The subject of the email template.
         """
         return self.subject
+
+
+class EmailOutbox(TimeStampedModel):
+    """Emails Written With Triggering Change, Sent Once Transaction Commits"""
+
+    email_type = models.CharField(
+        max_length=50, choices=EmailTemplates.EMAIL_TYPES, verbose_name=_("email type")
+    )
+    user = models.ForeignKey(
+        "users.User", on_delete=models.CASCADE, related_name="email_outbox"
+    )
+    payload = models.JSONField(default=dict, blank=True, verbose_name=_("payload"))
+    state = models.CharField(
+        max_length=16,
+        choices=OutboxConstants.STATES,
+        default=OutboxConstants.PENDING,
+        verbose_name=_("state"),
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("attempts"))
+    next_attempt_at = models.DateTimeField(
+        default=now, verbose_name=_("next attempt at")
+    )
+    last_error = models.TextField(null=True, blank=True, verbose_name=_("last error"))
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name=_("sent at"))
+
+    class Meta:
+        verbose_name = _("Email Outbox")
+        verbose_name_plural = _("Email Outbox")
+        indexes = [
+            # Dispatcher Scans Due Pending Emails
+            models.Index(
+                fields=["state", "next_attempt_at"], name="email_outbox_due_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.email_type} - {self.user_id}"
+
+
+def private_storage():
+    """Storage of Files Never Served by URL, Callable Keeps it Out of Migrations"""
+    return storages[ProfilingConstants.STORAGE]
+
+
+class RequestProfile(TimeStampedModel):
+    """cProfile Run & SQL Timings of One Staff Requested Profile"""
+
+    user = models.ForeignKey(
+        "users.User",
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="request_profiles",
+    )
+    method = models.CharField(max_length=8, verbose_name=_("method"))
+    path = models.CharField(
+        max_length=ProfilingConstants.PATH_LENGTH, verbose_name=_("path")
+    )
+    status_code = models.PositiveSmallIntegerField(verbose_name=_("status code"))
+    duration_ms = models.FloatField(verbose_name=_("duration (ms)"))
+    query_count = models.PositiveIntegerField(verbose_name=_("query count"))
+    query_ms = models.FloatField(verbose_name=_("query time (ms)"))
+    # Top Functions as pstats Text, Full Run Downloadable as .prof
+    summary = models.TextField(blank=True, verbose_name=_("summary"))
+    profile = models.FileField(
+        upload_to=ProfilingConstants.UPLOAD_TO,
+        storage=private_storage,
+        verbose_name=_("profile"),
+    )
+
+    class Meta:
+        verbose_name = _("Request Profile")
+        verbose_name_plural = _("Request Profiles")
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.path} - {self.duration_ms:.0f}ms"
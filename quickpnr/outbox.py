@@ -0,0 +1,151 @@
+"""Transactional Email Outbox, Written With the Change & Drained in Bulk"""
+
+from datetime import timedelta
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+from utils.constants import EmailTemplates, OutboxConstants
+from utils.email_service import EmailService
+from utils.query_budget import query_budget
+from utils.utils import get_model
+from pnr.api.serializer import PnrDetailReadSerializer
+
+EmailOutbox = get_model("quickpnr", "EmailOutbox")
+PnrDetail = get_model("pnr", "PnrDetail")
+EmailService = EmailService()
+
+
+def mailed_pnr_ids(entry) -> list:
+    """IDs of PNRs Mailed by Outbox Entry"""
+    if entry.email_type == EmailTemplates.PNR_DETAILS:
+        return [entry.payload["pnr_id"]] if "pnr_id" in entry.payload else []
+    if entry.email_type == EmailTemplates.PNR_DIGEST:
+        return [pnr_id for pnr_id, _ in entry.payload.get("pnrs", [])]
+    return []
+
+
+def load_pnrs(entries) -> dict:
+    """Serialized PNRs Mailed by Batch, Keyed by PNR ID, Two Queries per Batch"""
+    pnr_ids = {pnr_id for entry in entries for pnr_id in mailed_pnr_ids(entry)}
+    if not pnr_ids:
+        return {}
+    passengers = PnrDetailReadSerializer.get_passengers_map(list(pnr_ids))
+    return {
+        row["id"]: PnrDetailReadSerializer(row, passengers=passengers[row["id"]]).data
+        for row in PnrDetail.objects.filter(id__in=pnr_ids).values(
+            *PnrDetailReadSerializer.pnr_fields
+        )
+    }
+
+
+def pnr_details_message(entry, pnrs: dict):
+    """PNR Details Mail, Only Changed Passengers if Any"""
+    pnr_id, passenger_ids = entry.payload["pnr_id"], entry.payload.get("passenger_ids")
+    template = EmailService.get_template(email_type=EmailTemplates.PNR_DETAILS)
+    # Rendered Once per Batch, Fan-Out Entries of a PNR Share the HTML.
+    rendered = (pnr_id, tuple(passenger_ids or ()))
+    if rendered not in pnrs:
+        # Copied, Entries of the Same PNR May Keep Different Passengers.
+        pnrs[rendered] = EmailService.render_pnr_status(
+            template,
+            PnrDetailReadSerializer.only_passengers(dict(pnrs[pnr_id]), passenger_ids),
+        )
+    return EmailService.build_message(
+        template.subject,
+        template.body,
+        template.is_html,
+        [entry.user.email],
+        pnrs[rendered],
+    )
+
+
+def pnr_digest_message(entry, pnrs: dict):
+    """PNR Digest Mail, Only Changed Passengers of Each PNR"""
+    return EmailService.pnr_digest_message(
+        entry.user,
+        [
+            PnrDetailReadSerializer.only_passengers(dict(pnrs[pnr_id]), passenger_ids)
+            for pnr_id, passenger_ids in entry.payload["pnrs"]
+        ],
+    )
+
+
+# Email Type Mapped to Builder of its Message
+MESSAGE_BUILDERS = {
+    EmailTemplates.REGISTRED_SUCCESSFULLY: lambda entry, pnrs: (
+        EmailService.registration_message(entry.user)
+    ),
+    EmailTemplates.PNR_DETAILS: pnr_details_message,
+    EmailTemplates.PNR_DIGEST: pnr_digest_message,
+}
+
+
+def send_entry(entry, pnrs: dict) -> bool:
+    """Send One Claimed Outbox Email, Record Outcome or Retry State on Entry"""
+    try:
+        EmailService.send_message(MESSAGE_BUILDERS[entry.email_type](entry, pnrs))
+        entry.state = OutboxConstants.SENT
+        entry.sent_at = now()
+        return True
+    except Exception as err:
+        entry.last_error = str(err)[: OutboxConstants.ERROR_LENGTH]
+        # Missing User / PNR or Out of Attempts, Retrying Won't Help.
+        if (
+            isinstance(err, (ObjectDoesNotExist, KeyError, AttributeError))
+            or entry.attempts >= OutboxConstants.MAX_ATTEMPTS
+        ):
+            entry.state = OutboxConstants.FAILED
+        else:
+            entry.next_attempt_at = now() + timedelta(
+                seconds=OutboxConstants.RETRY_BACKOFF * 2 ** (entry.attempts - 1)
+            )
+        return False
+
+
+def claim(batch_size: int) -> list:
+    """Claim Due Emails, Counts the Attempt & Hides Them Until Claim Expires"""
+    at = now()
+    due = EmailOutbox.objects.filter(
+        state=OutboxConstants.PENDING, next_attempt_at__lte=at
+    )
+    with transaction.atomic():
+        # Pending Out of Attempts Only if a Sender Died Holding its Last Claim.
+        due.filter(attempts__gte=OutboxConstants.MAX_ATTEMPTS).update(
+            state=OutboxConstants.FAILED,
+            last_error=OutboxConstants.CLAIM_EXPIRED,
+            modified=at,
+        )
+        # Locked Rows Are Skipped so Concurrent Dispatchers Never Claim Twice.
+        entries = list(
+            due.select_for_update(skip_locked=True, of=("self",))
+            .select_related("user")
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        claimed_until = at + timedelta(seconds=OutboxConstants.CLAIM_TIMEOUT)
+        EmailOutbox.objects.filter(id__in=[entry.id for entry in entries]).update(
+            attempts=F("attempts") + 1, next_attempt_at=claimed_until, modified=at
+        )
+    for entry in entries:
+        entry.attempts += 1
+        entry.next_attempt_at = claimed_until
+    return entries
+
+
+@query_budget(6)
+def drain(batch_size: int = OutboxConstants.BATCH_SIZE) -> tuple[int, int, int]:
+    """Send One Batch of Due Emails, Returns (Picked, Sent, Failed)"""
+    # Claimed & Recorded in Short Transactions, No Row Lock Held While Mailing.
+    entries = claim(batch_size)
+    if not entries:
+        return 0, 0, 0
+    pnrs = load_pnrs(entries)
+    sent = sum(send_entry(entry, pnrs) for entry in entries)
+    for entry in entries:
+        entry.modified = now()
+    EmailOutbox.objects.bulk_update(
+        entries,
+        ["state", "next_attempt_at", "last_error", "sent_at", "modified"],
+    )
+    failed = sum(entry.state == OutboxConstants.FAILED for entry in entries)
+    return len(entries), sent, failed
@@ -0,0 +1,17 @@
+"""Signals to Invalidate Cached Email Templates"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from utils.utils import get_model
+from utils.template_cache import TemplateCache
+
+EmailTemplate = get_model("quickpnr", "EmailTemplate")
+
+
+@receiver(post_save, sender=EmailTemplate)
+@receiver(post_delete, sender=EmailTemplate)
+def invalidate_email_templates(sender, instance, **kwargs):
+    """Bump Template Version Once Change is Committed"""
+    transaction.on_commit(TemplateCache.bump)
+    return True
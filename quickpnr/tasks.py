@@ -1,15 +1,67 @@
-"""Flush Expired PNR Details"""
+"""Flush Expired PNR Details & Dispatch Email Outbox"""
 
 from celery import shared_task
+from django.core.cache import cache
+from django.db import transaction
+from utils.constants import OutboxConstants
 from utils.utils import get_model
+from utils.query_budget import query_budget
 from django.utils.timezone import now
+from django_extensions.db.models import ActivatorModel
+from quickpnr.outbox import drain
 
 PnrDetail = get_model("pnr", "PnrDetail")
+EmailOutbox = get_model("quickpnr", "EmailOutbox")
+
+
+def schedule_dispatch():
+    """Queue One Dispatch Task for All Emails Committed Shortly Together"""
+    if cache.add(OutboxConstants.DISPATCH_LOCK_KEY, True, 60):
+        dispatch_outbox.apply_async(countdown=OutboxConstants.DISPATCH_DELAY)
+
+
+def enqueue_email(email_type: str, user_id, **payload):
+    """Write Email to Outbox in Current Transaction, Dispatched After Commit"""
+    entry = EmailOutbox.objects.create(
+        email_type=email_type, user_id=user_id, payload=payload
+    )
+    transaction.on_commit(schedule_dispatch)
+    return entry
+
+
+def enqueue_emails(email_type: str, recipients):
+    """Write Emails of (User ID, Payload) Recipients to Outbox in One Insert"""
+    entries = EmailOutbox.objects.bulk_create(
+        EmailOutbox(email_type=email_type, user_id=user_id, payload=payload)
+        for user_id, payload in recipients
+    )
+    transaction.on_commit(schedule_dispatch)
+    return entries
 
 
 @shared_task
+@query_budget(1)
 def flush_pnr():
     """Flush Expired PNR Details"""
-    pnrs = PnrDetail.objects.filter(expiry__lt=now())
-    [pnr.soft_delete() for pnr in pnrs]
+    # Soft Delete in One Query, Like PnrDetail.soft_delete() Leaves modified As Is.
+    PnrDetail.objects.filter(
+        expiry__lt=now(), status=ActivatorModel.ACTIVE_STATUS
+    ).update(status=ActivatorModel.INACTIVE_STATUS)
     return "PNR Details Flushed"
+
+
+@shared_task
+def dispatch_outbox():
+    """Send Due Outbox Emails in Batches, Also Run by Beat to Pick Up Retries"""
+    # Release Before Reading so Emails Committed From Now On Queue a New Task.
+    cache.delete(OutboxConstants.DISPATCH_LOCK_KEY)
+    sent = failed = 0
+    for _ in range(OutboxConstants.MAX_BATCHES):
+        picked, batch_sent, batch_failed = drain()
+        sent, failed = sent + batch_sent, failed + batch_failed
+        if picked < OutboxConstants.BATCH_SIZE:
+            break
+    else:
+        # Backlog Left, Continue in a Fresh Task.
+        schedule_dispatch()
+    return OutboxConstants.DISPATCHED.format(sent=sent, failed=failed)
@@ -0,0 +1,436 @@
+"""Tests of Shared Services: Metrics, Middlewares, Mail & Template Caches"""
+
+import tempfile
+from pathlib import Path
+from threading import Lock
+from smtplib import SMTPServerDisconnected
+from types import SimpleNamespace
+from unittest import mock
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.handlers.base import BaseHandler
+from django.core.mail import EmailMessage
+from django.http import HttpResponse
+from django.urls import reverse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from prometheus_client import REGISTRY
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+from utils.constants import EmailTemplates, MetricsConstants, ProfilingConstants
+from utils.email_service import EmailService
+from utils.email_templates import PASSENGER_ROW, PNR_SECTION, CompiledTemplate
+from utils.metrics import MetricsMiddleware, get_registry, metrics_view
+from utils.profiling import ProfilingMiddleware, sign_profiling_token
+from utils.smtp_pool import SMTPPool
+from utils.template_cache import TemplateCache
+from utils.throttling import Quota, ThrottleHeadersMiddleware
+from utils.utils import get_model
+
+User = get_model("users", "User")
+RequestProfile = get_model("quickpnr", "RequestProfile")
+EmailTemplate = get_model("quickpnr", "EmailTemplate")
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class MultiProcessMetricsTests(SimpleTestCase):
+    """Samples Written by Every Worker Are Merged Into One Exposition"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(PROMETHEUS_MULTIPROC_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write_counter(self, pid: int, value: float):
+        """Cache Hit Counter as a Worker Process Writes it"""
+        samples = MmapedDict(f"{self.directory}/counter_{pid}.db")
+        samples.write_value(
+            mmap_key(
+                "quickpnr_cache_requests",
+                "quickpnr_cache_requests_total",
+                ["cache", "result"],
+                ["jwt_user", "hit"],
+                "Cache lookups per cache and result",
+            ),
+            value,
+            0,
+        )
+        samples.close()
+
+    def test_workers_merged(self):
+        self.write_counter(101, 2)
+        self.write_counter(102, 3)
+        request = RequestFactory().get("/metrics")
+        request.user = SimpleNamespace(is_authenticated=True, is_staff=True)
+        response = metrics_view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'quickpnr_cache_requests_total{cache="jwt_user",result="hit"} 5.0',
+            response.content.decode(),
+        )
+
+    def test_single_process_uses_default_registry(self):
+        with override_settings(PROMETHEUS_MULTIPROC_DIR=None):
+            self.assertIs(get_registry(), REGISTRY)
+
+
+def sync_view(request):
+    request.throttle_quota = Quota(limit=10, remaining=9, reset=60)
+    return HttpResponse("ok")
+
+
+async def async_view(request):
+    request.throttle_quota = Quota(limit=10, remaining=9, reset=60)
+    # Async ORM, Runs in the Request's Thread Sensitive Worker.
+    await User.objects.acount()
+    return HttpResponse("ok")
+
+
+class AsyncMiddlewareTests(TestCase):
+    """Middlewares Await Async Views Instead of Holding a Thread per Request"""
+
+    middlewares = (MetricsMiddleware, ProfilingMiddleware, ThrottleHeadersMiddleware)
+
+    @override_settings(DEBUG=True)
+    def test_async_chain_not_adapted(self):
+        # Django Logs Every Middleware it Wraps in sync_to_async/async_to_sync.
+        with self.assertNoLogs("django.request", "DEBUG"):
+            BaseHandler().load_middleware(is_async=True)
+
+    def test_sync_and_async_paths(self):
+        for middleware_class in self.middlewares:
+            for view, is_async in ((sync_view, False), (async_view, True)):
+                with self.subTest(middleware_class.__name__, is_async=is_async):
+                    middleware = middleware_class(view)
+                    self.assertEqual(iscoroutinefunction(middleware), is_async)
+                    request = RequestFactory().get("/")
+                    request.resolver_match = None
+                    response = (
+                        async_to_sync(middleware)(request)
+                        if is_async
+                        else middleware(request)
+                    )
+                    self.assertEqual(response.content, b"ok")
+        self.assertEqual(
+            async_to_sync(ThrottleHeadersMiddleware(async_view))(
+                RequestFactory().get("/")
+            )["X-RateLimit-Remaining"],
+            "9",
+        )
+
+    def test_async_view_profiled(self):
+        user = User.objects.create_user(
+            username="staff", email="staff@example.com", is_staff=True
+        )
+        request = RequestFactory().get(
+            "/", **{ProfilingConstants.META_KEY: sign_profiling_token(user)}
+        )
+        with private_storage():
+            response = async_to_sync(ProfilingMiddleware(async_view))(request)
+        self.assertIn("1 queries", response[ProfilingConstants.SUMMARY_HEADER])
+        profile = RequestProfile.objects.get(id=response[ProfilingConstants.ID_HEADER])
+        self.assertEqual(profile.query_count, 1)
+
+
+def private_storage():
+    """Private Storage of Request Profiles in a Temporary Directory"""
+    return mock.patch.object(
+        RequestProfile._meta.get_field("profile"),
+        "storage",
+        FileSystemStorage(location=tempfile.mkdtemp()),
+    )
+
+
+class ProfileDownloadTests(TestCase):
+    """Profile Dumps Kept Out of MEDIA, Downloaded by Staff Through Admin"""
+
+    def setUp(self):
+        patcher = private_storage()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.profile = RequestProfile.objects.create(
+            method="GET",
+            path="/pnr/",
+            status_code=200,
+            duration_ms=1,
+            query_count=0,
+            query_ms=0,
+        )
+        self.profile.profile.save("get-1.prof", ContentFile(b"stats"))
+        self.url = reverse(
+            f"admin:{ProfilingConstants.DOWNLOAD_URL}", args=[self.profile.pk]
+        )
+
+    def test_not_under_media(self):
+        location = Path(storages[ProfilingConstants.STORAGE].location)
+        self.assertEqual(location, Path(settings.PRIVATE_ROOT))
+        self.assertNotIn(Path(settings.MEDIA_ROOT), [location, *location.parents])
+
+    def test_staff_only_download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(
+            User.objects.create_user(
+                username="staff", email="staff@example.com", is_staff=True
+            )
+        )
+        # Staff Without View Permission on Request Profiles.
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_login(
+            User.objects.create_superuser(
+                username="admin", email="admin@example.com", password="Pa55word!xyz"
+            )
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"stats")
+        change = self.client.get(
+            reverse("admin:quickpnr_requestprofile_change", args=[self.profile.pk])
+        )
+        self.assertContains(change, self.url)
+
+
+class WorkerTemplateCache(TemplateCache):
+    """Template Cache of Another Worker, Shares Only the Version in Cache"""
+
+    _templates = {}
+    _version = None
+    _lock = Lock()
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TemplateCacheTests(TestCase):
+    """Templates Served From Memory Until Any Worker Changes Them"""
+
+    def setUp(self):
+        cache.clear()
+        self.template = EmailTemplate.objects.create(
+            subject="PNR Details",
+            body="PNR Details",
+            template="{{ pnr }}",
+            email_type=EmailTemplates.PNR_DETAILS,
+        )
+
+    def test_version_read_once(self):
+        TemplateCache.bump()
+        with mock.patch("utils.template_cache.cache") as shared:
+            shared.get.return_value = 1
+            self.assertEqual(TemplateCache.version(), 1)
+        shared.get.assert_called_once()
+        shared.add.assert_not_called()
+
+    def test_save_invalidates_other_workers(self):
+        for worker in (TemplateCache, WorkerTemplateCache):
+            worker.get(EmailTemplates.PNR_DETAILS)
+        with self.assertNumQueries(0):
+            WorkerTemplateCache.get(EmailTemplates.PNR_DETAILS)
+        # Saved Through This Worker, Committed Change Bumps Shared Version.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.template.subject = "Your PNR Details"
+            self.template.save()
+        with self.assertNumQueries(1):
+            template = WorkerTemplateCache.get(EmailTemplates.PNR_DETAILS)
+        self.assertEqual(template.subject, "Your PNR Details")
+
+    def test_hits_counted_per_email_type(self):
+        before = TemplateCache.stats()[EmailTemplates.PNR_DETAILS]
+        TemplateCache.bump()
+        for _ in range(3):
+            TemplateCache.get(EmailTemplates.PNR_DETAILS)
+        after = TemplateCache.stats()[EmailTemplates.PNR_DETAILS]
+        self.assertEqual(after[MetricsConstants.HIT] - before[MetricsConstants.HIT], 2)
+        self.assertEqual(
+            after[MetricsConstants.MISS] - before[MetricsConstants.MISS], 1
+        )
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend", EMAIL_USE_SSL=False
+)
+class SMTPPoolTests(SimpleTestCase):
+    """Dropped SMTP Connections Reopened, Each Message Delivered Once"""
+
+    def setUp(self):
+        SMTPPool.close_all()
+        self.addCleanup(SMTPPool.close_all)
+        patcher = mock.patch("django.core.mail.backends.smtp.smtplib.SMTP")
+        self.smtp = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.dropped, self.fresh = mock.Mock(), mock.Mock()
+        self.smtp.side_effect = [self.dropped, self.fresh]
+
+    @staticmethod
+    def messages(count: int = 1):
+        return [
+            EmailMessage(f"Subject {number}", "Body", to=["to@example.com"])
+            for number in range(count)
+        ]
+
+    def disconnect(self):
+        """Server Closed the Connection, Every Call on it Fails"""
+        for method in (self.dropped.sendmail, self.dropped.noop, self.dropped.quit):
+            method.side_effect = SMTPServerDisconnected(
+                "Connection unexpectedly closed"
+            )
+
+    def test_reconnect_on_first_send(self):
+        self.disconnect()
+        self.assertEqual(SMTPPool.send_messages(self.messages()), 1)
+        self.assertEqual(self.smtp.call_count, 2)
+        self.fresh.sendmail.assert_called_once()
+
+    def test_pooled_connection_reopened(self):
+        self.assertEqual(SMTPPool.send_messages(self.messages()), 1)
+        # Server Dropped the Pooled Connection While Idle.
+        self.disconnect()
+        self.assertEqual(SMTPPool.send_messages(self.messages()), 1)
+        self.assertEqual(self.dropped.sendmail.call_count, 2)
+        self.fresh.sendmail.assert_called_once()
+
+    def test_batch_resumed_after_reconnect(self):
+        delivered = []
+
+        def drop_after_first(*args):
+            if delivered:
+                raise SMTPServerDisconnected("Connection unexpectedly closed")
+            delivered.append(args)
+
+        self.dropped.sendmail.side_effect = drop_after_first
+        self.fresh.sendmail.side_effect = lambda *args: delivered.append(args)
+        self.assertEqual(SMTPPool.send_messages(self.messages(3)), 3)
+        # Failed Message Retried Once, Delivered Ones Not Resent.
+        self.assertEqual(self.fresh.sendmail.call_count, 2)
+        self.assertEqual(len(delivered), 3)
+
+
+def legacy_passenger_rows(passengers) -> str:
+    """Passenger Rows as pnr_status_mail Built Them Before Precompiled Templates"""
+    return "\n".join(
+        [
+            f"""
+ <ul
+                                          style="
+                                            list-style: none;
+                                            padding: 0;
+                                            margin: 0;
+                                            display: flex;
+                                            justify-content: space-between;
+                                            background-color: #e0e0e0;
+                                            border-radius: 8px;
+                                            padding: 8px;
+                                          "
+                                        >
+                                          <li
+                                            style="
+                                              margin: 0 8px;
+                                              font-size: 14px;
+                                              font-weight: bold;
+                                            "
+                                          >
+                                            Name: {passenger['name']}
+                                          </li>
+                                          <li
+                                            style="
+                                              margin: 0 8px;
+                                              font-size: 14px;
+                                            "
+                                          >
+                                            Booking:
+                                            {passenger['booking_status']}
+                                          </li>
+                                          <li
+                                            style="
+                                              margin: 0 8px;
+                                              font-size: 14px;
+                                            "
+                                          >
+                                            Current:
+                                            {passenger['current_status']}
+                                          </li>
+                                        </ul>"""
+            for passenger in passengers
+        ]
+    )
+
+
+class CompiledTemplateTests(SimpleTestCase):
+    """Precompiled Mail Templates Render Exactly What str.format Rendered"""
+
+    template = (
+        "<h1>PNR {pnr}</h1><p>{train_number} {train_name} {reserved_class}</p>"
+        "<p>{boarding_date}: {reserved_from} to {reserved_to} via {boarding_point}</p>"
+        "<div>{passengers_details}</div><p>Fare {fare} {remark}</p>"
+        "<p>{train_status} / {charting_status}</p><p>{{literal braces}}</p>"
+    )
+    pnr_detail = {
+        "pnr": 1234567890,
+        "train_number": "12951",
+        "train_name": "MUMBAI RAJDHANI",
+        "reserved_class": "3A",
+        "boarding_date": "2024-12-01T20:00:00+05:30",
+        "reserved_from": "NDLS",
+        "reserved_to": "MMCT",
+        "boarding_point": "NDLS",
+        "fare": "4135.50",
+        "remark": None,
+        "train_status": "",
+        "charting_status": "Chart Not Prepared",
+        "passengers_details": [
+            {
+                "id": number,
+                "name": f"Passenger {number}",
+                "booking_status": f"WL/{number}",
+                "current_status": "CNF/B1/{seat}".format(seat=number * 8),
+                "coach_position": "B1",
+            }
+            for number in range(1, 7)
+        ],
+    }
+
+    def test_pnr_details_mail(self):
+        pnr_detail = self.pnr_detail
+        legacy = self.template.format(
+            pnr=pnr_detail["pnr"],
+            train_number=pnr_detail["train_number"],
+            train_name=pnr_detail["train_name"],
+            reserved_class=pnr_detail["reserved_class"],
+            boarding_date=pnr_detail["boarding_date"][0:10],
+            reserved_from=pnr_detail["reserved_from"],
+            reserved_to=pnr_detail["reserved_to"],
+            boarding_point=pnr_detail["boarding_point"],
+            passengers_details=legacy_passenger_rows(pnr_detail["passengers_details"]),
+            fare=pnr_detail["fare"],
+            remark="No remarks",
+            train_status="Status not available",
+            charting_status=pnr_detail["charting_status"],
+        )
+        template = EmailTemplate(template=self.template, is_html=True)
+        self.assertEqual(EmailService.render_pnr_status(template, pnr_detail), legacy)
+
+    def test_passenger_rows(self):
+        passengers = self.pnr_detail["passengers_details"]
+        self.assertEqual(
+            PASSENGER_ROW.render_each(passengers), legacy_passenger_rows(passengers)
+        )
+
+    def test_pnr_section(self):
+        context = {
+            **self.pnr_detail,
+            "passengers_details": PASSENGER_ROW.render_each(
+                self.pnr_detail["passengers_details"]
+            ),
+        }
+        self.assertEqual(
+            PNR_SECTION.render(context), PNR_SECTION.text.format(**context)
+        )
+
+    def test_formatted_fields_fall_back_to_format(self):
+        template = CompiledTemplate("{fare:>10} {pnr!r} {passengers[0]} {{x}}")
+        context = {"fare": "4135.50", "pnr": 1234567890, "passengers": ["A"]}
+        self.assertFalse(template.simple)
+        self.assertEqual(template.render(context), template.text.format(**context))
@@ -1,6 +1,13 @@
 from pathlib import Path
+from os import environ
 from os.path import join
-from utils.constants import Settings, EmailConfig, CeleryConfig
+from utils.constants import (
+    Settings,
+    EmailConfig,
+    CeleryConfig,
+    ProfilingConstants,
+    ThrottleConstants,
+)
 from dj_database_url import parse
 from django.utils.timezone import timedelta
 from celery.schedules import crontab
@@ -13,6 +20,16 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 AUTH_USER_MODEL = Settings.AUTH_USER_MODEL
 APPEND_SLASH = True
 
+# Views & Tasks Exceeding Their Query Budget Are Logged or Raise
+QUERY_BUDGET_MODE = Settings.QUERY_BUDGET_MODE
+
+# Multi-Process Metrics Directory, Read From Process Environment (Not .env)
+# Like prometheus_client Does When Deciding Whether Workers Write Samples
+PROMETHEUS_MULTIPROC_DIR = environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Class Scraping PNRs, Swapped for a Fake in Load Tests
+PNR_SCRAPER_BACKEND = Settings.PNR_SCRAPER_BACKEND
+
 # SECURITY WARNING: keep the secret key used in production secret!
 # -------------------------------------------------
 SECRET_KEY = Settings.SECRET_KEY
@@ -38,6 +55,9 @@ INSTALLED_APPS = [
 # Middlewares
 # -------------------------------------------------
 MIDDLEWARE = [
+    # Outermost, so Profiles Include Every Other Middleware
+    "utils.profiling.ProfilingMiddleware",
+    "utils.metrics.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -46,6 +66,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "utils.throttling.ThrottleHeadersMiddleware",
 ]
 
 # Root Urls
@@ -83,6 +104,17 @@ DATABASES = {}
 DATABASES["default"] = parse(Settings.DJANGO_DATABASE_URL)
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# -------------------------------------------------
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": Settings.REDIS_URL,
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 # -------------------------------------------------
@@ -126,6 +158,18 @@ STATIC_ROOT = join(BASE_DIR, Settings.STATIC_ROOT)
 MEDIA_URL = Settings.MEDIA_URL
 MEDIA_ROOT = join(BASE_DIR, Settings.MEDIA_ROOT)
 
+# Private files (Outside MEDIA_ROOT, Not Served by URL)
+# -------------------------------------------------
+PRIVATE_ROOT = join(BASE_DIR, Settings.PRIVATE_ROOT)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    ProfilingConstants.STORAGE: {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": PRIVATE_ROOT},
+    },
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -145,15 +189,51 @@ EMAIL_HOST_PASSWORD = EmailConfig.EMAIL_HOST_PASSWORD
 
 # Rest Framework Configuration
 # https://www.django-rest-framework.org/
+# orjson Renderer & Parser Unless USE_ORJSON=False
+JSON_RENDERER = (
+    "utils.renderers.ORJSONRenderer"
+    if Settings.USE_ORJSON
+    else "rest_framework.renderers.JSONRenderer"
+)
+JSON_PARSER = (
+    "utils.parsers.ORJSONParser"
+    if Settings.USE_ORJSON
+    else "rest_framework.parsers.JSONParser"
+)
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        JSON_RENDERER,
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        JSON_PARSER,
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "DEFAULT_THROTTLE_CLASSES": [
+        "utils.throttling.IPRateThrottle",
+        "utils.throttling.UserRateThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "user": ThrottleConstants.USER_RATE,
+        "ip": ThrottleConstants.IP_RATE,
+    },
 }
 
+# Quota Headers Readable by Browser Clients
+CORS_EXPOSE_HEADERS = [
+    ThrottleConstants.LIMIT_HEADER,
+    ThrottleConstants.REMAINING_HEADER,
+    ThrottleConstants.RESET_HEADER,
+    "Retry-After",
+]
+
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
@@ -175,6 +255,21 @@ CELERY_BEAT_SCHEDULE = {
         "task": "quickpnr.tasks.flush_pnr",
         "schedule": crontab(minute=00, hour=8),
     },
+    # Scrape Budget is Per Minute, so Refreshes Are Queued Every Minute
+    "refresh_pnr_details": {
+        "task": "pnr.tasks.schedule_pnr_refresh",
+        "schedule": crontab(minute="*"),
+    },
+    # Retries & Emails Whose Dispatch Was Never Queued
+    "dispatch_email_outbox": {
+        "task": "quickpnr.tasks.dispatch_outbox",
+        "schedule": crontab(minute="*"),
+    },
+}
+# Scrapes Run on Their Own Queue: celery -A quickpnr worker -Q scrape
+CELERY_TASK_ROUTES = {
+    "pnr.tasks.refresh_pnr": {"queue": CeleryConfig.SCRAPE_QUEUE},
+    "pnr.tasks.fetch_pnr": {"queue": CeleryConfig.SCRAPE_QUEUE},
 }
 
 # Logging Configuration
@@ -205,11 +300,13 @@ LOGGING = {
             "formatter": "simple",
         },
     },
+    # Module Loggers (logging.getLogger(__name__)) of Project Apps
     "loggers": {
-        "rewards": {
+        app: {
             "handlers": ["file", "console"],
             "level": "INFO",
-            "propagate": True,
-        },
+            "propagate": False,
+        }
+        for app in ("pnr", "quickpnr", "users", "utils")
     },
 }
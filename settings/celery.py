@@ -10,3 +10,6 @@ app = Celery("quickpnr")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
+
+# Task Runtime & Queue Wait Metrics, Hooked Through Celery Signals
+import utils.metrics  # noqa: E402, F401
@@ -1,6 +1,9 @@
 from settings.base import *  # noqa: F403
+from utils.constants import env
 
 DEBUG = True
+# Queries Over Budget & N+1 Logged While Developing, .env May Choose raise
+QUERY_BUDGET_MODE = env.get("QUERY_BUDGET_MODE", "log")
 ALLOWED_HOSTS = [
     "*",
     "127.0.0.1",
@@ -11,6 +11,8 @@ from users.api.serializers import (
     ForgotPasswordSerializer,
     GoogleAuthenticationLogin,
     GoogleAuthenticationSignup,
+    RefreshSerializer,
+    LogoutSerializer,
 )
 from users.tasks import (
     generate_otp,
@@ -19,17 +21,29 @@ from users.tasks import (
 )
 from utils.utils import AuthService
 from rest_framework.generics import UpdateAPIView, CreateAPIView
+from rest_framework_simplejwt.views import TokenRefreshView
 from users.constants import ResponseMessages
+from utils.constants import ThrottleConstants
+from utils.query_budget import query_budget
 
 User = get_model("users", "User")
 
 
+class RequestUserMixin:
+    """Loads User of Request, Authentication Gives Only a CachedUser"""
+
+    def get_object(self, *args, **kwargs):
+        """Return User Object"""
+        return User.objects.get(pk=self.request.user.pk)
+
+
 class RegistrationApiView(mixins.CreateModelMixin, viewsets.GenericViewSet):
     """User Registeration API View"""
 
     serializer_class = RegistrationSerializer
     permission_classes = [permissions.AllowAny]
 
+    @query_budget(4)
     def create(self, request, *args, **kwargs):
         """Register New User"""
         instance = super().create(request, *args, **kwargs)
@@ -41,7 +55,9 @@ class LoginApiView(views.APIView):
 
     serializer_class = LoginSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_costs = {"POST": ThrottleConstants.CREDENTIAL_COST}
 
+    @query_budget(2)
     def post(self, *args, **kwargs):
         serializer = self.serializer_class(
             data=self.request.data, context={"request": self.request}
@@ -53,21 +69,19 @@ class LoginApiView(views.APIView):
         )
 
 
-class UserProfileView(views.APIView):
+class UserProfileView(RequestUserMixin, views.APIView):
     serializer_class = UserSerializer
     queryset = User.objects.filter(is_active=True)
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_object(self, *args, **kwargs):
-        """Return User Object"""
-        return self.request.user
-
+    @query_budget(1)
     def get(self, *args, **kwargs):
         """Return User Profile"""
         instance = self.get_object(*args, **kwargs)
         serializer = self.serializer_class(instance)
         return Response(serializer.data)
 
+    @query_budget(2)
     def patch(self, request, *args, **kwargs):
         """Update User Profile"""
         instance = self.get_object()
@@ -77,27 +91,33 @@ class UserProfileView(views.APIView):
         return Response(serializer.data)
 
 
-class EmailUpdateView(views.APIView):
+class EmailUpdateView(RequestUserMixin, views.APIView):
     """User Email Update View"""
 
     serializer_class = EmailUpdateSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @query_budget(4)
     def patch(self, *args, **kwargs):
         """Update User Email"""
         serializer = self.serializer_class(
-            self.request.user, data=self.request.data, partial=True
+            self.get_object(), data=self.request.data, partial=True
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class EmailVerifyView(UpdateAPIView):
+class EmailVerifyView(RequestUserMixin, UpdateAPIView):
     """Email Verification API View"""
 
     serializer_class = EmailVerifySerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_costs = {
+        "GET": ThrottleConstants.MAIL_COST,
+        "PATCH": ThrottleConstants.CREDENTIAL_COST,
+        "PUT": ThrottleConstants.CREDENTIAL_COST,
+    }
 
     def get(self, request, *args, **kwargs):
         """Send Email Verification OTP"""
@@ -114,10 +134,11 @@ class EmailVerifyView(UpdateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    @query_budget(2)
     def patch(self, request, *args, **kwargs):
         """Verify User Email"""
         serializer = self.serializer_class(
-            instance=request.user, data=request.data, context={"request": request}
+            instance=self.get_object(), data=request.data, context={"request": request}
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
@@ -127,16 +148,21 @@ class EmailVerifyView(UpdateAPIView):
         )
 
 
-class ChangePasswordView(UpdateAPIView):
+class ChangePasswordView(RequestUserMixin, UpdateAPIView):
     """Change Password API View"""
 
     serializer_class = ChangePasswordSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_costs = {
+        "PATCH": ThrottleConstants.CREDENTIAL_COST,
+        "PUT": ThrottleConstants.CREDENTIAL_COST,
+    }
 
+    @query_budget(2)
     def patch(self, request, *args, **kwargs):
         """Change User Password"""
         serializer = self.serializer_class(
-            instance=request.user, data=request.data, context={"request": request}
+            instance=self.get_object(), data=request.data, context={"request": request}
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
@@ -151,7 +177,13 @@ class ForgotPasswordView(UpdateAPIView):
 
     serializer_class = ForgotPasswordSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_costs = {
+        "POST": ThrottleConstants.MAIL_COST,
+        "PATCH": ThrottleConstants.CREDENTIAL_COST,
+        "PUT": ThrottleConstants.CREDENTIAL_COST,
+    }
 
+    @query_budget(2)
     def post(self, request, *args, **kwargs):
         """Forgot Password Send Password Reset OTP to User"""
         serializer = self.serializer_class(
@@ -164,6 +196,7 @@ class ForgotPasswordView(UpdateAPIView):
             status=status.HTTP_200_OK,
         )
 
+    @query_budget(3)
     def update(self, request, *args, **kwargs):
         """Update User Password After Verification"""
         user = User.objects.get(email=request.data["email"])
@@ -185,6 +218,7 @@ class GoogleSignupView(CreateAPIView):
     permission_classes = [permissions.AllowAny]
     serializer_class = GoogleAuthenticationSignup
 
+    @query_budget(2)
     def post(self, request, *args, **kwargs):
         """Create New User"""
         serializer = self.serializer_class(data=request.data)
@@ -199,6 +233,7 @@ class GoogleLoginView(CreateAPIView):
     permission_classes = [permissions.AllowAny]
     serializer_class = GoogleAuthenticationLogin
 
+    @query_budget(1)
     def post(self, request, *args, **kwargs):
         """Google Login"""
         serializer = self.serializer_class(data=request.data)
@@ -215,3 +250,24 @@ class GoogleLoginView(CreateAPIView):
                 {"message": ResponseMessages.USER_NOT_FOUND},
                 status=status.HTTP_404_NOT_FOUND,
             )
+
+
+class RefreshView(TokenRefreshView):
+    """Refresh Access Token, Refresh Token Rotated"""
+
+    serializer_class = RefreshSerializer
+    throttle_costs = {"POST": ThrottleConstants.CREDENTIAL_COST}
+
+
+class LogoutView(views.APIView):
+    """Logout API View, Blacklists Refresh Token"""
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        serializer = LogoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            {"message": ResponseMessages.LOGGED_OUT}, status=status.HTTP_200_OK
+        )
@@ -3,16 +3,40 @@ from utils.utils import get_model
 from django.contrib.auth.password_validation import (
     validate_password as password_strength,
 )
-from users.constants import UserRegistrationMessages, AuthConstantsMessages, ModelFields
+from users.constants import (
+    UserRegistrationMessages,
+    AuthConstantsMessages,
+    ModelFields,
+    OtpConstants,
+)
+from users.otp_store import OtpStore
+from users.token_blacklist import BlacklistRefreshToken
+from users.thumbnails import thumbnail_urls
+from utils.constants import EmailTemplates
 from django.contrib.auth import authenticate
-from django.utils.timezone import now
-from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from email_validator import validate_email as email_validation
 from email_validator import EmailNotValidError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 
 
 User = get_model("users", "User")
-Otp = get_model("users", "Otp")
+
+OTP_ERRORS = {
+    OtpConstants.INVALID: AuthConstantsMessages.INVALID_OTP,
+    OtpConstants.EXPIRED: AuthConstantsMessages.OTP_EXPIRED,
+    OtpConstants.NOT_FOUND: AuthConstantsMessages.OTP_NOT_FOUND,
+    OtpConstants.LOCKED: AuthConstantsMessages.OTP_ATTEMPTS_EXCEEDED,
+}
+
+
+def verify_otp(purpose: str, user_id, otp):
+    """Check & Consume OTP, Raises ValidationError Unless Valid"""
+    result = OtpStore.verify(purpose, user_id, otp)
+    if result != OtpConstants.VALID:
+        raise serializers.ValidationError(OTP_ERRORS[result])
+    return otp
 
 
 class RegistrationSerializer(serializers.ModelSerializer):
@@ -53,6 +77,7 @@ class RegistrationSerializer(serializers.ModelSerializer):
         except EmailNotValidError as e:
             raise serializers.ValidationError(str(e))
 
+    @transaction.atomic
     def create(self, validated_data):
         password = validated_data.pop("confirm_password")
         user = User(**validated_data)
@@ -82,6 +107,8 @@ class LoginSerializer(serializers.Serializer):
 
 
 class UserSerializer(serializers.ModelSerializer):
+    thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = [
@@ -93,11 +120,16 @@ class UserSerializer(serializers.ModelSerializer):
             "age",
             "address",
             "image",
+            "thumbnails",
             "is_verified",
             "last_login",
             "date_joined",
         ]
 
+    def get_thumbnails(self, instance):
+        """Thumbnail URLs, Empty Until Generated"""
+        return thumbnail_urls(instance.thumbnails)
+
 
 class EmailUpdateSerializer(serializers.ModelSerializer):
     """Update User Email"""
@@ -113,36 +145,19 @@ class EmailUpdateSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class EmailVerifySerializer(serializers.ModelSerializer):
+class EmailVerifySerializer(serializers.Serializer):
     """Email Verification Serializer"""
 
-    class Meta:
-        model = Otp
-        fields = ["otp"]
+    otp = serializers.IntegerField()
 
     def validate_otp(self, value):
-        """Validate OTP"""
-        # Check it OTP Expired
-
-        user = self.context["request"].user
-        try:
-            if user.otp.otp != value:
-                """Check if OTP is Validated"""
-                raise serializers.ValidationError(
-                    {"otp": [AuthConstantsMessages.INVALID_OTP]}
-                )
-            if user.otp.expiry < now():
-                """If Expiry Date if Smaller Than Current Datetime Means OTP is Expired Hence Raise OTP Expiry Validation Error"""
-                raise serializers.ValidationError(
-                    {"otp": [AuthConstantsMessages.OTP_EXPIRED]}
-                )
-            return value
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError(AuthConstantsMessages.OTP_NOT_FOUND)
+        """Validate & Consume OTP"""
+        return verify_otp(
+            EmailTemplates.VERIFY_EMAIL, self.context["request"].user.id, value
+        )
 
     def update(self, instance, validated_data):
         """Update User Email"""
-        instance.otp.delete()
         instance.is_verified = ModelFields.ACTIVE_STATUS
         instance.save(update_fields=["is_verified"])
         return instance
@@ -155,7 +170,7 @@ class ChangePasswordSerializer(serializers.Serializer):
 
     def validate(self, attrs):
         """Validation Password Validation"""
-        user = self.context["request"].user
+        user = self.instance
         old_password = attrs["old_password"]
         new_password = attrs["new_password"]
         confirm_password = attrs["confirm_password"]
@@ -198,17 +213,8 @@ class ForgotPasswordSerializer(serializers.Serializer):
             raise serializers.ValidationError(AuthConstantsMessages.USER_ALREADY_EXIST)
         return value
 
-    def validate_otp(self, value):
-        """Validate OTP"""
-        user = User.objects.get(email=self.initial_data["email"])
-        if user.otp.expiry < now():
-            raise serializers.ValidationError(AuthConstantsMessages.OTP_EXPIRED)
-        if user.otp.otp != value:
-            raise serializers.ValidationError(AuthConstantsMessages.INVALID_OTP)
-        return value
-
     def validate(self, attrs):
-        """Validation Password Validation"""
+        """Validation Password Validation, OTP Consumed Only if Passwords Match"""
         attrs = super().validate(attrs)
         if "otp" not in attrs:
             return attrs
@@ -218,6 +224,10 @@ class ForgotPasswordSerializer(serializers.Serializer):
             raise serializers.ValidationError(
                 {"confirm_password": [AuthConstantsMessages.PASSWORD_DOES_NOT_MATCH]}
             )
+        try:
+            verify_otp(EmailTemplates.PASSWORD_RESET, self.instance.id, attrs["otp"])
+        except serializers.ValidationError as err:
+            raise serializers.ValidationError({"otp": err.detail})
         return attrs
 
     def update(self, instance, validated_data):
@@ -235,6 +245,7 @@ class GoogleAuthenticationLogin(serializers.Serializer):
 class GoogleAuthenticationSignup(GoogleAuthenticationLogin):
     first_name = serializers.CharField(required=True)
 
+    @transaction.atomic
     def create(self, validated_data):
         validated_data["username"] = validated_data["email"]
         return User.objects.create(**validated_data)
@@ -245,3 +256,22 @@ class GoogleAuthenticationSignup(GoogleAuthenticationLogin):
         except User.DoesNotExist:
             return value
         raise serializers.ValidationError(AuthConstantsMessages.USER_ALREADY_EXIST)
+
+
+class RefreshSerializer(TokenRefreshSerializer):
+    """Token Refresh Serializer, Rotated Tokens Blacklisted in Redis"""
+
+    token_class = BlacklistRefreshToken
+
+
+class LogoutSerializer(serializers.Serializer):
+    """Blacklist Refresh Token"""
+
+    refresh = serializers.CharField()
+
+    def validate_refresh(self, value):
+        try:
+            BlacklistRefreshToken(value).blacklist()
+        except TokenError as err:
+            raise serializers.ValidationError(err.args[0])
+        return value
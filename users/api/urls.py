@@ -10,6 +10,8 @@ from users.api.api import (
     ForgotPasswordView,
     GoogleLoginView,
     GoogleSignupView,
+    RefreshView,
+    LogoutView,
 )
 from django.urls import path, include
 from rest_framework.routers import SimpleRouter
@@ -21,6 +23,8 @@ router.register("register", RegistrationApiView, basename="register")
 urlpatterns = [
     path("", include(router.urls)),
     path("login/", LoginApiView.as_view(), name="login"),
+    path("token/refresh/", RefreshView.as_view(), name="token-refresh"),
+    path("logout/", LogoutView.as_view(), name="logout"),
     path("profile/", UserProfileView.as_view(), name="profile"),
     path("update-email/", EmailUpdateView.as_view(), name="update-email"),
     path("verify-email/", EmailVerifyView.as_view(), name="verify-email"),
@@ -0,0 +1,91 @@
+"""JWT Authentication Resolving Users From Cache Instead of a Query Per Request"""
+
+from dataclasses import dataclass
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from users.constants import AuthCacheConstants
+from utils.constants import MetricsConstants
+from utils.metrics import record_cache
+
+
+def invalidate_cached_user(user, deleted: bool = False):
+    """Drop Cached Copies of User, Called Once User Changes Are Committed"""
+    cache.add(AuthCacheConstants.VERSION_KEY.format(id=user.pk), 0, None)
+    cache.incr(AuthCacheConstants.VERSION_KEY.format(id=user.pk))
+    if user.is_active and not deleted:
+        cache.delete(AuthCacheConstants.INACTIVE_KEY.format(id=user.pk))
+    else:
+        cache.set(AuthCacheConstants.INACTIVE_KEY.format(id=user.pk), True, None)
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Authenticated User as Cached, No Credentials or Profile Fields"""
+
+    id: int
+    email: str
+    is_active: bool
+    is_staff: bool
+    is_verified: bool
+    is_authenticated = True
+    is_anonymous = False
+
+    @property
+    def pk(self):
+        return self.id
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.email, user.is_active, user.is_staff, user.is_verified)
+
+
+def token_user_id(validated_token):
+    """User ID Claim of Token"""
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication With CachedUser Cached Per (User ID, Version)"""
+
+    def get_user(self, validated_token):
+        user_id = token_user_id(validated_token)
+        # Saves Bump Version, so Loads Racing a Save Cache Under a Dead Key.
+        version = cache.get(AuthCacheConstants.VERSION_KEY.format(id=user_id), 0)
+        key = AuthCacheConstants.USER_KEY.format(id=user_id, version=version)
+        user = cache.get(key)
+        record_cache(MetricsConstants.JWT_USER_CACHE, user is not None)
+        if user is None:
+            user = CachedUser.from_user(super().get_user(validated_token))
+            cache.set(key, user, AuthCacheConstants.USER_TIMEOUT)
+        return user
+
+
+class TokenUserJWTAuthentication(JWTAuthentication):
+    """JWT Authentication Without Loading User, for Views Needing Only request.user.id"""
+
+    def get_user(self, validated_token):
+        user_id = token_user_id(validated_token)
+        key = AuthCacheConstants.INACTIVE_KEY.format(id=user_id)
+        # Deactivated Users Are Flagged in Cache, Queried Once on a Miss.
+        inactive = cache.get(key)
+        if inactive is None:
+            inactive = not (
+                get_user_model()
+                .objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values_list("is_active", flat=True)
+                .first()
+            )
+            # Added, a Racing Invalidation is Never Overwritten.
+            cache.add(key, inactive, AuthCacheConstants.USER_TIMEOUT)
+        if inactive:
+            raise AuthenticationFailed(
+                AuthCacheConstants.USER_INACTIVE, code="user_inactive"
+            )
+        return api_settings.TOKEN_USER_CLASS(validated_token)
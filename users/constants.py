@@ -56,6 +56,7 @@ class AuthConstantsMessages:
     PASSWORD_DOES_NOT_MATCH = _("Password does not match")
     NEW_PASSWORD_SAME_AS_OLD_PASSWORD = _("New password cannot be same as old password")
     INVALID_PASSWORD = _("Invalid password")
+    OTP_ATTEMPTS_EXCEEDED = _("Too many invalid attempts, please generate a new OTP.")
 
 
 class ResponseMessages:
@@ -68,6 +69,7 @@ class ResponseMessages:
     PASSWORD_RESET_OTP_GENERATED = _("Password reset OTP generated successfully")
     PASSWORD_RESET_DONE = _("Password reset successfully")
     USER_NOT_FOUND = _("User not found")
+    LOGGED_OUT = _("Logged out successfully")
 
 
 class VerboseNames:
@@ -79,3 +81,59 @@ class VerboseNames:
     AGE = _("Age")
     ADDRESS = _("Address")
     GOOGLE_ID = _("Google ID")
+    THUMBNAILS = _("Thumbnails")
+
+
+class AuthCacheConstants:
+    """JWT User Resolution Cache Keys"""
+
+    VERSION_KEY = "auth:user:version:{id}"
+    USER_KEY = "auth:user:{id}:{version}"
+    INACTIVE_KEY = "auth:user:inactive:{id}"
+    USER_TIMEOUT = 300
+    USER_INACTIVE = _("User is inactive")
+
+
+class OtpConstants:
+    """Redis OTP Store Keys, Lifetimes & Verification Results"""
+
+    KEY = "otp:{purpose}:{user_id}"
+    TTL = 60 * 10
+    # Expired OTPs Kept This Long to Report Expiry Instead of Not Found
+    EXPIRED_GRACE = 60 * 10
+    MAX_ATTEMPTS = 5
+    VALID = "valid"
+    INVALID = "invalid"
+    EXPIRED = "expired"
+    NOT_FOUND = "not_found"
+    LOCKED = "locked"
+
+
+class TokenBlacklistConstants:
+    """Refresh Token Blacklist Keys & Bloom Filter Size"""
+
+    KEY = "jwt:blacklist:{jti}"
+    # Bloom Bitmap Per Refresh Token Lifetime, Older Bitmaps Only Hold Expired Tokens
+    BLOOM_KEY = "jwt:blacklist:bloom:{period}"
+    BLOOM_BITS = 2**20
+    BLOOM_HASHES = 7
+    # Seconds Between Bloom Filter Syncs From Redis
+    SYNC_INTERVAL = 30
+    BLACKLISTED = _("Token is blacklisted")
+
+
+class ThumbnailConstants:
+    """Profile Image Thumbnail Sizes & Encodings"""
+
+    # Square Edge in Pixels Per Thumbnail Name
+    SIZES = {"small": 64, "medium": 160, "large": 320}
+    # (Extension, Pillow Format) Pairs, Each Size Stored in Every Format
+    FORMATS = (("webp", "WEBP"), ("jpeg", "JPEG"))
+    QUALITY = 80
+    PATH = "users/{id}/thumbnails/{name}.{ext}"
+    SOURCE = "source"
+    PREVIEW = ("large", "webp")
+    GENERATED = "Thumbnails Generated for User - {id}"
+    CLEARED = "Thumbnails Cleared for User - {id}"
+    UNCHANGED = "Thumbnails Already Current for User - {id}"
+    REJECTED = "Profile Image of User Not a Readable Image - {id}"
@@ -3,12 +3,14 @@ from django.db import models
 from django.urls import reverse_lazy
 from users.constants import (
     ModelFields,
+    ThumbnailConstants,
     THUMBNAIL_PREVIEW_TAG,
     THUMBNAIL_PREVIEW_HTML,
 )
 from django.utils.html import format_html
 from django_extensions.db.models import TimeStampedModel
 from users.constants import VerboseNames
+from users.thumbnails import thumbnail_urls
 
 
 def _upload_to(self, filename):
@@ -46,12 +48,18 @@ class User(AbstractUser):
         unique=True,
         max_length=255,
     )
+    # Thumbnail Paths Keyed by Name & Extension, Filled by generate_thumbnails Task
+    thumbnails = models.JSONField(
+        verbose_name=VerboseNames.THUMBNAILS, default=dict, blank=True, editable=False
+    )
 
     @property
     def profile_image(self):
-        """Profile Image Viewer"""
+        """Profile Image Viewer, Thumbnail Served Once Generated"""
         if self.image:
-            return format_html(THUMBNAIL_PREVIEW_TAG.format(img=self.image.url))
+            name, ext = ThumbnailConstants.PREVIEW
+            url = thumbnail_urls(self.thumbnails).get(name, {}).get(ext)
+            return format_html(THUMBNAIL_PREVIEW_TAG.format(img=url or self.image.url))
         return format_html(THUMBNAIL_PREVIEW_HTML)
 
     def __str__(self):
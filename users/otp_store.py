@@ -0,0 +1,86 @@
+"""Hashed One-Time Passwords in Redis With Native TTL & Atomic Verification"""
+
+import hashlib
+import hmac
+import secrets
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.utils.timezone import now
+from utils.redis_client import get_redis
+from users.constants import OtpConstants
+
+# Consumes OTP on Match, Counts Misses & Locks OTP After Too Many, in One Step.
+VERIFY_SCRIPT = """
+local otp = redis.call("HMGET", KEYS[1], "hash", "expiry", "attempts")
+if not otp[1] then
+    return ARGV[4]
+end
+if tonumber(otp[2]) < tonumber(ARGV[2]) then
+    return ARGV[5]
+end
+if otp[1] == ARGV[1] then
+    redis.call("DEL", KEYS[1])
+    return ARGV[6]
+end
+if tonumber(otp[3]) + 1 >= tonumber(ARGV[3]) then
+    redis.call("DEL", KEYS[1])
+    return ARGV[7]
+end
+redis.call("HINCRBY", KEYS[1], "attempts", 1)
+return ARGV[8]
+"""
+
+
+class OtpStore:
+    """Issue & Verify OTPs Per (Purpose, User), No Database Writes"""
+
+    @staticmethod
+    def _key(purpose: str, user_id) -> str:
+        return OtpConstants.KEY.format(purpose=purpose, user_id=user_id)
+
+    @staticmethod
+    def _hash(purpose: str, user_id, otp) -> str:
+        """Keyed Hash, Stored OTPs Are Useless Without SECRET_KEY"""
+        return hmac.new(
+            settings.SECRET_KEY.encode(),
+            f"{purpose}:{user_id}:{otp}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+
+    @classmethod
+    def issue(cls, purpose: str, user_id) -> tuple[int, datetime]:
+        """Create OTP Replacing Any Previous One, Returns (OTP, Expiry)"""
+        otp = 100000 + secrets.randbelow(900000)
+        expiry = now() + timedelta(seconds=OtpConstants.TTL)
+        key = cls._key(purpose, user_id)
+        pipe = get_redis().pipeline()
+        pipe.delete(key)
+        pipe.hset(
+            key,
+            mapping={
+                "hash": cls._hash(purpose, user_id, otp),
+                "expiry": int(expiry.timestamp()),
+                "attempts": 0,
+            },
+        )
+        pipe.expire(key, OtpConstants.TTL + OtpConstants.EXPIRED_GRACE)
+        pipe.execute()
+        return otp, expiry
+
+    @classmethod
+    def verify(cls, purpose: str, user_id, otp) -> str:
+        """Check & Consume OTP, Returns One of OtpConstants Results"""
+        result = get_redis().eval(
+            VERIFY_SCRIPT,
+            1,
+            cls._key(purpose, user_id),
+            cls._hash(purpose, user_id, otp),
+            int(now().timestamp()),
+            OtpConstants.MAX_ATTEMPTS,
+            OtpConstants.NOT_FOUND,
+            OtpConstants.EXPIRED,
+            OtpConstants.VALID,
+            OtpConstants.LOCKED,
+            OtpConstants.INVALID,
+        )
+        return result.decode() if isinstance(result, bytes) else result
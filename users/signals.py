@@ -1,8 +1,13 @@
 """Signals to handle User model related tasks"""
 
 from utils.utils import get_model
-from users.tasks import registration_mail
-from django.db.models.signals import post_save
+from utils.constants import EmailTemplates
+from quickpnr.tasks import enqueue_email
+from users.constants import ThumbnailConstants
+from users.tasks import update_thumbnails
+from users.authentication import invalidate_cached_user
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 User = get_model("users", "User")
@@ -10,8 +15,32 @@ User = get_model("users", "User")
 
 @receiver(post_save, sender=User)
 def send_registration_mail(sender, instance, created, **kwargs):
-    """Send Registration Mail When User Created"""
+    """Send Registration Mail When User Created, Through Email Outbox"""
     if created:
-        registration_mail.delay(instance.id)
+        enqueue_email(EmailTemplates.REGISTRED_SUCCESSFULLY, instance.id)
         return True
     return False
+
+
+@receiver(post_save, sender=User)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    """Refresh Cached JWT User Once Password, Email or Active State Change Commits"""
+    transaction.on_commit(lambda: invalidate_cached_user(instance))
+    return True
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    """Reject Tokens of Deleted User"""
+    transaction.on_commit(lambda: invalidate_cached_user(instance, deleted=True))
+    return True
+
+
+@receiver(post_save, sender=User)
+def queue_thumbnails(sender, instance, **kwargs):
+    """Regenerate Thumbnails Once a New or Removed Profile Image Commits"""
+    source = instance.thumbnails.get(ThumbnailConstants.SOURCE)
+    if (instance.image.name or None) == source:
+        return False
+    transaction.on_commit(lambda: update_thumbnails.delay(instance.id))
+    return True
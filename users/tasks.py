@@ -1,4 +1,9 @@
 from celery import shared_task
+from PIL import Image, UnidentifiedImageError
+from django.core.files.storage import default_storage
+from users.authentication import invalidate_cached_user
+from users.constants import ThumbnailConstants
+from users.thumbnails import generate_thumbnails, thumbnail_paths
 from utils.email_service import EmailService
 from utils.utils import get_model
 
@@ -29,3 +34,30 @@ def reset_password_otp(id: int):
 def reset_password_done(id: int):
     """Sends a password reset done email to the specified user."""
     return EmailService().reset_password_done(User.objects.get(id=id))
+
+
+@shared_task
+def update_thumbnails(id: int):
+    """Generate Thumbnails of User's Current Image, Drop Those of Replaced Image"""
+    user = User.objects.get(id=id)
+    previous = user.thumbnails
+    if not user.image:
+        thumbnails, message = {}, ThumbnailConstants.CLEARED
+    elif previous.get(ThumbnailConstants.SOURCE) == user.image.name:
+        return ThumbnailConstants.UNCHANGED.format(id=id)
+    else:
+        try:
+            thumbnails = generate_thumbnails(user)
+            message = ThumbnailConstants.GENERATED
+        except (UnidentifiedImageError, Image.DecompressionBombError):
+            # Source Still Recorded, so Saves Don't Queue it Again.
+            thumbnails = {ThumbnailConstants.SOURCE: user.image.name}
+            message = ThumbnailConstants.REJECTED
+    # Files of Replaced or Removed Image.
+    for path in thumbnail_paths(previous) - thumbnail_paths(thumbnails):
+        default_storage.delete(path)
+    # update() Skips post_save, Which Would Queue This Task Again.
+    User.objects.filter(id=id).update(thumbnails=thumbnails)
+    user.thumbnails = thumbnails
+    invalidate_cached_user(user)
+    return message.format(id=id)
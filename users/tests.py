@@ -1 +1,437 @@
-# Create your tests here.
+"""Tests of User Endpoints & Authentication"""
+
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from types import SimpleNamespace
+from unittest import mock
+import fakeredis
+from PIL import Image
+from redis.exceptions import RedisError
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from users.authentication import (
+    CachedJWTAuthentication,
+    CachedUser,
+    TokenUserJWTAuthentication,
+)
+from users.constants import OtpConstants, ThumbnailConstants
+from users.otp_store import OtpStore
+from users.tasks import update_thumbnails
+from users.token_blacklist import BloomFilter, TokenBlacklist
+from utils.throttling import UserRateThrottle
+from utils.utils import get_model
+
+User = get_model("users", "User")
+
+PASSWORD = "Pa55word!xyz"
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, QUERY_BUDGET_MODE="raise")
+class UserQueryTests(TestCase):
+    """Queries of User Endpoints, Authentication Forced so Only Views Are Counted"""
+
+    def setUp(self):
+        patcher = mock.patch(
+            "utils.throttling.WeightedRateThrottle.allow_request", return_value=True
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(
+            username="rider",
+            email="rider@example.com",
+            password=PASSWORD,
+            google_id="google-rider",
+        )
+        self.client = APIClient()
+        # Authenticated as CachedJWTAuthentication Resolves Users.
+        self.client.force_authenticate(user=CachedUser.from_user(self.user))
+
+    @mock.patch("users.api.serializers.email_validation")
+    def test_register(self, email_validation):
+        data = {
+            "username": "newrider",
+            "email": "newrider@example.com",
+            "password": PASSWORD,
+            "confirm_password": PASSWORD,
+            "first_name": "New",
+            "last_name": "Rider",
+        }
+        # Savepoint & Release of the Atomic Create Included.
+        with self.assertNumQueries(6):
+            response = self.client.post(reverse("users:register-list"), data)
+        self.assertEqual(response.status_code, 201)
+
+    def test_login(self):
+        self.client.force_authenticate(user=None)
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse("users:login"), {"username": "rider", "password": PASSWORD}
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("users:profile"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_update(self):
+        with self.assertNumQueries(2):
+            response = self.client.patch(
+                reverse("users:profile"), {"first_name": "Rail"}
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_email_update(self):
+        with self.assertNumQueries(4):
+            response = self.client.patch(
+                reverse("users:update-email"), {"email": "rail@example.com"}
+            )
+        self.assertEqual(response.status_code, 200)
+
+    @mock.patch(
+        "users.api.serializers.OtpStore.verify", return_value=OtpConstants.VALID
+    )
+    def test_email_verify(self, verify):
+        with self.assertNumQueries(2):
+            response = self.client.patch(reverse("users:verify-email"), {"otp": 123456})
+        self.assertEqual(response.status_code, 200)
+
+    def test_change_password(self):
+        data = {
+            "old_password": PASSWORD,
+            "new_password": "N3wPa55word!xyz",
+            "confirm_password": "N3wPa55word!xyz",
+        }
+        with self.assertNumQueries(2):
+            response = self.client.patch(reverse("users:change-password"), data)
+        self.assertEqual(response.status_code, 200)
+
+    @mock.patch("users.api.api.reset_password_otp")
+    def test_forgot_password(self, reset_password_otp):
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                reverse("users:forgot-password"), {"email": "rider@example.com"}
+            )
+        self.assertEqual(response.status_code, 200)
+        reset_password_otp.delay.assert_called_once_with(self.user.id)
+
+    @mock.patch("users.api.api.reset_password_done")
+    @mock.patch(
+        "users.api.serializers.OtpStore.verify", return_value=OtpConstants.VALID
+    )
+    def test_reset_password(self, verify, reset_password_done):
+        data = {
+            "email": "rider@example.com",
+            "otp": 123456,
+            "new_password": "N3wPa55word!xyz",
+            "confirm_password": "N3wPa55word!xyz",
+        }
+        with self.assertNumQueries(3):
+            response = self.client.patch(reverse("users:forgot-password"), data)
+        self.assertEqual(response.status_code, 200)
+
+    def test_google_login(self):
+        self.client.force_authenticate(user=None)
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse("users:auth-google-login"),
+                {"google_id": "google-rider", "email": "rider@example.com"},
+            )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class JWTAuthenticationTests(TestCase):
+    """Users Resolved From Cache, Credentials Never Cached"""
+
+    def setUp(self):
+        # Local Memory Cache Outlives Tests, User IDs Are Reused.
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="rider", email="rider@example.com", password=PASSWORD
+        )
+        self.token = AccessToken.for_user(self.user)
+
+    def test_cached_user_holds_no_credentials(self):
+        authentication = CachedJWTAuthentication()
+        with self.assertNumQueries(1):
+            user = authentication.get_user(self.token)
+        self.assertEqual(user, CachedUser.from_user(self.user))
+        self.assertFalse(hasattr(user, "password"))
+        # Served From Cache Until User is Saved.
+        with self.assertNumQueries(0):
+            self.assertEqual(authentication.get_user(self.token), user)
+
+    def test_token_user_active_flag_queried_once(self):
+        authentication = TokenUserJWTAuthentication()
+        with self.assertNumQueries(1):
+            authentication.get_user(self.token)
+        with self.assertNumQueries(0):
+            authentication.get_user(self.token)
+
+    def test_token_user_inactive_rejected(self):
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            TokenUserJWTAuthentication().get_user(self.token)
+
+
+class RedisTestCase(TestCase):
+    """Redis Replaced by an In-Process Fake Running the Same Lua Scripts"""
+
+    redis_targets = ()
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        for target in self.redis_targets:
+            patcher = mock.patch(target, return_value=self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class OtpStoreTests(RedisTestCase):
+    """OTPs Verify Once, Lock After Misses & Expire"""
+
+    redis_targets = ("users.otp_store.get_redis",)
+    purpose = "verify_email"
+
+    def test_verify_consumes_otp(self):
+        otp, _ = OtpStore.issue(self.purpose, 1)
+        self.assertEqual(OtpStore.verify(self.purpose, 1, otp), OtpConstants.VALID)
+        self.assertEqual(OtpStore.verify(self.purpose, 1, otp), OtpConstants.NOT_FOUND)
+
+    def test_otp_bound_to_purpose_and_user(self):
+        otp, _ = OtpStore.issue(self.purpose, 1)
+        self.assertEqual(OtpStore.verify(self.purpose, 2, otp), OtpConstants.NOT_FOUND)
+        self.assertEqual(
+            OtpStore.verify("password_reset", 1, otp), OtpConstants.NOT_FOUND
+        )
+
+    def test_misses_lock_otp(self):
+        otp, _ = OtpStore.issue(self.purpose, 1)
+        wrong = otp % 999999 + 1
+        for _ in range(OtpConstants.MAX_ATTEMPTS - 1):
+            self.assertEqual(
+                OtpStore.verify(self.purpose, 1, wrong), OtpConstants.INVALID
+            )
+        self.assertEqual(OtpStore.verify(self.purpose, 1, wrong), OtpConstants.LOCKED)
+        # Locked OTP is Gone, Even the Right One is Refused.
+        self.assertEqual(OtpStore.verify(self.purpose, 1, otp), OtpConstants.NOT_FOUND)
+
+    def test_reissue_replaces_otp(self):
+        first, _ = OtpStore.issue(self.purpose, 1)
+        second, _ = OtpStore.issue(self.purpose, 1)
+        if first != second:
+            self.assertEqual(
+                OtpStore.verify(self.purpose, 1, first), OtpConstants.INVALID
+            )
+        self.assertEqual(OtpStore.verify(self.purpose, 1, second), OtpConstants.VALID)
+
+    def test_expired_otp(self):
+        otp, expiry = OtpStore.issue(self.purpose, 1)
+        with mock.patch(
+            "users.otp_store.now", return_value=expiry + timedelta(seconds=1)
+        ):
+            self.assertEqual(
+                OtpStore.verify(self.purpose, 1, otp), OtpConstants.EXPIRED
+            )
+
+
+class RefreshTokenBlacklistTests(RedisTestCase):
+    """Rotated & Logged Out Refresh Tokens Are Refused"""
+
+    redis_targets = (
+        "users.token_blacklist.get_redis",
+        "utils.throttling.get_redis",
+    )
+
+    def setUp(self):
+        super().setUp()
+        # Bloom Filter is Per Process, Start Each Test Empty & Unsynced.
+        for name, value in (("_filter", BloomFilter()), ("_synced_at", float("-inf"))):
+            patcher = mock.patch.object(TokenBlacklist, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        User.objects.create_user(
+            username="rider", email="rider@example.com", password=PASSWORD
+        )
+        self.refresh = self.client.post(
+            reverse("users:login"), {"username": "rider", "password": PASSWORD}
+        ).data["refresh"]
+
+    def refresh_token(self, token: str):
+        return self.client.post(reverse("users:token-refresh"), {"refresh": token})
+
+    def test_rotated_token_reuse_refused(self):
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], self.refresh)
+        self.assertEqual(self.refresh_token(self.refresh).status_code, 401)
+        # Token Issued by Rotation Still Works.
+        self.assertEqual(self.refresh_token(response.data["refresh"]).status_code, 200)
+
+    def test_reuse_refused_by_other_process(self):
+        self.assertEqual(self.refresh_token(self.refresh).status_code, 200)
+        # Fresh Process, Bloom Filter Rebuilt From Redis.
+        TokenBlacklist._filter = BloomFilter()
+        TokenBlacklist._synced_at = float("-inf")
+        self.assertEqual(self.refresh_token(self.refresh).status_code, 401)
+
+    def test_logged_out_token_refused(self):
+        response = self.client.post(reverse("users:logout"), {"refresh": self.refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh_token(self.refresh).status_code, 401)
+        # Second Logout With the Same Token Fails.
+        response = self.client.post(reverse("users:logout"), {"refresh": self.refresh})
+        self.assertEqual(response.status_code, 400)
+
+
+class TenPerMinuteThrottle(UserRateThrottle):
+    rate = "10/min"
+
+
+class ThrottleTests(RedisTestCase):
+    """Sliding Window Counts Cost Units & Fails Open Without Redis"""
+
+    redis_targets = ("utils.throttling.get_redis",)
+    view = SimpleNamespace(throttle_costs={"POST": 4})
+
+    def setUp(self):
+        super().setUp()
+        clock = mock.patch("utils.throttling.time")
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+        # Half Way Through a Window.
+        self.at(6030)
+
+    def at(self, timestamp: float):
+        self.clock.time.return_value = timestamp
+
+    def check(self, method: str = "POST"):
+        request = SimpleNamespace(
+            method=method, user=SimpleNamespace(id=1, is_authenticated=True)
+        )
+        throttle = TenPerMinuteThrottle()
+        return throttle.allow_request(request, self.view), throttle, request
+
+    def test_requests_charged_by_cost(self):
+        self.assertTrue(self.check()[0])
+        allowed, _, request = self.check()
+        self.assertTrue(allowed)
+        self.assertEqual(request.throttle_quota.remaining, 2)
+        # Reads Cost 1, Fit in the Remaining Quota Where a Scrape Does Not.
+        allowed, throttle, _ = self.check()
+        self.assertFalse(allowed)
+        self.assertEqual(throttle.wait(), 30)
+        self.assertTrue(self.check("GET")[0])
+
+    def test_refused_requests_not_counted(self):
+        for _ in range(4):
+            self.check()
+        self.assertTrue(self.check("GET")[0])
+        self.assertTrue(self.check("GET")[0])
+        self.assertFalse(self.check("GET")[0])
+
+    def test_previous_window_weighted_by_overlap(self):
+        for _ in range(2):
+            self.check()
+        # Next Window, Half of Previous Window's 8 Units Still Count.
+        self.at(6090)
+        allowed, _, request = self.check()
+        self.assertTrue(allowed)
+        self.assertEqual(request.throttle_quota.remaining, 2)
+        allowed, throttle, _ = self.check()
+        self.assertFalse(allowed)
+        # Previous Window Drains 8 Units a Minute, 2 Excess Units Gone in 15s.
+        self.assertEqual(throttle.wait(), 15)
+        # Previous Window Fully Out of the Sliding Window.
+        self.at(6120)
+        self.assertTrue(self.check()[0])
+
+    def test_fails_open_without_redis(self):
+        self.redis.eval = mock.Mock(side_effect=RedisError("down"))
+        with self.assertLogs("utils.throttling", "WARNING") as logs:
+            for _ in range(5):
+                self.assertTrue(self.check()[0])
+        self.assertIn("Throttle check failed", logs.output[0])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ThumbnailTests(TestCase):
+    """Thumbnails Sized & Encoded per ThumbnailConstants, Non-Images Rejected"""
+
+    def setUp(self):
+        settings = override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user(
+            username="rider", email="rider@example.com", password=PASSWORD
+        )
+
+    @staticmethod
+    def upload(content: bytes, name: str = "avatar.png"):
+        return SimpleUploadedFile(name, content, content_type="image/png")
+
+    @staticmethod
+    def png(size=(400, 300)) -> bytes:
+        buffer = BytesIO()
+        Image.new("RGBA", size, (200, 30, 30, 128)).save(buffer, "PNG")
+        return buffer.getvalue()
+
+    def test_thumbnails_generated(self):
+        self.user.image = self.upload(self.png())
+        self.user.save()
+        self.assertEqual(
+            update_thumbnails(self.user.id),
+            ThumbnailConstants.GENERATED.format(id=self.user.id),
+        )
+        self.user.refresh_from_db()
+        for name, size in ThumbnailConstants.SIZES.items():
+            for ext, image_format in ThumbnailConstants.FORMATS:
+                with self.subTest(name, ext=ext):
+                    path = self.user.thumbnails[name][ext]
+                    with default_storage.open(path) as file, Image.open(file) as image:
+                        self.assertEqual(image.size, (size, size))
+                        self.assertEqual(image.format, image_format)
+
+    def test_non_image_upload_rejected(self):
+        client = APIClient()
+        client.force_authenticate(user=CachedUser.from_user(self.user))
+        with mock.patch(
+            "utils.throttling.WeightedRateThrottle.allow_request", return_value=True
+        ):
+            response = client.patch(
+                reverse("users:profile"),
+                {"image": self.upload(b"not an image")},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("image", response.data)
+
+    def test_non_image_file_rejected_by_task(self):
+        # Stored Without Validation, e.g. Written Straight to Storage.
+        self.user.image.save("avatar.png", ContentFile(b"not an image"), save=False)
+        User.objects.filter(id=self.user.id).update(image=self.user.image.name)
+        self.assertEqual(
+            update_thumbnails(self.user.id),
+            ThumbnailConstants.REJECTED.format(id=self.user.id),
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(
+            self.user.thumbnails, {ThumbnailConstants.SOURCE: self.user.image.name}
+        )
+        self.assertFalse(
+            default_storage.exists(
+                ThumbnailConstants.PATH.format(
+                    id=self.user.id, name="small_64", ext="webp"
+                )
+            )
+        )
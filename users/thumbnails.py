@@ -0,0 +1,59 @@
+"""Profile Image Thumbnails, Re-Encoded Without Metadata"""
+
+from io import BytesIO
+from PIL import Image, ImageOps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from users.constants import ThumbnailConstants
+
+
+def encode(image: Image.Image, image_format: str) -> bytes:
+    """Encode Image, Only Pixels Are Written so EXIF & Other Metadata Are Dropped"""
+    if image_format == "JPEG" and image.mode != "RGB":
+        # JPEG Has no Alpha, Flatten on White.
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=ThumbnailConstants.QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def thumbnail_paths(thumbnails: dict) -> set:
+    """Stored Paths of All Thumbnails"""
+    return {
+        path
+        for name, formats in thumbnails.items()
+        if name != ThumbnailConstants.SOURCE
+        for path in formats.values()
+    }
+
+
+def generate_thumbnails(user) -> dict:
+    """Store Fixed Size Thumbnails of User Image, Returns Their Paths"""
+    with user.image.open("rb") as file:
+        source = ImageOps.exif_transpose(Image.open(file))
+        source = source.convert("RGBA" if "A" in source.getbands() else "RGB")
+    thumbnails = {ThumbnailConstants.SOURCE: user.image.name}
+    for name, size in ThumbnailConstants.SIZES.items():
+        image = ImageOps.fit(source, (size, size), Image.Resampling.LANCZOS)
+        thumbnails[name] = {}
+        for ext, image_format in ThumbnailConstants.FORMATS:
+            path = ThumbnailConstants.PATH.format(
+                id=user.id, name=f"{name}_{size}", ext=ext
+            )
+            # Storage Renames Instead of Overwriting.
+            default_storage.delete(path)
+            thumbnails[name][ext] = default_storage.save(
+                path, ContentFile(encode(image, image_format))
+            )
+    return thumbnails
+
+
+def thumbnail_urls(thumbnails: dict) -> dict:
+    """Thumbnail URLs Keyed by Name & Extension"""
+    return {
+        name: {ext: default_storage.url(path) for ext, path in formats.items()}
+        for name, formats in thumbnails.items()
+        if name != ThumbnailConstants.SOURCE
+    }
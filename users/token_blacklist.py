@@ -0,0 +1,125 @@
+"""Refresh Token Blacklist in Redis Behind an In-Process Bloom Filter"""
+
+import hashlib
+import time
+from threading import Lock
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from utils.redis_client import get_redis
+from users.constants import TokenBlacklistConstants
+
+
+class BloomFilter:
+    """Bloom Filter Over a Bitmap Laid Out Like Redis SETBIT Offsets"""
+
+    def __init__(
+        self,
+        size: int = TokenBlacklistConstants.BLOOM_BITS,
+        hashes: int = TokenBlacklistConstants.BLOOM_HASHES,
+    ):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray(size // 8)
+
+    def positions(self, value: str) -> list[int]:
+        """Bit Offsets of Value, Double Hashing One Digest"""
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8]), int.from_bytes(digest[8:])
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, positions):
+        for position in positions:
+            self.bits[position >> 3] |= 0x80 >> (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (0x80 >> (position & 7))
+            for position in self.positions(value)
+        )
+
+    def load(self, *bitmaps):
+        """Merge Redis Bitmaps, Missing Trailing Bytes Are Zero"""
+        for bitmap in bitmaps:
+            for index, byte in enumerate((bitmap or b"")[: len(self.bits)]):
+                self.bits[index] |= byte
+
+
+class TokenBlacklist:
+    """
+    Blacklisted JTIs Expire With Their Tokens, Lookups Go to Redis Only When
+    the Bloom Filter Matches, Filter Synced Every SYNC_INTERVAL Seconds
+    """
+
+    _filter = BloomFilter()
+    _synced_at = float("-inf")
+    _lock = Lock()
+
+    @staticmethod
+    def _bloom_key(timestamp: float) -> str:
+        period = int(timestamp // api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+        return TokenBlacklistConstants.BLOOM_KEY.format(period=period)
+
+    @classmethod
+    def sync(cls):
+        """Rebuild Bloom Filter From Current & Previous Period Bitmaps"""
+        now = time.time()
+        lifetime = api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+        bloom = BloomFilter()
+        bloom.load(
+            *get_redis().mget(cls._bloom_key(now), cls._bloom_key(now - lifetime))
+        )
+        cls._filter = bloom
+        cls._synced_at = time.monotonic()
+
+    @classmethod
+    def contains(cls, jti: str) -> bool:
+        """Check if JTI is Blacklisted"""
+        if time.monotonic() - cls._synced_at > TokenBlacklistConstants.SYNC_INTERVAL:
+            with cls._lock:
+                if (
+                    time.monotonic() - cls._synced_at
+                    > TokenBlacklistConstants.SYNC_INTERVAL
+                ):
+                    cls.sync()
+        if jti not in cls._filter:
+            return False
+        return bool(get_redis().exists(TokenBlacklistConstants.KEY.format(jti=jti)))
+
+    @classmethod
+    def add(cls, jti: str, exp: int) -> bool:
+        """Blacklist JTI Until Token Expiry, False if Already Blacklisted"""
+        ttl = int(exp - time.time())
+        if ttl <= 0:
+            return True
+        positions = cls._filter.positions(jti)
+        bloom_key = cls._bloom_key(time.time())
+        pipe = get_redis().pipeline()
+        pipe.set(TokenBlacklistConstants.KEY.format(jti=jti), 1, nx=True, ex=ttl)
+        for position in positions:
+            pipe.setbit(bloom_key, position, 1)
+        pipe.expire(
+            bloom_key, int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds() * 2)
+        )
+        added = pipe.execute()[0]
+        cls._filter.add(positions)
+        return bool(added)
+
+
+class BlacklistRefreshToken(RefreshToken):
+    """Refresh Token Checked Against & Blacklisted in TokenBlacklist"""
+
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        super().verify(*args, **kwargs)
+
+    def check_blacklist(self):
+        if TokenBlacklist.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(TokenBlacklistConstants.BLACKLISTED)
+
+    def blacklist(self):
+        """Blacklist Token, Fails if Another Request Blacklisted it First"""
+        if not TokenBlacklist.add(
+            self.payload[api_settings.JTI_CLAIM], self.payload["exp"]
+        ):
+            raise TokenError(TokenBlacklistConstants.BLACKLISTED)
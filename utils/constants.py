@@ -24,9 +24,21 @@ class Settings:
     STATIC_FILES_DIRS = "templates/static/"
     TEMPLATES_URLS = "templates/"
     DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
-    REDIS_URL = env.get("REDIS_URL")
+    REDIS_URL = env.get("REDIS_URL", "redis://localhost:6379/1")
     MEDIA_URL = "media/"
     MEDIA_ROOT = "media/"
+    # Files Never Served Directly, Only Through Staff Views
+    PRIVATE_ROOT = "private/"
+    USE_ORJSON = env.get("USE_ORJSON", "True") == "True"
+    ASYNC_PNR_VIEWS = env.get("ASYNC_PNR_VIEWS", "False") == "True"
+    # Seconds PNR Update Mails Are Coalesced Per User, 0 Mails Each Update
+    PNR_DIGEST_WINDOW = int(env.get("PNR_DIGEST_WINDOW", 0))
+    # Query Budget Violations: off, log or raise
+    QUERY_BUDGET_MODE = env.get("QUERY_BUDGET_MODE", "off")
+    # Scraper Class, utils.fake_scraper.FakePnrScrapping for Load Tests
+    PNR_SCRAPER_BACKEND = env.get(
+        "PNR_SCRAPER_BACKEND", "utils.scrapping_utils.PnrScrapping"
+    )
 
 
 # Email Configurations
@@ -40,6 +52,11 @@ class EmailConfig:
     PORT_587 = 587
     EMAIL_HOST_USER = env.get("EMAIL_HOST_USER")
     EMAIL_HOST_PASSWORD = env.get("EMAIL_HOST_PASSWORD")
+    # Pooled SMTP Connections Per Worker Process
+    SMTP_POOL_SIZE = int(env.get("SMTP_POOL_SIZE", 2))
+    SMTP_IDLE_TIMEOUT = int(env.get("SMTP_IDLE_TIMEOUT", 60))
+    SMTP_MESSAGES_PER_CONNECTION = int(env.get("SMTP_MESSAGES_PER_CONNECTION", 100))
+    SMTP_RECONNECT_RETRIES = int(env.get("SMTP_RECONNECT_RETRIES", 2))
 
 
 # Celery Configuration
@@ -48,6 +65,10 @@ class CeleryConfig:
     """Celery Configuration"""
 
     CELERY_BROKER_URL = "redis://localhost:6379/0"
+    SCRAPE_QUEUE = "scrape"
+    # Scrapes Allowed Per Minute, Part of it Reserved for User Requests
+    SCRAPE_BUDGET_PER_MINUTE = int(env.get("SCRAPE_BUDGET_PER_MINUTE", 30))
+    INTERACTIVE_SCRAPE_RESERVE = int(env.get("INTERACTIVE_SCRAPE_RESERVE", 10))
 
 
 # Urls Namespaces & Reverse
@@ -66,6 +87,7 @@ class EmailTemplates:
     PNR_DETAILS = "pnr_details"
     PASSWORD_RESET = "password_reset"
     PASSWORD_RESET_DONE = "password_reset_done"
+    PNR_DIGEST = "pnr_digest"
 
     EMAIL_TYPES = (
         (VERIFY_EMAIL, _("Verify Email")),
@@ -73,7 +95,179 @@ class EmailTemplates:
         (PNR_DETAILS, _("PNR Details")),
         (PASSWORD_RESET_DONE, _("Password Reset Done")),
         (PASSWORD_RESET, _("Password Reset")),
+        (PNR_DIGEST, _("PNR Digest")),
+    )
+
+
+# Email Template Cache
+# =====================================================
+class TemplateCacheConstants:
+    """Email Template Cache Keys"""
+
+    VERSION_KEY = "email:template:version"
+
+
+# Email Outbox
+# =====================================================
+class OutboxConstants:
+    """Transactional Email Outbox States & Dispatch Settings"""
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATES = (
+        (PENDING, _("Pending")),
+        (SENT, _("Sent")),
+        (FAILED, _("Failed")),
+    )
+    BATCH_SIZE = int(env.get("OUTBOX_BATCH_SIZE", 100))
+    # Batches Drained Per Task Before it Re-Queues Itself
+    MAX_BATCHES = 10
+    MAX_ATTEMPTS = 5
+    RETRY_BACKOFF = 60
+    # Seconds a Claimed Email is Hidden From Dispatchers, Retried if Sender Dies
+    CLAIM_TIMEOUT = 60 * 5
+    CLAIM_EXPIRED = "Sender Died Holding Claim on Last Attempt"
+    ERROR_LENGTH = 512
+    # Commits in This Many Seconds Share One Dispatch Task
+    DISPATCH_DELAY = 1
+    DISPATCH_LOCK_KEY = "email:outbox:dispatch"
+    DISPATCHED = "Email Outbox Dispatched: {sent} Sent, {failed} Failed"
+
+
+# API Throttling
+# =====================================================
+class ThrottleConstants:
+    """Weighted Sliding Window Throttle Rates, Costs & Headers"""
+
+    # Cost Units Allowed Per Window, DRF Rate Format
+    USER_RATE = env.get("THROTTLE_USER_RATE", "120/min")
+    IP_RATE = env.get("THROTTLE_IP_RATE", "300/min")
+    KEY = "throttle:{scope}:{ident}:{window}"
+    # Request Costs, Relative to a Cached Read
+    READ_COST = 1
+    # Password & OTP Checks, Also Slows Guessing
+    CREDENTIAL_COST = 5
+    MAIL_COST = 20
+    SCRAPE_COST = 30
+    # Bulk Lookup Read, Plus Each PNR it Queues a Background Scrape For
+    BULK_COST = 10
+    BULK_SCRAPE_COST = 5
+    LIMIT_HEADER = "X-RateLimit-Limit"
+    REMAINING_HEADER = "X-RateLimit-Remaining"
+    RESET_HEADER = "X-RateLimit-Reset"
+
+
+# Admin Changelists
+# =====================================================
+class AdminConstants:
+    """Admin Changelist Constants"""
+
+    # Estimated Counts Above This Are Shown Instead of Running COUNT(*)
+    EXACT_COUNT_LIMIT = 10000
+
+
+# Request Profiling
+# =====================================================
+class ProfilingConstants:
+    """Opt-In Per Request Profiling Constants"""
+
+    # Signed Staff Token, Generated by profiling_token Command
+    META_KEY = "HTTP_X_PROFILE"
+    SALT = "quickpnr.profiling"
+    TOKEN_MAX_AGE = 60 * 60 * 8
+    ID_HEADER = "X-Profile-Id"
+    SUMMARY_HEADER = "Server-Timing"
+    SUMMARY = 'total;dur={total:.1f}, sql;dur={sql:.1f};desc="{queries} queries"'
+    TOP_FUNCTIONS = 40
+    SORT = "cumulative"
+    # Dumps Kept in Private Storage, Downloaded Through Admin by Staff Only
+    STORAGE = "private"
+    UPLOAD_TO = "profiles/%Y/%m/"
+    FILENAME = "{method}-{id}-{token}.prof"
+    DOWNLOAD_URL = "quickpnr_requestprofile_download"
+    PATH_LENGTH = 255
+
+
+# Prometheus Metrics
+# =====================================================
+class MetricsConstants:
+    """Prometheus Metrics Names, Labels & Buckets"""
+
+    # Bearer Token Required by /metrics When Set, Otherwise Staff Sessions Only
+    TOKEN = env.get("METRICS_TOKEN")
+    NAMESPACE = "quickpnr"
+    LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    SCRAPE_BUCKETS = (1, 2.5, 5, 7.5, 10, 15, 20, 30, 45, 60, 90)
+    TASK_BUCKETS = (0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+    PUBLISHED_AT_HEADER = "published_at"
+    UNMATCHED_VIEW = "unmatched"
+    # Scrape Outcomes
+    SUCCESS = "success"
+    NOT_FOUND = "not_found"
+    CAPTCHA_FAILED = "captcha_failed"
+    ERROR = "error"
+    # Captcha & Cache Results
+    SOLVED = "solved"
+    FAILED = "failed"
+    HIT = "hit"
+    MISS = "miss"
+    EMAIL_TEMPLATE_CACHE = "email_template"
+    JWT_USER_CACHE = "jwt_user"
+    PNR_ETAG_CACHE = "pnr_etag"
+    EMAIL_TEMPLATE_REQUESTS = "email_template_requests"
+    # Site Error Messages Mentioning This Mean the Captcha Was Rejected
+    CAPTCHA_ERROR = "captcha"
+
+
+# Query Budgets
+# =====================================================
+class QueryBudgetConstants:
+    """Per View & Task SQL Query Budgets"""
+
+    OFF = "off"
+    LOG = "log"
+    RAISE = "raise"
+    # Same Query Shape Run More Often Than This is Flagged as N+1
+    REPEAT_LIMIT = 3
+    EXCEEDED = "{name} ran {count} queries, budget {budget}"
+    REPEATED = "{name} repeated query {times} times (N+1): {sql}"
+
+
+# Fake Scraper
+# =====================================================
+class FakeScraperConstants:
+    """Latency & Failure Distributions of Fake Scraper Used by Load Tests"""
+
+    # Tags Fake PNRs (Remark) & Load Test Users (Last Name), Only Tagged Rows Are Cleared
+    TAG = "load-test"
+
+    # Log-Normal Latency, Median & Spread in Seconds, Capped at MAX_LATENCY
+    MEDIAN_LATENCY = float(env.get("FAKE_SCRAPER_LATENCY", 9))
+    LATENCY_SIGMA = float(env.get("FAKE_SCRAPER_LATENCY_SIGMA", 0.35))
+    MAX_LATENCY = float(env.get("FAKE_SCRAPER_MAX_LATENCY", 60))
+    # Share of Scrapes Failing Each Way
+    NOT_FOUND_RATE = float(env.get("FAKE_SCRAPER_NOT_FOUND_RATE", 0.05))
+    CAPTCHA_FAILURE_RATE = float(env.get("FAKE_SCRAPER_CAPTCHA_FAILURE_RATE", 0.1))
+    ERROR_RATE = float(env.get("FAKE_SCRAPER_ERROR_RATE", 0.02))
+    # Chance Each Passenger's Current Status Moved Since Last Scrape
+    STATUS_CHANGE_RATE = float(env.get("FAKE_SCRAPER_STATUS_CHANGE_RATE", 0.3))
+    NOT_FOUND_MESSAGE = "FLUSHED PNR / PNR not yet generated"
+    CAPTCHA_MESSAGE = "Invalid Captcha"
+    ERROR_MESSAGE = "Fake Scraper Error"
+    MAX_PASSENGERS = 6
+    MAX_DAYS_AHEAD = 60
+    TRAINS = (
+        "RAJDHANI EXPRESS",
+        "SHATABDI EXPRESS",
+        "DURONTO EXPRESS",
+        "GARIB RATH",
+        "VANDE BHARAT",
+        "SAMPARK KRANTI",
     )
+    STATIONS = ("NDLS", "MMCT", "HWH", "MAS", "SBC", "ADI", "LKO", "PNBE")
+    CLASSES = ("1A", "2A", "3A", "SL", "CC", "EC")
+    STATUSES = ("CNF/B{coach}/{berth}", "RAC/{berth}", "WL/{berth}")
 
 
 # PNR Utility Constants
@@ -2,15 +2,14 @@
 
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
-from utils.utils import get_model
-from django_extensions.db.models import ActivatorModel
 from utils.constants import EmailTemplates
-from django.utils.timezone import now, timedelta
-from logging import Logger
+from utils.template_cache import TemplateCache
+from utils.smtp_pool import SMTPPool
+from utils.email_templates import PASSENGER_ROW, PNR_SECTION
+from users.otp_store import OtpStore
+import logging
 
-logger = Logger(__name__)
-EmailTemplate = get_model("quickpnr", "EmailTemplate")
-Otp = get_model(app_name="users", model_name="Otp")
+logger = logging.getLogger(__name__)
 
 
 class EmailService:
@@ -18,37 +17,56 @@ class EmailService:
 
     @staticmethod
     def get_template(email_type: str):
-        """Returns Email Template"""
-        try:
-            return EmailTemplate.objects.get(
-                status=ActivatorModel.ACTIVE_STATUS, email_type=email_type
-            )
-        except EmailTemplate.DoesNotExist:
-            return None
+        """Returns Email Template, Served From TemplateCache"""
+        return TemplateCache.get(email_type)
 
     @staticmethod
-    def send_mail(
+    def build_message(
         subject: str,
         body: str,
         is_html: bool,
         to_email: list,
         template: str | None = None,
-    ):
-        """This function will be used to send email using celery task based on email template"""
-        sender = settings.EMAIL_HOST_USER
+    ) -> EmailMultiAlternatives:
+        """Build Email Message From Template Parts"""
         msg = EmailMultiAlternatives(
-            subject=subject, from_email=sender, to=to_email, body=body
+            subject=subject, from_email=settings.EMAIL_HOST_USER, to=to_email, body=body
         )
         if is_html:
             msg.attach_alternative(template, "text/html")
-        msg.send(fail_silently=False)
-        logger.info(f"Email Send Successfully : Subject: {subject}")
-        return f"Email Send Successfully : Subject: {subject}"
+        return msg
 
-    def registration_mail(self, user):
-        """Sends a registration email to the specified user."""
+    @staticmethod
+    def send_mail(
+        subject: str,
+        body: str,
+        is_html: bool,
+        to_email: list,
+        template: str | None = None,
+    ):
+        """This function will be used to send email using celery task based on email template"""
+        return EmailService.send_message(
+            EmailService.build_message(subject, body, is_html, to_email, template)
+        )
+
+    @staticmethod
+    def send_message(message: EmailMultiAlternatives):
+        """Send Built Message Over a Pooled Connection"""
+        SMTPPool.send_messages([message])
+        logger.info(f"Email Send Successfully : Subject: {message.subject}")
+        return f"Email Send Successfully : Subject: {message.subject}"
+
+    @staticmethod
+    def send_batch(messages: list) -> int:
+        """Send Queued Messages in Batches Over One Pooled Connection"""
+        sent = SMTPPool.send_messages(messages)
+        logger.info(f"Email Batch Send Successfully : {sent} of {len(messages)}")
+        return sent
+
+    def registration_message(self, user) -> EmailMultiAlternatives:
+        """Builds the registration email of the specified user."""
         template = self.get_template(email_type=EmailTemplates.REGISTRED_SUCCESSFULLY)
-        return self.send_mail(
+        return self.build_message(
             template.subject,
             template.body.format(username=user.username),
             template.is_html,
@@ -56,129 +74,99 @@ class EmailService:
             template.template,
         )
 
+    def registration_mail(self, user):
+        """Sends a registration email to the specified user."""
+        return self.send_message(self.registration_message(user))
+
     def verify_email(self, user):
         """Send a Verification email to Specific User"""
         template = self.get_template(email_type=EmailTemplates.VERIFY_EMAIL)
-        try:
-            Otp.objects.get(user=user).delete()
-        except Otp.DoesNotExist:
-            pass
-        otp, created = Otp.objects.get_or_create(
-            user=user, expiry=now() + timedelta(minutes=10)
+        return self.send_otp_mail(template, user)
+
+    @staticmethod
+    def render_pnr_status(template, pnr_detail) -> str:
+        """Render PNR Details HTML, Template Compiled Once Per Template Version"""
+        return template.compiled_template.render(
+            {
+                "pnr": pnr_detail["pnr"],
+                "train_number": pnr_detail["train_number"],
+                "train_name": pnr_detail["train_name"],
+                "reserved_class": pnr_detail["reserved_class"],
+                "boarding_date": pnr_detail["boarding_date"][0:10],
+                "reserved_from": pnr_detail["reserved_from"],
+                "reserved_to": pnr_detail["reserved_to"],
+                "boarding_point": pnr_detail["boarding_point"],
+                "passengers_details": PASSENGER_ROW.render_each(
+                    pnr_detail["passengers_details"]
+                ),
+                "fare": pnr_detail["fare"],
+                "remark": (
+                    pnr_detail["remark"]
+                    if pnr_detail["remark"] is not None
+                    else "No remarks"
+                ),
+                "train_status": (
+                    pnr_detail["train_status"]
+                    if pnr_detail["train_status"]
+                    else "Status not available"
+                ),
+                "charting_status": pnr_detail["charting_status"],
+            }
         )
-        return self.send_mail(
+
+    def pnr_status_message(self, user, pnr_detail) -> EmailMultiAlternatives:
+        """Builds PNR Status Details Email of User"""
+        template = self.get_template(email_type=EmailTemplates.PNR_DETAILS)
+        return self.build_message(
             template.subject,
-            template.body.format(
-                otp=otp.otp, expiry=otp.expiry.strftime("%B %d %Y, %H:%M %p %Z")
-            ),
+            template.body,
             template.is_html,
             [user.email],
-            template.template.format(
-                otp=otp.otp, expiry=otp.expiry.strftime("%B %d %Y, %H:%M %p %Z")
-            ),
+            self.render_pnr_status(template, pnr_detail),
         )
 
     def pnr_status_mail(self, user, pnr_detail):
         """Sends PNR Status Details to User's Email Address"""
-        template = self.get_template(email_type=EmailTemplates.PNR_DETAILS)
-        passenger_details = "\n".join(
-            [
-                f"""
- <ul
-                                          style="
-                                            list-style: none;
-                                            padding: 0;
-                                            margin: 0;
-                                            display: flex;
-                                            justify-content: space-between;
-                                            background-color: #e0e0e0;
-                                            border-radius: 8px;
-                                            padding: 8px;
-                                          "
-                                        >
-                                          <li
-                                            style="
-                                              margin: 0 8px;
-                                              font-size: 14px;
-                                              font-weight: bold;
-                                            "
-                                          >
-                                            Name: {passenger['name']}
-                                          </li>
-                                          <li
-                                            style="
-                                              margin: 0 8px;
-                                              font-size: 14px;
-                                            "
-                                          >
-                                            Booking:
-                                            {passenger['booking_status']}
-                                          </li>
-                                          <li
-                                            style="
-                                              margin: 0 8px;
-                                              font-size: 14px;
-                                            "
-                                          >
-                                            Current:
-                                            {passenger['current_status']}
-                                          </li>
-                                        </ul>"""
-                for passenger in pnr_detail["passengers_details"]
-            ]
-        )
-        return (
-            self.send_mail(
-                template.subject,
-                template.body,
-                template.is_html,
-                [user.email],
-                template.template.format(
-                    pnr=pnr_detail["pnr"],
-                    train_number=pnr_detail["train_number"],
-                    train_name=pnr_detail["train_name"],
-                    reserved_class=pnr_detail["reserved_class"],
-                    boarding_date=pnr_detail["boarding_date"][0:10],
-                    reserved_from=pnr_detail["reserved_from"],
-                    reserved_to=pnr_detail["reserved_to"],
-                    boarding_point=pnr_detail["boarding_point"],
-                    passengers_details=passenger_details,
-                    fare=pnr_detail["fare"],
-                    remark=(
-                        pnr_detail["remark"]
-                        if pnr_detail["remark"] is not None
-                        else "No remarks"
-                    ),
-                    train_status=(
-                        pnr_detail["train_status"]
-                        if pnr_detail["train_status"]
-                        else "Status not available"
-                    ),
-                    charting_status=pnr_detail["charting_status"],
+        return (self.send_message(self.pnr_status_message(user, pnr_detail)),)
+
+    def pnr_digest_message(self, user, pnr_details: list) -> EmailMultiAlternatives:
+        """Builds Digest Email of All Updated PNRs of User"""
+        template = self.get_template(email_type=EmailTemplates.PNR_DIGEST)
+        context = {"username": user.username, "pnr_count": len(pnr_details)}
+        context["pnr_details"] = PNR_SECTION.render_each(
+            {
+                **pnr_detail,
+                "boarding_date": pnr_detail["boarding_date"][0:10],
+                "train_status": pnr_detail["train_status"] or "Status not available",
+                "passengers_details": PASSENGER_ROW.render_each(
+                    pnr_detail["passengers_details"]
                 ),
-            ),
+            }
+            for pnr_detail in pnr_details
+        )
+        return self.build_message(
+            template.subject,
+            template.body.format(**context),
+            template.is_html,
+            [user.email],
+            template.compiled_template.render(context),
         )
 
     def reset_password_otp(self, user):
         """Generates reset password otp to user's email address"""
         template = self.get_template(email_type=EmailTemplates.PASSWORD_RESET)
-        try:
-            otp = Otp.objects.get(user=user).delete()
-        except Otp.DoesNotExist:
-            pass
-        otp, created = Otp.objects.get_or_create(
-            user=user, expiry=now() + timedelta(minutes=10)
-        )
+        return self.send_otp_mail(template, user)
+
+    def send_otp_mail(self, template, user):
+        """Issue OTP for Template's Email Type & Mail it to User"""
+        otp, expiry = OtpStore.issue(template.email_type, user.id)
+        context = {"otp": otp, "expiry": expiry.strftime("%B %d %Y, %H:%M %p %Z")}
         return self.send_mail(
             template.subject,
-            template.body.format(
-                otp=otp.otp, expiry=otp.expiry.strftime("%B %d %Y, %H:%M %p %Z")
-            ),
+            template.body.format(**context),
             template.is_html,
             [user.email],
-            template.template.format(
-                otp=otp.otp, expiry=otp.expiry.strftime("%B %d %Y, %H:%M %p %Z")
-            ),
+            template.template.format(**context),
         )
 
     def reset_password_done(self, user):
@@ -0,0 +1,105 @@
+"""Precompiled str.format Email Templates"""
+
+from string import Formatter
+
+formatter = Formatter()
+
+
+class CompiledTemplate:
+    """str.format Template Parsed Once, Rendered Without Rescanning Text"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = list(formatter.parse(text))
+        # Plain {name} Fields Are Rendered Directly, Others by str.format.
+        self.simple = all(
+            field is None or (field.isidentifier() and not spec and not conversion)
+            for _, field, spec, conversion in self.parts
+        )
+
+    def render(self, context: dict) -> str:
+        """Same Output as text.format(**context)"""
+        if not self.simple:
+            return self.text.format(**context)
+        rendered = []
+        for literal, field, _, _ in self.parts:
+            rendered.append(literal)
+            if field is not None:
+                rendered.append(format(context[field]))
+        return "".join(rendered)
+
+    def render_each(self, contexts, separator: str = "\n") -> str:
+        """Render Once Per Context, Used for Repeated Rows"""
+        return separator.join([self.render(context) for context in contexts])
+
+
+# Passenger Row of PNR Details Mail, Repeated for Each Passenger
+PASSENGER_ROW = CompiledTemplate(
+    """
+ <ul
+                                          style="
+                                            list-style: none;
+                                            padding: 0;
+                                            margin: 0;
+                                            display: flex;
+                                            justify-content: space-between;
+                                            background-color: #e0e0e0;
+                                            border-radius: 8px;
+                                            padding: 8px;
+                                          "
+                                        >
+                                          <li
+                                            style="
+                                              margin: 0 8px;
+                                              font-size: 14px;
+                                              font-weight: bold;
+                                            "
+                                          >
+                                            Name: {name}
+                                          </li>
+                                          <li
+                                            style="
+                                              margin: 0 8px;
+                                              font-size: 14px;
+                                            "
+                                          >
+                                            Booking:
+                                            {booking_status}
+                                          </li>
+                                          <li
+                                            style="
+                                              margin: 0 8px;
+                                              font-size: 14px;
+                                            "
+                                          >
+                                            Current:
+                                            {current_status}
+                                          </li>
+                                        </ul>"""
+)
+
+
+# One PNR in Digest Mail, {passengers_details} Filled With PASSENGER_ROW
+PNR_SECTION = CompiledTemplate(
+    """
+ <div
+                                  style="
+                                    margin: 16px 0;
+                                    padding: 12px;
+                                    border: 1px solid #e0e0e0;
+                                    border-radius: 8px;
+                                  "
+                                >
+                                  <h3 style="margin: 0 0 8px 0; font-size: 16px">
+                                    PNR {pnr} - {train_number} {train_name}
+                                  </h3>
+                                  <p style="margin: 0 0 8px 0; font-size: 14px">
+                                    {boarding_date} | {reserved_from} to {reserved_to} |
+                                    {reserved_class} | {charting_status}
+                                  </p>
+                                  <p style="margin: 0 0 8px 0; font-size: 14px">
+                                    Train Status: {train_status}
+                                  </p>
+                                  {passengers_details}
+                                </div>"""
+)
@@ -13,3 +13,9 @@ class InvalidPnrNumber(ValidationError):
     """Invalid PNR Number Exception"""
 
     pass
+
+
+class QueryBudgetExceeded(Exception):
+    """View or Task Ran More Queries Than its Budget, or Repeated One (N+1)"""
+
+    pass
@@ -0,0 +1,117 @@
+"""Fake PNR Scraper for Load Tests, Enabled by PNR_SCRAPER_BACKEND"""
+
+import math
+import random
+from datetime import datetime, time, timedelta
+from time import perf_counter, sleep
+from utils.constants import FakeScraperConstants, MetricsConstants
+from utils.exceptions import PNRNotFound
+from utils.metrics import record_scrape
+
+
+class FakePnrScrapping:
+    """
+    Stands in for PnrScrapping Without Browser or Captcha, Sleeps a Log-Normal
+    Latency & Fails at Configured Rates, Journey Derived From PNR so Every
+    Scrape Agrees, Passenger Statuses Move so Refreshes Find Changes
+    """
+
+    def __init__(self, pnr: int):
+        self.pnr = pnr
+        self.started = perf_counter()
+
+    @staticmethod
+    def latency() -> float:
+        """Seconds a Scrape Takes"""
+        return min(
+            random.lognormvariate(
+                math.log(FakeScraperConstants.MEDIAN_LATENCY),
+                FakeScraperConstants.LATENCY_SIGMA,
+            ),
+            FakeScraperConstants.MAX_LATENCY,
+        )
+
+    @staticmethod
+    def outcome() -> str:
+        """Draw Scrape Outcome From Failure Rates"""
+        roll = random.random()
+        for outcome, rate in (
+            (MetricsConstants.NOT_FOUND, FakeScraperConstants.NOT_FOUND_RATE),
+            (
+                MetricsConstants.CAPTCHA_FAILED,
+                FakeScraperConstants.CAPTCHA_FAILURE_RATE,
+            ),
+            (MetricsConstants.ERROR, FakeScraperConstants.ERROR_RATE),
+        ):
+            if roll < rate:
+                return outcome
+            roll -= rate
+        return MetricsConstants.SUCCESS
+
+    def passengers(self, seeded: random.Random):
+        """Passengers of PNR, Each Status Moved With STATUS_CHANGE_RATE"""
+        passengers = []
+        for number in range(
+            1, seeded.randint(1, FakeScraperConstants.MAX_PASSENGERS) + 1
+        ):
+            berth = seeded.randint(1, 72)
+            booking_status = FakeScraperConstants.STATUSES[-1].format(berth=berth)
+            current = seeded.choice(FakeScraperConstants.STATUSES)
+            if random.random() < FakeScraperConstants.STATUS_CHANGE_RATE:
+                current = random.choice(FakeScraperConstants.STATUSES)
+            passengers.append(
+                {
+                    "name": f"Passenger {number}",
+                    "booking_status": booking_status,
+                    "current_status": current.format(
+                        coach=seeded.randint(1, 9), berth=berth
+                    ),
+                    "coach_position": "",
+                }
+            )
+        return passengers
+
+    def details(self) -> dict:
+        """PNR Details Shaped Like PnrScrapping Output"""
+        seeded = random.Random(self.pnr)
+        reserved_from, reserved_to = seeded.sample(FakeScraperConstants.STATIONS, 2)
+        boarding_date = datetime.combine(
+            datetime.now().date()
+            + timedelta(days=seeded.randint(1, FakeScraperConstants.MAX_DAYS_AHEAD)),
+            time(),
+        )
+        return {
+            "pnr": self.pnr,
+            "train_number": str(seeded.randint(10000, 22999)),
+            "train_name": seeded.choice(FakeScraperConstants.TRAINS),
+            "boarding_date": boarding_date.isoformat(),
+            "reserved_from": reserved_from,
+            "reserved_to": reserved_to,
+            "reserved_upto": reserved_to,
+            "boarding_point": reserved_from,
+            "reserved_class": seeded.choice(FakeScraperConstants.CLASSES),
+            "fare": round(seeded.uniform(300, 5000), 2),
+            "charting_status": "Chart Not Prepared",
+            "remarks": "",
+            "remark": FakeScraperConstants.TAG,
+            "train_status": "",
+            "passengers_details": self.passengers(seeded),
+        }
+
+    def __call__(self, *args, **kwargs):
+        outcome = self.outcome()
+        try:
+            sleep(self.latency())
+            if outcome == MetricsConstants.NOT_FOUND:
+                raise PNRNotFound(FakeScraperConstants.NOT_FOUND_MESSAGE)
+            if outcome == MetricsConstants.CAPTCHA_FAILED:
+                raise PNRNotFound(FakeScraperConstants.CAPTCHA_MESSAGE)
+            if outcome == MetricsConstants.ERROR:
+                raise Exception(FakeScraperConstants.ERROR_MESSAGE)
+            return self.details()
+        finally:
+            record_scrape(
+                outcome,
+                perf_counter() - self.started,
+                outcome != MetricsConstants.ERROR,
+            )
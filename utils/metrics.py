@@ -0,0 +1,194 @@
+"""Prometheus Metrics of API, Scraper, Caches & Celery Tasks"""
+
+import os
+import time
+from hmac import compare_digest
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_process_shutdown,
+)
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from utils.constants import MetricsConstants
+
+REQUEST_LATENCY = Histogram(
+    "request_duration_seconds",
+    "API request latency per view",
+    ["view", "method", "status"],
+    namespace=MetricsConstants.NAMESPACE,
+    buckets=MetricsConstants.LATENCY_BUCKETS,
+)
+SCRAPE_DURATION = Histogram(
+    "scrape_duration_seconds",
+    "PNR scrape duration per outcome",
+    ["outcome"],
+    namespace=MetricsConstants.NAMESPACE,
+    buckets=MetricsConstants.SCRAPE_BUCKETS,
+)
+CAPTCHAS = Counter(
+    "captcha_attempts",
+    "Captcha solve attempts per result",
+    ["result"],
+    namespace=MetricsConstants.NAMESPACE,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests",
+    "Cache lookups per cache and result",
+    ["cache", "result"],
+    namespace=MetricsConstants.NAMESPACE,
+)
+EMAIL_TEMPLATE_REQUESTS = Counter(
+    MetricsConstants.EMAIL_TEMPLATE_REQUESTS,
+    "Email template cache lookups per email type and result",
+    ["email_type", "result"],
+    namespace=MetricsConstants.NAMESPACE,
+)
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task runtime per task and final state",
+    ["task", "state"],
+    namespace=MetricsConstants.NAMESPACE,
+    buckets=MetricsConstants.TASK_BUCKETS,
+)
+TASK_QUEUE_WAIT = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time Celery tasks waited between publish and start",
+    ["task"],
+    namespace=MetricsConstants.NAMESPACE,
+    buckets=MetricsConstants.TASK_BUCKETS,
+)
+
+
+def record_cache(cache_name: str, hit: bool):
+    """Count Cache Lookup"""
+    CACHE_REQUESTS.labels(
+        cache_name, MetricsConstants.HIT if hit else MetricsConstants.MISS
+    ).inc()
+
+
+def record_template_cache(email_type: str, hit: bool):
+    """Count Email Template Lookup, Hits Are DB Queries Saved"""
+    record_cache(MetricsConstants.EMAIL_TEMPLATE_CACHE, hit)
+    EMAIL_TEMPLATE_REQUESTS.labels(
+        email_type, MetricsConstants.HIT if hit else MetricsConstants.MISS
+    ).inc()
+
+
+def record_scrape(outcome: str, seconds: float, captcha_submitted: bool):
+    """Observe Scrape, Captcha Counted Solved Once the Site Answered Past It"""
+    SCRAPE_DURATION.labels(outcome).observe(seconds)
+    if captcha_submitted:
+        CAPTCHAS.labels(
+            MetricsConstants.SOLVED
+            if outcome in (MetricsConstants.SUCCESS, MetricsConstants.NOT_FOUND)
+            else MetricsConstants.FAILED
+        ).inc()
+
+
+def get_registry():
+    """Registry to Expose, Merged From All Processes When Multi-Process"""
+    if not settings.PROMETHEUS_MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=settings.PROMETHEUS_MULTIPROC_DIR)
+    return registry
+
+
+def metrics_view(request):
+    """Prometheus Exposition of All Metrics, Token Holders or Staff Only"""
+    if MetricsConstants.TOKEN:
+        allowed = compare_digest(
+            request.headers.get("Authorization", ""),
+            "Bearer {token}".format(token=MetricsConstants.TOKEN),
+        )
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+def mark_process_dead(pid: int):
+    """Drop Live Samples of Exited Worker Process When Multi-Process"""
+    if settings.PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, settings.PROMETHEUS_MULTIPROC_DIR)
+
+
+class MetricsMiddleware:
+    """Observe Request Latency Labelled by Route, Not Raw Path"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Async Views Are Awaited, Not Run in a Thread per Middleware.
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        return self.observe(request, self.get_response(request), start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        return self.observe(request, await self.get_response(request), start)
+
+    @staticmethod
+    def observe(request, response, start: float):
+        match = request.resolver_match
+        REQUEST_LATENCY.labels(
+            match.route if match else MetricsConstants.UNMATCHED_VIEW,
+            request.method,
+            response.status_code,
+        ).observe(time.perf_counter() - start)
+        return response
+
+
+# Start Times of Running Tasks in This Worker Process
+_task_starts = {}
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    """Stamp Publish Time, Queue Wait Measured When Task Starts"""
+    if headers is not None:
+        headers[MetricsConstants.PUBLISHED_AT_HEADER] = time.time()
+
+
+@task_prerun.connect
+def task_started(task_id=None, task=None, **kwargs):
+    _task_starts[task_id] = time.perf_counter()
+    published_at = getattr(task.request, MetricsConstants.PUBLISHED_AT_HEADER, None)
+    if published_at is not None:
+        TASK_QUEUE_WAIT.labels(task.name).observe(max(time.time() - published_at, 0))
+
+
+@worker_process_shutdown.connect
+def worker_process_exited(pid=None, **kwargs):
+    """Prefork Child Exiting, Gunicorn Calls mark_process_dead From child_exit"""
+    mark_process_dead(pid or os.getpid())
+
+
+@task_postrun.connect
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    start = _task_starts.pop(task_id, None)
+    if start is not None:
+        TASK_DURATION.labels(task.name, state).observe(time.perf_counter() - start)
@@ -0,0 +1,43 @@
+"""Paginators for Large Tables"""
+
+import json
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from utils.constants import AdminConstants
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator Counting Large Querysets From PostgreSQL Planner Estimates,
+    Exact COUNT(*) Only When the Estimate is Small or Unavailable
+    """
+
+    def estimate(self):
+        """Estimated Row Count, None if Not Available"""
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        if not queryset.query.has_filters():
+            # Table Statistics, Kept Current by Autovacuum.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            # Never Analyzed Tables Report -1.
+            return row[0] if row and row[0] >= 0 else None
+        plan = json.loads(queryset.explain(format="json"))
+        # Django Unwraps the One Item List PostgreSQL Returns.
+        if isinstance(plan, list):
+            plan = plan[0]
+        return plan["Plan"]["Plan Rows"]
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate()
+        if estimate is not None and estimate > AdminConstants.EXACT_COUNT_LIMIT:
+            return estimate
+        return super().count
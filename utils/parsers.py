@@ -0,0 +1,26 @@
+"""orjson Backed DRF Parsers"""
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from utils.renderers import ORJSONRenderer
+
+
+class ORJSONParser(JSONParser):
+    """JSON Parser Using orjson"""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parses the incoming bytestream as JSON and returns the resulting data."""
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read()
+            # orjson Reads UTF-8 Bytes Directly, Decode Other Charsets First.
+            if encoding.lower().replace("-", "") != "utf8":
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
@@ -0,0 +1,173 @@
+"""Opt-In Per Request Profiling for Staff Users"""
+
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import secrets
+import time
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.db import connections
+from utils.constants import ProfilingConstants
+from utils.utils import get_model
+
+logger = logging.getLogger(__name__)
+
+
+def sign_profiling_token(user) -> str:
+    """Signed X-Profile Header Value of Staff User"""
+    return signing.TimestampSigner(salt=ProfilingConstants.SALT).sign(str(user.pk))
+
+
+def profiling_user(token: str):
+    """Staff User of Valid Token, None Otherwise"""
+    try:
+        user_id = signing.TimestampSigner(salt=ProfilingConstants.SALT).unsign(
+            token, max_age=ProfilingConstants.TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    return (
+        get_model("users", "User")
+        .objects.filter(id=user_id, is_staff=True, is_active=True)
+        .first()
+    )
+
+
+class QueryRecorder:
+    """Database Execute Wrapper Counting Queries & Their Time"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class ProfilingMiddleware:
+    """
+    Profile Requests Carrying a Valid X-Profile Header With cProfile,
+    Requests Without the Header Pass Straight Through
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Async Views Are Awaited, Not Run in a Thread per Middleware.
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = request.META.get(ProfilingConstants.META_KEY)
+        if token is None:
+            return self.get_response(request)
+        user = profiling_user(token)
+        if user is None:
+            return self.get_response(request)
+        return self.profile(request, user)
+
+    async def __acall__(self, request):
+        token = request.META.get(ProfilingConstants.META_KEY)
+        if token is None:
+            return await self.get_response(request)
+        user = await sync_to_async(profiling_user)(token)
+        if user is None:
+            return await self.get_response(request)
+        return await self.aprofile(request, user)
+
+    @staticmethod
+    def record_queries(stack, recorder):
+        """Record Queries of Current Thread's Connections Until Stack Closes"""
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+
+    def profile(self, request, user):
+        """Run Request Under cProfile & Query Recorder, Store the Result"""
+        recorder = QueryRecorder()
+        profiler = cProfile.Profile()
+        with ExitStack() as stack:
+            self.record_queries(stack, recorder)
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+                duration = time.perf_counter() - start
+        return self.finish(request, response, user, profiler, duration, recorder)
+
+    async def aprofile(self, request, user):
+        """Profile Async View on the Event Loop Thread"""
+        recorder = QueryRecorder()
+        profiler = cProfile.Profile()
+        stack = ExitStack()
+        # Async ORM Calls Run in the Request's Thread Sensitive Worker, Record There.
+        await sync_to_async(self.record_queries)(stack, recorder)
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - start
+            await sync_to_async(stack.close)()
+        return await sync_to_async(self.finish)(
+            request, response, user, profiler, duration, recorder
+        )
+
+    def finish(self, request, response, user, profiler, duration, recorder):
+        """Add Server-Timing Summary & Store the Profile"""
+        response[ProfilingConstants.SUMMARY_HEADER] = ProfilingConstants.SUMMARY.format(
+            total=duration * 1000, sql=recorder.seconds * 1000, queries=recorder.count
+        )
+        try:
+            profile = self.save(request, response, user, profiler, duration, recorder)
+            response[ProfilingConstants.ID_HEADER] = str(profile.id)
+        except Exception as err:
+            # Losing a Profile Must Not Fail the Request.
+            logger.warning("Request profile not saved: %s", err)
+        return response
+
+    @staticmethod
+    def save(request, response, user, profiler, duration, recorder):
+        """Store Top Functions & Full pstats Dump"""
+        summary = io.StringIO()
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats(ProfilingConstants.SORT).print_stats(
+            ProfilingConstants.TOP_FUNCTIONS
+        )
+        profile = get_model("quickpnr", "RequestProfile")(
+            user=user,
+            method=request.method,
+            path=request.get_full_path()[: ProfilingConstants.PATH_LENGTH],
+            status_code=response.status_code,
+            duration_ms=duration * 1000,
+            query_count=recorder.count,
+            query_ms=recorder.seconds * 1000,
+            summary=summary.getvalue(),
+        )
+        # Same Format as pstats dump_stats(), Readable by pstats & snakeviz.
+        profile.profile.save(
+            ProfilingConstants.FILENAME.format(
+                method=request.method.lower(),
+                id=int(time.time() * 1000),
+                token=secrets.token_hex(8),
+            ),
+            ContentFile(marshal.dumps(stats.stats)),
+        )
+        return profile
@@ -0,0 +1,82 @@
+"""Redis Pub/Sub Publishing & In-Process Fan-Out to Async Subscribers"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from redis.exceptions import RedisError
+from rest_framework.settings import api_settings
+from utils.redis_client import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+
+def publish(channel: str, data) -> bool:
+    """Publish Data as JSON, Failures Logged so Writers Never Fail on Pub/Sub"""
+    try:
+        get_redis().publish(
+            channel, api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data)
+        )
+        return True
+    except RedisError as err:
+        logger.warning("Publish to %s failed: %s", channel, err)
+        return False
+
+
+class Broker:
+    """One Pattern Subscription Per Process, Messages Fanned Out to Local Queues"""
+
+    def __init__(self, pattern: str, queue_size: int = 16):
+        self.pattern = pattern
+        self.queue_size = queue_size
+        self.subscribers = defaultdict(set)
+        self.listener = None
+        self.subscribed = asyncio.Event()
+
+    def subscribe(self, channels) -> asyncio.Queue:
+        """Return Queue Receiving (channel, message) of Given Channels"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        for channel in channels:
+            self.subscribers[channel].add(queue)
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.get_running_loop().create_task(self.listen())
+        return queue
+
+    async def wait_subscribed(self, timeout: float = 5):
+        """Wait Until Pattern Subscription is Active, so No Message is Missed"""
+        await asyncio.wait_for(self.subscribed.wait(), timeout)
+
+    def unsubscribe(self, channels, queue):
+        """Remove Queue From Channels"""
+        for channel in channels:
+            self.subscribers[channel].discard(queue)
+            if not self.subscribers[channel]:
+                del self.subscribers[channel]
+
+    def dispatch(self, channel: str, message: bytes):
+        """Hand Message to Every Local Subscriber of Channel"""
+        for queue in self.subscribers.get(channel, ()):
+            try:
+                queue.put_nowait((channel, message))
+            except asyncio.QueueFull:
+                # Slow Client, Drop Update, Next One Carries Full State.
+                logger.warning("Subscriber queue full on %s", channel)
+
+    async def listen(self):
+        """Read Redis Messages Until No Subscribers Remain, Reconnect on Errors"""
+        while self.subscribers:
+            client = get_async_redis()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(self.pattern)
+                self.subscribed.set()
+                while self.subscribers:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.dispatch(message["channel"].decode(), message["data"])
+            except RedisError as err:
+                logger.warning("Pub/Sub listener error: %s", err)
+                await asyncio.sleep(1)
+            finally:
+                self.subscribed.clear()
+                await pubsub.aclose()
+                await client.aclose()
@@ -0,0 +1,94 @@
+"""SQL Query Budgets & N+1 Detection for Views & Tasks"""
+
+import logging
+import re
+from collections import Counter
+from contextlib import ContextDecorator, ExitStack
+from django.conf import settings
+from django.db import connections
+from utils.constants import QueryBudgetConstants
+from utils.exceptions import QueryBudgetExceeded
+
+logger = logging.getLogger(__name__)
+
+# Placeholder Lists Collapsed so IN Clauses of Any Length Share a Shape.
+PLACEHOLDER_LIST = re.compile(r"%s(?:\s*,\s*%s)+")
+# Savepoints of atomic() Blocks Are Not Counted, Tests Nest More of Them.
+TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+def query_shape(sql: str) -> str:
+    """SQL With Parameter Lists Collapsed, Equal for Queries Differing Only in Values"""
+    return PLACEHOLDER_LIST.sub("%s, ...", sql)
+
+
+class query_budget(ContextDecorator):
+    """
+    Limit Queries Run by a View Method, Task or Block, Also Flags Any Query
+    Shape Repeated More Than REPEAT_LIMIT Times, Violations Logged or Raised
+    per QUERY_BUDGET_MODE, Nothing is Recorded When Mode is off
+    """
+
+    def __init__(self, budget: int, name: str | None = None):
+        self.budget = budget
+        self.name = name
+
+    def __call__(self, func):
+        if self.name is None:
+            self.name = func.__qualname__
+        return super().__call__(func)
+
+    def _recreate_cm(self):
+        # Fresh Recorder per Call, Decorated Functions May Run Concurrently.
+        return type(self)(self.budget, self.name)
+
+    def record(self, execute, sql, params, many, context):
+        if not sql.startswith(TRANSACTION_CONTROL):
+            self.shapes[query_shape(sql)] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.mode = settings.QUERY_BUDGET_MODE
+        if self.mode == QueryBudgetConstants.OFF:
+            return self
+        self.shapes = Counter()
+        self.stack = ExitStack()
+        for alias in connections:
+            self.stack.enter_context(connections[alias].execute_wrapper(self.record))
+        return self
+
+    @property
+    def count(self) -> int:
+        return sum(self.shapes.values())
+
+    def violations(self) -> list[str]:
+        """Budget & N+1 Violations of Recorded Queries"""
+        violations = []
+        if self.count > self.budget:
+            violations.append(
+                QueryBudgetConstants.EXCEEDED.format(
+                    name=self.name, count=self.count, budget=self.budget
+                )
+            )
+        for sql, times in self.shapes.items():
+            if times > QueryBudgetConstants.REPEAT_LIMIT:
+                violations.append(
+                    QueryBudgetConstants.REPEATED.format(
+                        name=self.name, times=times, sql=sql
+                    )
+                )
+        return violations
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self.mode == QueryBudgetConstants.OFF:
+            return False
+        self.stack.close()
+        # Errors of the Block Itself Take Precedence.
+        if exc_type is not None:
+            return False
+        violations = self.violations()
+        if violations and self.mode == QueryBudgetConstants.RAISE:
+            raise QueryBudgetExceeded("; ".join(violations))
+        for violation in violations:
+            logger.warning(violation)
+        return False
@@ -0,0 +1,17 @@
+"""Shared Redis Clients"""
+
+from functools import lru_cache
+import redis
+from redis import asyncio as aioredis
+from utils.constants import Settings
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    """Return Process Wide Redis Client"""
+    return redis.Redis.from_url(Settings.REDIS_URL)
+
+
+def get_async_redis():
+    """Return New asyncio Redis Client, Bound to the Running Event Loop"""
+    return aioredis.from_url(Settings.REDIS_URL)
@@ -0,0 +1,35 @@
+"""orjson Backed DRF Renderers"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON Renderer Using orjson, Output Identical to DRF JSONRenderer"""
+
+    # Datetimes Passed Through to DRF Encoder to Keep Millisecond & "Z" Formatting.
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring."""
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        # orjson Only Writes Compact UTF-8, Anything Else Handled by DRF.
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            # Integers Above 64 Bit & Other Types orjson Rejects.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escape \u2028 and \u2029 Same as DRF JSONRenderer.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
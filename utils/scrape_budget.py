@@ -0,0 +1,38 @@
+"""Global Per-Minute Scrape Budget Shared by All Workers"""
+
+from django.core.cache import cache
+from django.utils.timezone import now
+from utils.constants import CeleryConfig
+from pnr.constants import RefreshConstants
+
+
+class ScrapeBudget:
+    """Counts Scrapes Per Minute, Background Work Leaves a Reserve for Users"""
+
+    limit = CeleryConfig.SCRAPE_BUDGET_PER_MINUTE
+    background_limit = max(limit - CeleryConfig.INTERACTIVE_SCRAPE_RESERVE, 0)
+
+    @staticmethod
+    def _key():
+        return RefreshConstants.BUDGET_KEY.format(minute=int(now().timestamp() // 60))
+
+    @classmethod
+    def used(cls) -> int:
+        """Scrapes Done in Current Minute"""
+        return cache.get(cls._key(), 0)
+
+    @classmethod
+    def available(cls) -> int:
+        """Scrapes Background Refresh May Still Use in Current Minute"""
+        return max(cls.background_limit - cls.used(), 0)
+
+    @classmethod
+    def acquire(cls, interactive: bool = False) -> bool:
+        """Take One Scrape From Budget, User Requests Are Never Refused"""
+        key = cls._key()
+        cache.add(key, 0, 120)
+        used = cache.incr(key)
+        if interactive or used <= cls.background_limit:
+            return True
+        cache.decr(key)
+        return False
@@ -1,21 +1,31 @@
 # Base PNR Scrapping Utilities
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from utils.constants import ElementTypes, PnrConstants, IDs
+from utils.constants import ElementTypes, PnrConstants, IDs, MetricsConstants
+from utils.metrics import record_scrape
 from pnr.constants import ScrappingConstants
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from utils.image_filtering import CaptchaImageFiltering
 from datetime import datetime
-from time import sleep
+from django.conf import settings
+from django.utils.module_loading import import_string
+from time import perf_counter, sleep
 from utils.exceptions import PNRNotFound
 
 
+def get_scraper(pnr: int):
+    """Scraper of PNR, Class Set by PNR_SCRAPER_BACKEND"""
+    return import_string(settings.PNR_SCRAPER_BACKEND)(pnr)
+
+
 class PnrScrapping:
     """Scrapping Class Implemented for PNR Scrapping"""
 
     def __init__(self, pnr: int):
         self.pnr = pnr
+        self.started = perf_counter()
+        self.captcha_submitted = False
         options = webdriver.FirefoxOptions()
         options.add_argument("--headless")
         self.driver = webdriver.Firefox(options=options)
@@ -73,8 +83,10 @@ class PnrScrapping:
         captcha_input.send_keys(solved_captcha)
         captcha_submit = self.fetch_element_by_id(IDs.CAPTCHA_SUBMIT)
         captcha_submit.click()
+        self.captcha_submitted = True
 
     def __call__(self, *args, **kwargs):
+        outcome = MetricsConstants.ERROR
         try:
             self.enter_pnr_and_open_captcha_modal_condition()
             # Sleep 4 Seconds Allows Modal to Load Captcha & Open Modal
@@ -84,16 +96,26 @@ class PnrScrapping:
             sleep(4)
             data = FormatData(self.driver.find_element(By.ID, "pnrOutputDiv"))()
             data["pnr"] = self.pnr
+            outcome = MetricsConstants.SUCCESS
             return data
         except Exception as err:
             error = self.driver.find_element(By.ID, "errorMessage")
             if error:
-                raise PNRNotFound(error.get_attribute("innerHTML"))
+                message = error.get_attribute("innerHTML")
+                outcome = (
+                    MetricsConstants.CAPTCHA_FAILED
+                    if MetricsConstants.CAPTCHA_ERROR in message.lower()
+                    else MetricsConstants.NOT_FOUND
+                )
+                raise PNRNotFound(message)
             else:
                 raise Exception(err)
         finally:
             self.driver.quit()
             print("Driver Closed Successfully")
+            record_scrape(
+                outcome, perf_counter() - self.started, self.captcha_submitted
+            )
 
 
 class FormatData:
@@ -0,0 +1,114 @@
+"""Per-Worker Pool of Authenticated SMTP Connections"""
+
+import atexit
+import os
+from queue import Empty, Full, LifoQueue
+from smtplib import SMTPResponseException, SMTPServerDisconnected
+from time import monotonic
+from django.core.mail import get_connection
+from utils.constants import EmailConfig
+
+# Errors After Which a Fresh Connection May Succeed
+RECONNECT_ERRORS = (SMTPServerDisconnected, ConnectionError, TimeoutError)
+SERVICE_CLOSING = 421
+
+
+class PooledSMTPConnection:
+    """Open Email Backend Connection, Reopened When Idle or Used Up"""
+
+    def __init__(self):
+        self.backend = get_connection(fail_silently=False)
+        self.last_used = monotonic()
+        self.sent = 0
+
+    def is_stale(self) -> bool:
+        """Idle Too Long or Sent Max Messages Allowed Per Connection"""
+        return (
+            monotonic() - self.last_used > EmailConfig.SMTP_IDLE_TIMEOUT
+            or self.sent >= EmailConfig.SMTP_MESSAGES_PER_CONNECTION
+        )
+
+    def send(self, message) -> int:
+        """Send One Message, Connecting & Logging in Only if Needed"""
+        if self.is_stale():
+            self.close()
+        # Backend Closes Connections it Opens Itself, Keep it Open Here.
+        self.backend.open()
+        sent = self.backend.send_messages([message])
+        self.last_used = monotonic()
+        self.sent += 1
+        return sent
+
+    def close(self):
+        """Close Connection, Next Send Reconnects"""
+        try:
+            self.backend.close()
+        except Exception:
+            self.backend.connection = None
+        self.sent = 0
+
+
+class SMTPPool:
+    """Reuses SMTP Connections Across Mails Sent by This Worker Process"""
+
+    _pool = LifoQueue(maxsize=EmailConfig.SMTP_POOL_SIZE)
+    _pid = os.getpid()
+
+    @classmethod
+    def acquire(cls) -> PooledSMTPConnection:
+        """Pooled Connection if Any, Else a New One"""
+        # Connections Are Not Shared With Forked Worker Processes.
+        if cls._pid != os.getpid():
+            cls._pool = LifoQueue(maxsize=EmailConfig.SMTP_POOL_SIZE)
+            cls._pid = os.getpid()
+        try:
+            return cls._pool.get_nowait()
+        except Empty:
+            return PooledSMTPConnection()
+
+    @classmethod
+    def release(cls, connection: PooledSMTPConnection):
+        """Return Connection to Pool, Closed if Pool is Full"""
+        try:
+            cls._pool.put_nowait(connection)
+        except Full:
+            connection.close()
+
+    @classmethod
+    def close_all(cls):
+        """Close Every Pooled Connection"""
+        while True:
+            try:
+                cls._pool.get_nowait().close()
+            except Empty:
+                return
+
+    @classmethod
+    def send_messages(cls, messages) -> int:
+        """Send Messages Over One Connection, Resuming After Reconnects"""
+        connection = cls.acquire()
+        sent = index = retries = 0
+        try:
+            while index < len(messages):
+                try:
+                    sent += connection.send(messages[index])
+                    index += 1
+                    retries = 0
+                except RECONNECT_ERRORS + (SMTPResponseException,) as err:
+                    if (
+                        isinstance(err, SMTPResponseException)
+                        and err.smtp_code != SERVICE_CLOSING
+                    ) or retries >= EmailConfig.SMTP_RECONNECT_RETRIES:
+                        raise
+                    # Messages Before Index Were Delivered, Retry Only the Failed One.
+                    connection.close()
+                    retries += 1
+        except Exception:
+            connection.close()
+            raise
+        finally:
+            cls.release(connection)
+        return sent
+
+
+atexit.register(SMTPPool.close_all)
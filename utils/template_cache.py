@@ -0,0 +1,78 @@
+"""Process-Local Email Template Cache, Invalidated Through a Shared Version"""
+
+from threading import Lock
+from django.core.cache import cache
+from django_extensions.db.models import ActivatorModel
+from utils.utils import get_model
+from utils.constants import EmailTemplates, MetricsConstants, TemplateCacheConstants
+from utils.metrics import get_registry, record_template_cache
+
+EmailTemplate = get_model("quickpnr", "EmailTemplate")
+
+
+class TemplateCache:
+    """Keeps Active Templates in Memory Until EmailTemplate Version Changes"""
+
+    _templates = {}
+    _version = None
+    _lock = Lock()
+
+    @staticmethod
+    def version() -> int:
+        """Current Template Version Shared by All Workers"""
+        version = cache.get(TemplateCacheConstants.VERSION_KEY)
+        if version is None:
+            # First Lookup Sets the Version, Unless Another Worker Just Did.
+            if cache.add(TemplateCacheConstants.VERSION_KEY, 0, None):
+                return 0
+            version = cache.get(TemplateCacheConstants.VERSION_KEY, 0)
+        return version
+
+    @staticmethod
+    def bump() -> None:
+        """Invalidate Templates Cached by Every Worker"""
+        cache.add(TemplateCacheConstants.VERSION_KEY, 0, None)
+        cache.incr(TemplateCacheConstants.VERSION_KEY)
+
+    @classmethod
+    def get(cls, email_type: str):
+        """Returns Active Email Template, None if Not Available"""
+        version = cls.version()
+        with cls._lock:
+            if version != cls._version:
+                cls._templates = {}
+                cls._version = version
+            if email_type in cls._templates:
+                record_template_cache(email_type, True)
+                return cls._templates[email_type]
+        try:
+            template = EmailTemplate.objects.get(
+                status=ActivatorModel.ACTIVE_STATUS, email_type=email_type
+            )
+        except EmailTemplate.DoesNotExist:
+            template = None
+        record_template_cache(email_type, False)
+        with cls._lock:
+            # Skip Storing if Templates Changed While Querying.
+            if version == cls._version:
+                cls._templates[email_type] = template
+        return template
+
+    @staticmethod
+    def stats() -> dict:
+        """Hits & Misses Per Email Type, of All Workers When Metrics Are Multi-Process"""
+        counts = {
+            email_type: {MetricsConstants.HIT: 0, MetricsConstants.MISS: 0}
+            for email_type, _ in EmailTemplates.EMAIL_TYPES
+        }
+        name = "{namespace}_{name}_total".format(
+            namespace=MetricsConstants.NAMESPACE,
+            name=MetricsConstants.EMAIL_TEMPLATE_REQUESTS,
+        )
+        for metric in get_registry().collect():
+            for sample in metric.samples:
+                if sample.name == name and sample.labels["email_type"] in counts:
+                    counts[sample.labels["email_type"]][sample.labels["result"]] += int(
+                        sample.value
+                    )
+        return counts
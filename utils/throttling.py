@@ -0,0 +1,181 @@
+"""Redis Sliding Window Throttles, Requests Weighted by Endpoint Cost"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from redis.exceptions import RedisError
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+from utils.constants import ThrottleConstants
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Previous Window Counted in Proportion to its Overlap With the Sliding Window.
+# Refused Requests Are Not Counted, Returns {allowed, previous, current}.
+SLIDING_WINDOW_SCRIPT = """
+local previous = tonumber(redis.call("GET", KEYS[1]) or "0")
+local current = tonumber(redis.call("GET", KEYS[2]) or "0")
+local used = previous * tonumber(ARGV[3]) + current
+if used + tonumber(ARGV[2]) > tonumber(ARGV[1]) then
+    return {0, previous, current}
+end
+current = redis.call("INCRBY", KEYS[2], ARGV[2])
+redis.call("EXPIRE", KEYS[2], ARGV[4])
+return {1, previous, current}
+"""
+
+
+@dataclass
+class Quota:
+    """Client Quota After a Throttle Check"""
+
+    limit: int
+    remaining: int
+    reset: int
+
+    def headers(self) -> dict:
+        return {
+            ThrottleConstants.LIMIT_HEADER: str(self.limit),
+            ThrottleConstants.REMAINING_HEADER: str(self.remaining),
+            ThrottleConstants.RESET_HEADER: str(self.reset),
+        }
+
+
+class WeightedRateThrottle(SimpleRateThrottle):
+    """
+    Sliding Window Throttle Counting Cost Units Instead of Requests,
+    Views Set Costs Per Method in throttle_costs, Anything Else Costs a Read
+    """
+
+    @staticmethod
+    def get_cost(request, view) -> int:
+        """Cost of Request Method on View"""
+        return getattr(view, "throttle_costs", {}).get(
+            request.method, ThrottleConstants.READ_COST
+        )
+
+    def allow_request(self, request, view, cost: int | None = None):
+        """Charge Request Cost, or Given Cost When Views Charge Extra Work"""
+        ident = self.get_cache_key(request, view)
+        if self.rate is None or ident is None:
+            return True
+        if cost is None:
+            cost = self.get_cost(request, view)
+        now = time.time()
+        window = int(now // self.duration)
+        # Share of Previous Window Still Inside the Sliding Window.
+        weight = 1 - (now % self.duration) / self.duration
+        try:
+            allowed, previous, current = get_redis().eval(
+                SLIDING_WINDOW_SCRIPT,
+                2,
+                ThrottleConstants.KEY.format(
+                    scope=self.scope, ident=ident, window=window - 1
+                ),
+                ThrottleConstants.KEY.format(
+                    scope=self.scope, ident=ident, window=window
+                ),
+                self.num_requests,
+                cost,
+                weight,
+                self.duration * 2,
+            )
+        except RedisError as err:
+            # Throttling Must Not Take the API Down With Redis.
+            logger.warning("Throttle check failed: %s", err)
+            return True
+        window_left = (window + 1) * self.duration - now
+        used = previous * weight + current
+        self.retry_after = None
+        if not allowed:
+            excess = used + cost - self.num_requests
+            # Previous Window Drains Linearly, Else Wait for the Next Window.
+            if previous and current + cost <= self.num_requests:
+                self.retry_after = min(excess * self.duration / previous, window_left)
+            else:
+                self.retry_after = window_left
+        self.record_quota(
+            request,
+            Quota(
+                limit=self.num_requests,
+                remaining=max(math.floor(self.num_requests - used), 0),
+                reset=math.ceil(window_left),
+            ),
+        )
+        return bool(allowed)
+
+    @staticmethod
+    def record_quota(request, quota: Quota):
+        """Keep the Tightest Quota on Request for ThrottleHeadersMiddleware"""
+        request = getattr(request, "_request", request)
+        current = getattr(request, "throttle_quota", None)
+        if current is None or quota.remaining < current.remaining:
+            request.throttle_quota = quota
+
+    def wait(self):
+        return self.retry_after
+
+
+class UserRateThrottle(WeightedRateThrottle):
+    """Per User Quota, Anonymous Requests Left to IPRateThrottle"""
+
+    scope = "user"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.id
+        return None
+
+
+class IPRateThrottle(WeightedRateThrottle):
+    """Per Client IP Quota"""
+
+    scope = "ip"
+
+    def get_cache_key(self, request, view):
+        return self.get_ident(request)
+
+
+def check_throttles(request, view, cost: int | None = None):
+    """Run Default Throttles Outside DRF Views or Charge Extra Cost, Raises Throttled"""
+    waits = []
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, view, cost):
+            waits.append(throttle.wait())
+    if waits:
+        raise Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+
+class ThrottleHeadersMiddleware:
+    """Add Quota of Throttled Requests to Response Headers"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Async Views Are Awaited, Not Run in a Thread per Middleware.
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.add_headers(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_headers(request, await self.get_response(request))
+
+    @staticmethod
+    def add_headers(request, response):
+        quota = getattr(request, "throttle_quota", None)
+        if quota is not None:
+            for header, value in quota.headers().items():
+                response[header] = value
+        return response
@@ -1,5 +1,7 @@
 """Utilities Functions for PNR Scrapping"""
 
+from asgiref.sync import sync_to_async
+from users.authentication import TokenUserJWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
@@ -10,6 +12,11 @@ def get_model(app_name, model_name):
     return apps.get_model(app_label=app_name, model_name=model_name)
 
 
+async def authenticate_jwt(request):
+    """Authenticate JWT Bearer Token From Async Views, Returns (User, Token) or None"""
+    return await sync_to_async(TokenUserJWTAuthentication().authenticate)(request)
+
+
 class AuthService:
     def __tokens_for_user(self, user) -> dict:
         """generate tokens"""